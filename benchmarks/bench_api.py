@@ -0,0 +1,133 @@
+"""Benchmarks of the public ``fns_toolkit`` API on synthetic data.
+
+Every benchmark runs on one of two synthetic tables from
+:mod:`fns_toolkit.synth`, scaled by a factor of the size of the file the
+notebooks use:
+
+* ``epi`` – ``epidemiological_study`` (``create_epi_data.py``: 25,000 rows,
+  ~8% missing values);
+* ``metabolomics`` – ``metabolomics`` (``create_multivariate_data.py``:
+  1,000 samples × 200 metabolites).
+
+A benchmark is a function registered with :func:`benchmark`.  Its optional
+``setup`` runs before timing (e.g. to write a CSV) and returns the
+arguments of the timed call.  ``run.py`` times and compares them.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+
+from fns_toolkit import anova, cohens_d, fill_missing, get_dataset, synth
+from fns_toolkit.stats import correlate
+
+# Rows of each dataset at scale 1.
+SIZES = {"epi": 25_000, "metabolomics": 1_000}
+_GENERATORS = {"epi": "epidemiological_study", "metabolomics": "metabolomics"}
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    dataset: str
+    func: Callable
+    setup: Optional[Callable] = None
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(dataset: str, *, setup: Optional[Callable] = None):
+    """Register ``func(*setup(data, tmp))`` (default ``func(data)``) as a benchmark."""
+    def register(func):
+        BENCHMARKS[func.__name__] = Benchmark(func.__name__, dataset, func, setup)
+        return func
+    return register
+
+
+def make_data(dataset: str, scale: int, seed: int = 11088) -> pd.DataFrame:
+    """The synthetic table for ``dataset`` at ``scale`` × its notebook size."""
+    return synth.sample(_GENERATORS[dataset], SIZES[dataset] * scale, seed=seed)
+
+
+def _epi_numeric(data: pd.DataFrame) -> list[str]:
+    return [c for c in data.select_dtypes("number").columns if c != "ID"]
+
+
+def _metabolites(data: pd.DataFrame) -> list[str]:
+    return [c for c in data.columns if c.startswith("Metabolite_")]
+
+
+# ---------------------------------------------------------------------------
+# get_dataset
+# ---------------------------------------------------------------------------
+
+def _write_csv(data: pd.DataFrame, tmp: Path) -> tuple:
+    path = tmp / "epidemiological_study.csv"
+    data.to_csv(path, index=False)
+    return path, tmp / "cache"
+
+
+@benchmark("epi", setup=_write_csv)
+def get_dataset_cold(path: Path, cache_dir: Path) -> None:
+    get_dataset(path, cache_dir=cache_dir, refresh=True)
+
+
+def _cached_csv(data: pd.DataFrame, tmp: Path) -> tuple:
+    path, cache_dir = _write_csv(data, tmp)
+    get_dataset(path, cache_dir=cache_dir)
+    return path, cache_dir
+
+
+@benchmark("epi", setup=_cached_csv)
+def get_dataset_warm(path: Path, cache_dir: Path) -> None:
+    # Touch every column so the memory maps are actually read.
+    get_dataset(path, cache_dir=cache_dir).sum(numeric_only=True)
+
+
+# ---------------------------------------------------------------------------
+# fill_missing
+# ---------------------------------------------------------------------------
+
+@benchmark("epi")
+def fill_missing_mean(data: pd.DataFrame) -> None:
+    fill_missing(data, "mean")
+
+
+@benchmark("epi")
+def fill_missing_grouped(data: pd.DataFrame) -> None:
+    fill_missing(data.dropna(subset=["Sex"]), "median", by="Sex",
+                 locf=["BMI_Baseline", "BMI_Year2", "BMI_Year4", "BMI_Year6"])
+
+
+# ---------------------------------------------------------------------------
+# anova / cohens_d / correlate
+# ---------------------------------------------------------------------------
+
+@benchmark("epi")
+def anova_epi(data: pd.DataFrame) -> None:
+    anova(data, "Physical_Activity", columns=_epi_numeric(data))
+
+
+@benchmark("metabolomics")
+def anova_metabolomics(data: pd.DataFrame) -> None:
+    anova(data, "Label", columns=_metabolites(data))
+
+
+@benchmark("epi")
+def cohens_d_epi(data: pd.DataFrame) -> None:
+    cohens_d(data, "Smoking", columns=_epi_numeric(data))
+
+
+@benchmark("metabolomics")
+def cohens_d_metabolomics(data: pd.DataFrame) -> None:
+    cohens_d(data, "Label", columns=_metabolites(data))
+
+
+@benchmark("metabolomics")
+def correlate_metabolomics(data: pd.DataFrame) -> None:
+    correlate(data, columns=_metabolites(data), top_k=10)
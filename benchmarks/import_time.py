@@ -0,0 +1,77 @@
+"""Check that ``import fns_toolkit`` stays cheap.
+
+Runs ``python -X importtime -c "import fns_toolkit"`` in fresh interpreters
+and fails (exit status 1) when
+
+* the cumulative import time of ``fns_toolkit`` exceeds ``--budget-ms``
+  (the median of ``--runs`` runs, so one slow start does not count), or
+* a heavy dependency – NumPy, pandas, SciPy, statsmodels, PyMC, pytensor,
+  scikit-learn, matplotlib – is imported by the bare package import.
+
+``tests/test_import_time.py`` runs the same checks under pytest.
+
+Example:
+    $ python benchmarks/import_time.py
+    $ python benchmarks/import_time.py --budget-ms 20 --runs 9
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+DEFAULT_BUDGET_MS = 50.0
+HEAVY = ("numpy", "pandas", "scipy", "statsmodels", "pymc", "pytensor", "sklearn", "matplotlib")
+
+# "import time: <self us> | <cumulative us> | <indent><module>"
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_profile(module: str = "fns_toolkit") -> dict[str, int]:
+    """Cumulative import time in µs of every top-level module imported with ``module``."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True,
+    ).stderr
+    times = {}
+    for match in _LINE.finditer(stderr):
+        _, cumulative, _, name = match.groups()
+        times[name] = int(cumulative)
+    return times
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fail if `import fns_toolkit` gets slow or heavy.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    total_ms = statistics.median(p["fns_toolkit"] for p in profiles) / 1e3
+    heavy = sorted({name.split(".")[0] for p in profiles for name in p} & set(HEAVY))
+
+    print(f"import fns_toolkit: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if total_ms > args.budget_ms:
+        print("FAIL: over budget; slowest imports:")
+        slowest = sorted(profiles[0].items(), key=lambda kv: -kv[1])[:10]
+        for name, us in slowest:
+            print(f"  {us / 1e3:8.1f} ms  {name}")
+        failed = True
+    if heavy:
+        print(f"FAIL: bare import pulls in {', '.join(heavy)}")
+        failed = True
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Time the ``fns_toolkit`` benchmarks and compare them with a stored baseline.
+
+For every benchmark in ``bench_api.py`` and every requested scale this
+records
+
+* ``wall_s`` – the fastest of several runs (at least ``--repeat``, more
+  while the total stays under a second), or the median of that over
+  ``--rounds`` rounds with a fresh setup each;
+* ``wall_spread`` – the range of the rounds' best times relative to
+  ``wall_s``;
+* ``peak_mb`` – the peak of memory allocated during one extra run, traced
+  with :mod:`tracemalloc` (NumPy and pandas buffers included);
+* ``rows_per_s`` – input rows divided by ``wall_s``.
+
+The results are compared with ``baseline.json``: a benchmark whose time or
+peak memory grew by more than ``--threshold`` (and by more than a small
+absolute margin, so jitter of a few milliseconds does not count) is a
+regression, and the script exits with status 1.  The time of a benchmark
+may additionally grow by the ``wall_spread`` stored in its baseline, so
+disk-bound benchmarks such as ``get_dataset_cold`` do not fail at random
+while CPU-bound ones keep a tight gate.  Baselines are machine-specific;
+refresh them with ``--save-baseline`` (``BASELINE_ROUNDS`` rounds each) on
+the machine that runs the comparison.  ``baseline.json`` holds 1×, 10× and
+100× entries; the default run covers 1× and 10×, so pass ``--scales 100``
+to check the slow 100× tier.  Everything runs offline: the data come from
+:mod:`fns_toolkit.synth`.
+
+Example:
+    $ python benchmarks/run.py                        # 1× and 10×, vs baseline.json
+    $ python benchmarks/run.py --scales 100           # the 100× tier, a few minutes
+    $ python benchmarks/run.py --scales 1 10 100 -k anova --threshold 0.5
+    $ python benchmarks/run.py --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional, Sequence
+
+HERE = Path(__file__).resolve().parent
+# Run from a checkout without installing: bench_api imports fns_toolkit.
+sys.path[:0] = [str(HERE), str(HERE.parent / "src")]
+
+import bench_api  # noqa: E402
+
+DEFAULT_BASELINE = HERE / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+# Changes smaller than these are noise, whatever their relative size.
+MIN_WALL_S = 0.01
+MIN_PEAK_MB = 1.0
+_MIN_TOTAL_S = 1.0
+# Rounds behind a saved baseline, so its spread covers cold-start variation.
+BASELINE_ROUNDS = 5
+
+
+def machine() -> dict:
+    """What the timings depend on besides the code."""
+    import numpy as np
+    import pandas as pd
+
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def measure(func, args: tuple, repeat: int) -> tuple[list[float], float]:
+    """Wall times (s) of the timed runs and traced peak allocation (MB)."""
+    times = []
+    while len(times) < repeat or (sum(times) < _MIN_TOTAL_S and len(times) < 50):
+        gc.collect()
+        t0 = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return times, peak / 1e6
+
+
+def run(scales: Sequence[int], *, pattern: Optional[str] = None, repeat: int = 3,
+        rounds: int = 1, seed: int = 11088) -> dict:
+    """Run the selected benchmarks at every scale.
+
+    Each of the ``rounds`` starts from a fresh ``setup`` (new files, cold
+    caches).  ``wall_s`` is the median of the rounds' best times and
+    ``wall_spread`` their range relative to ``wall_s``.
+
+    Returns:
+        dict: ``{"<name>[<scale>x]": {"rows", "wall_s", "wall_spread",
+        "peak_mb", "rows_per_s"}}``.
+    """
+    selected = [b for b in bench_api.BENCHMARKS.values() if not pattern or pattern in b.name]
+    results = {}
+    for scale in scales:
+        for dataset in sorted({b.dataset for b in selected}):
+            data = bench_api.make_data(dataset, scale, seed)
+            for bench in (b for b in selected if b.dataset == dataset):
+                best, peaks = [], []
+                for _ in range(max(1, rounds)):
+                    with tempfile.TemporaryDirectory(prefix="fns-bench-") as tmp:
+                        args = bench.setup(data, Path(tmp)) if bench.setup else (data,)
+                        round_times, peak = measure(bench.func, args, repeat)
+                    best.append(min(round_times))
+                    peaks.append(peak)
+                wall, peak = statistics.median(best), max(peaks)
+                key = f"{bench.name}[{scale}x]"
+                results[key] = {
+                    "rows": len(data),
+                    "wall_s": round(wall, 6),
+                    "wall_spread": round((max(best) - min(best)) / wall, 3),
+                    "peak_mb": round(peak, 3),
+                    "rows_per_s": round(len(data) / wall, 1),
+                }
+                print(f"{key:<36} {wall:10.4f} s {peak:10.1f} MB "
+                      f"{len(data) / wall:14,.0f} rows/s", flush=True)
+            del data
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Descriptions of every benchmark slower or larger than its baseline.
+
+    A benchmark's time may grow by ``threshold`` plus the run-to-run spread
+    recorded with its baseline, so noisy (e.g. disk-bound) benchmarks get
+    the slack they need without loosening the gate for the others.
+    """
+    regressions = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        allowed = {"wall_s": threshold + old.get("wall_spread", 0.0), "peak_mb": threshold}
+        for metric, margin, unit in (("wall_s", MIN_WALL_S, "s"), ("peak_mb", MIN_PEAK_MB, "MB")):
+            before, after = old[metric], new[metric]
+            if after > before * (1 + allowed[metric]) and after - before > margin:
+                regressions.append(f"{key}: {metric} {before:g} {unit} → {after:g} {unit} "
+                                   f"(+{(after / before - 1) * 100:.0f}%, "
+                                   f"allowed +{allowed[metric] * 100:.0f}%)")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fns_toolkit and compare with a baseline.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10],
+                        help="multiples of the notebook dataset sizes")
+    parser.add_argument("-k", dest="pattern", default=None, help="only benchmarks containing this")
+    parser.add_argument("--repeat", type=int, default=3, help="minimum timed runs per benchmark")
+    parser.add_argument("--rounds", type=int, default=None,
+                        help="independent rounds per benchmark, each with a fresh setup "
+                             f"(default: {BASELINE_ROUNDS} with --save-baseline, else 1)")
+    parser.add_argument("--seed", type=int, default=11088)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative growth of time and peak memory")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results in the baseline instead of comparing")
+    parser.add_argument("--output", type=Path, default=None, help="write the results JSON here")
+    args = parser.parse_args(argv)
+
+    rounds = args.rounds or (BASELINE_ROUNDS if args.save_baseline else 1)
+    results = run(args.scales, pattern=args.pattern, repeat=args.repeat, rounds=rounds,
+                  seed=args.seed)
+    current = {"machine": machine(), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.save_baseline:
+        # Keep entries of benchmarks and scales that were not run this time.
+        merged = {**stored.get("results", {}), **results}
+        args.baseline.write_text(json.dumps({"machine": machine(), "results": merged}, indent=2) + "\n")
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return 0
+
+    if not stored:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    if stored.get("machine") != current["machine"]:
+        print("Note: the baseline was recorded on a different machine or library versions.")
+    missing = sorted(set(results) - set(stored["results"]))
+    if missing:
+        print(f"No baseline for: {', '.join(missing)}")
+    regressions = compare(results, stored["results"], args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regression(s) beyond +{args.threshold:.0%} plus run-to-run spread")
+    return int(bool(regressions))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,6 +49,7 @@ setup(
     packages=find_packages(where="src"),
     package_dir={"": "src"},
     include_package_data=True,
+    package_data={"fns_toolkit": ["data_manifest.json"]},
     install_requires=[
         # ⤷ keep in sync with requirements.txt
         "pandas>=2.0",
@@ -80,6 +81,7 @@ setup(
         "console_scripts": [
             # after `pip install -e .` you can type  fns-download-data  on the command line
             "fns-download-data=fns_toolkit.cli:download_data",
+            "fns-run-notebooks=fns_toolkit.run_notebooks:main",
         ],
     },
     classifiers=[
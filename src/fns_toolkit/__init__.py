@@ -1,16 +1,59 @@
-from importlib import metadata as _md
-__version__ = _md.version(__name__)
+"""Teaching toolkit for Food & Nutrition Science data analysis.
+
+Names are resolved on first use (PEP 562): ``import fns_toolkit`` imports
+no submodule, so command-line tools and short-lived worker processes do
+not pay for pandas, SciPy or PyMC before they need them.
+``fns_toolkit.anova`` imports :mod:`fns_toolkit.stats` the first time it is
+looked up; submodules such as ``fns_toolkit.synth`` load the same way.
+"""
+
+from importlib import import_module as _import_module
+
+# Public name → submodule that defines it.
+_EXPORTS = {
+    "get_dataset": ".datasets",
+    "snake_case_columns": ".cleaning",
+    "fill_missing": ".cleaning",
+    "anova": ".stats",
+    "cohens_d": ".stats",
+}
+_SUBMODULES = frozenset({
+    "aggregate", "bayes", "cleaning", "cli", "dashboard", "datasets", "db", "describe", "design",
+    "indices", "models", "multivariate", "profiling", "run_notebooks", "stats", "survival", "synth",
+    "text",
+})
+_DISTRIBUTION = "data-analysis-toolkit-fns"
 
-from .datasets import get_dataset
-from .cleaning import snake_case_columns, fill_missing
-from .stats import anova, cohens_d
-# …and so on
 __all__ = [
     "get_dataset",
     "snake_case_columns",
     "fill_missing",
     "anova",
     "cohens_d",
-    # …
 ]
 
+
+def _version() -> str:
+    from importlib import metadata
+
+    try:
+        return metadata.version(_DISTRIBUTION)
+    except metadata.PackageNotFoundError:  # source checkout without install
+        return "0+unknown"
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(_import_module(_EXPORTS[name], __name__), name)
+    elif name in _SUBMODULES:
+        value = _import_module(f".{name}", __name__)
+    elif name == "__version__":
+        value = _version()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value     # later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__) | _SUBMODULES | {"__version__"})
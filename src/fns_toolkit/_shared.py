@@ -0,0 +1,45 @@
+"""NumPy arrays in shared memory for process-pool workers.
+
+The parent copies an array into a ``multiprocessing.shared_memory`` block once
+and hands the workers a small picklable spec; each worker maps the same pages
+instead of receiving a pickled copy per task.
+"""
+
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedArray:
+    """Owner of a shared-memory copy of ``array``; use as a context manager."""
+
+    def __init__(self, array: np.ndarray):
+        array = np.ascontiguousarray(array)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.array = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)
+        self.array[...] = array
+        self.spec = (self._shm.name, array.shape, array.dtype.str)
+
+    def close(self) -> None:
+        self.array = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach(spec: tuple) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Map a :class:`SharedArray` created by another process (read-only)."""
+    name, shape, dtype = spec
+    # Workers share the parent's resource tracker, so attaching here only
+    # re-registers a name the tracker already knows; the owner unlinks it.
+    shm = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    array.flags.writeable = False
+    return shm, array
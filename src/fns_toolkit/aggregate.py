@@ -0,0 +1,466 @@
+"""Out-of-core nutrient summaries of long food logs.
+
+Notebook 5.2 summarises a food log with
+``df.groupby([group_by, "Nutrient"])["Amount"].mean().unstack()``, which needs
+the whole log in memory.  :class:`FoodLogAggregate` instead keeps, for every
+``(group, Nutrient)`` cell, a few numbers that can be *added up*:
+
+* ``count``, ``sum``, ``sumsq``, ``min`` and ``max`` – enough for the mean,
+  variance and range;
+* a log-bucketed histogram of the amounts (a DDSketch-style quantile sketch)
+  whose quantiles are within ``relative_accuracy`` of the exact ones.
+
+Two aggregates of different parts of the log merge into the aggregate of the
+whole, so the log can be read in pieces, in parallel, and in later sessions.
+The memory used depends on the number of groups and sketch buckets, never on
+the number of rows.
+
+CSV logs are split into byte ranges that worker processes parse on their own;
+Parquet logs are split by row group.  The aggregate remembers how far it has
+read each file, so :func:`summarize_nutrients` with ``state=`` only reads the
+rows appended since the last run.
+
+Example:
+    >>> summarize_nutrients("large_food_log.csv", "Meal", n_jobs=8)
+    >>> summarize_nutrients("food_log.csv", "Meal", stat=0.9, state="food_log.agg")
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+GroupBy = Union[str, Sequence[str]]
+
+# Bytes of CSV parsed by one task.
+DEFAULT_CHUNK_BYTES = 64 << 20
+
+# |x| below this goes to the sketch's zero bucket.
+_MIN_INDEXABLE = 1e-9
+
+_STATS = ("count", "sum", "sumsq", "min", "max")
+_MERGE = {"count": "sum", "sum": "sum", "sumsq": "sum", "min": "min", "max": "max"}
+
+
+class FoodLogAggregate:
+    """Mergeable per-group statistics of a long food log.
+
+    Args:
+        group_by: Column(s) to summarise by, e.g. ``"Meal"`` or ``["ID", "Meal"]``.
+        key: Column spread across the columns of the summary.
+        value: Numeric column being summarised.
+        relative_accuracy: Relative error bound of the quantile sketch.
+    """
+
+    def __init__(
+        self,
+        group_by: GroupBy = "Meal",
+        *,
+        key: str = "Nutrient",
+        value: str = "Amount",
+        relative_accuracy: float = 0.01,
+    ):
+        self.group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+        self.key = key
+        self.value = value
+        self.relative_accuracy = relative_accuracy
+        self._gamma, self._offset = _sketch_mapping(relative_accuracy)
+        levels = self.group_by + [key]
+        empty = pd.MultiIndex.from_arrays([[]] * len(levels), names=levels)
+        self.stats = pd.DataFrame({s: pd.Series(dtype=float) for s in _STATS}, index=empty)
+        self.sketch = pd.Series(
+            dtype=np.int64,
+            index=pd.MultiIndex.from_arrays([[]] * (len(levels) + 1), names=levels + ["bucket"]),
+        )
+        # Bytes (CSV) or row groups (Parquet) already read, per file.
+        self.sources: dict[str, int] = {}
+
+    @property
+    def columns(self) -> list[str]:
+        """Columns read from the log."""
+        return self.group_by + [self.key, self.value]
+
+    # -- sketch buckets ------------------------------------------------------
+
+    def _bucket(self, x: np.ndarray) -> np.ndarray:
+        return _sketch_bucket(x, self._gamma, self._offset)
+
+    # -- building ------------------------------------------------------------
+
+    def update(self, chunk: pd.DataFrame) -> "FoodLogAggregate":
+        """Add the rows of ``chunk`` to the aggregate."""
+        levels = self.group_by + [self.key]
+        amount = pd.to_numeric(chunk[self.value], errors="coerce").to_numpy(dtype=float)
+        keep = ~np.isnan(amount)
+        codes, uniques = [], []
+        for col in levels:
+            c, u = pd.factorize(chunk[col])
+            keep &= c >= 0
+            codes.append(c)
+            uniques.append(u)
+        if not keep.any():
+            return self
+        amount = amount[keep]
+        shape = tuple(len(u) for u in uniques)
+        cells, cell = _compact(np.ravel_multi_index([c[keep] for c in codes], shape), int(np.prod(shape)))
+
+        # One bincount per statistic instead of a groupby per statistic.
+        n_cells = len(cells)
+        lo = np.full(n_cells, np.inf)
+        hi = np.full(n_cells, -np.inf)
+        np.minimum.at(lo, cell, amount)
+        np.maximum.at(hi, cell, amount)
+        index = pd.MultiIndex.from_arrays(
+            [u[i] for u, i in zip(uniques, np.unravel_index(cells, shape))], names=levels
+        )
+        stats = pd.DataFrame({
+            "count": np.bincount(cell, minlength=n_cells).astype(float),
+            "sum": np.bincount(cell, amount, minlength=n_cells),
+            "sumsq": np.bincount(cell, amount * amount, minlength=n_cells),
+            "min": lo,
+            "max": hi,
+        }, index=index)
+
+        bucket = self._bucket(amount)
+        low, width = bucket.min(), int(bucket.max() - bucket.min()) + 1
+        pairs, pair = _compact(cell * width + (bucket - low), n_cells * width)
+        sketch = pd.Series(
+            np.bincount(pair, minlength=len(pairs)),
+            index=pd.MultiIndex.from_arrays(
+                [index.get_level_values(i)[pairs // width] for i in range(len(levels))]
+                + [pairs % width + low],
+                names=levels + ["bucket"],
+            ),
+        )
+        self._combine(stats, sketch)
+        return self
+
+    def _combine(self, stats: pd.DataFrame, sketch: pd.Series) -> None:
+        if len(self.stats):
+            stats = pd.concat([self.stats, stats]).groupby(level=list(range(stats.index.nlevels))).agg(_MERGE)
+            sketch = pd.concat([self.sketch, sketch]).groupby(level=list(range(sketch.index.nlevels))).sum()
+        self.stats = stats.sort_index()
+        self.sketch = sketch.sort_index()
+
+    def merge(self, other: "FoodLogAggregate") -> "FoodLogAggregate":
+        """Add another aggregate (of different rows) into this one."""
+        if (other.group_by, other.key, other.value, other.relative_accuracy) != (
+            self.group_by, self.key, self.value, self.relative_accuracy
+        ):
+            raise ValueError("Can only merge aggregates with the same columns and accuracy")
+        if len(other.stats):
+            self._combine(other.stats, other.sketch)
+        for path, pos in other.sources.items():
+            self.sources[path] = max(pos, self.sources.get(path, 0))
+        return self
+
+    @profiled
+    def scan(
+        self,
+        paths: Union[PathLike, Iterable[PathLike]],
+        *,
+        n_jobs: Optional[int] = 1,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    ) -> "FoodLogAggregate":
+        """Read the unread part of one or more CSV/Parquet logs.
+
+        Args:
+            paths: Files, or directories of ``*.parquet`` part files.
+            n_jobs: Worker processes (``None`` = ``os.cpu_count()``).
+            chunk_bytes: Bytes of CSV per task.
+
+        Returns:
+            FoodLogAggregate: ``self``, updated.
+        """
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        tasks = []
+        for path in _expand(paths):
+            key = str(path.resolve())
+            if path.suffix == ".parquet":
+                tasks += self._parquet_tasks(path, key)
+            else:
+                tasks += self._csv_tasks(path, key, chunk_bytes)
+        if not tasks:
+            return self
+
+        template = FoodLogAggregate(self.group_by, key=self.key, value=self.value,
+                                    relative_accuracy=self.relative_accuracy)
+        for part in _run_tasks(_run_task, template, tasks, n_jobs):
+            self.merge(part)
+        return self
+
+    def _csv_tasks(self, path: Path, key: str, chunk_bytes: int) -> list:
+        return [("csv",) + task for task in _csv_tasks(path, self.sources, chunk_bytes)]
+
+    def _parquet_tasks(self, path: Path, key: str) -> list:
+        import pyarrow.parquet as pq
+
+        n_groups = pq.ParquetFile(path).num_row_groups
+        start = self.sources.get(key, 0)
+        self.sources[key] = n_groups
+        return [("parquet", key, g, g + 1, None) for g in range(start, n_groups)]
+
+    # -- results -------------------------------------------------------------
+
+    def table(self, quantiles: Sequence[float] = (0.5,)) -> pd.DataFrame:
+        """Long table of every statistic, one row per ``(group, key)`` cell."""
+        s = self.stats
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = s["sum"] / s["count"]
+            var = ((s["sumsq"] - s["sum"] * mean) / (s["count"] - 1)).clip(lower=0)
+        out = pd.DataFrame({
+            "count": s["count"].astype(np.int64),
+            "mean": mean,
+            "std": np.sqrt(var),
+            "min": s["min"],
+            "max": s["max"],
+            "sum": s["sum"],
+        })
+        for q in quantiles:
+            out[f"q{q:g}"] = self.quantile(q)
+        return out
+
+    def quantile(self, q: float) -> pd.Series:
+        """Approximate ``q``-quantile of every cell from the sketch."""
+        result = _sketch_quantile(self.sketch, q, self._gamma, self._offset)
+        # Clamp to the exact range, which also makes single-value cells exact.
+        return result.clip(self.stats["min"], self.stats["max"]).reindex(self.stats.index)
+
+    def summary(self, stat: Union[str, float] = "mean") -> pd.DataFrame:
+        """Wide table (groups × key), like ``groupby(...).mean().unstack()``.
+
+        Args:
+            stat: ``"mean"``, ``"std"``, ``"count"``, ``"sum"``, ``"min"``,
+                ``"max"``, ``"median"`` or a quantile between 0 and 1.
+        """
+        if stat == "median":
+            stat = 0.5
+        if isinstance(stat, float):
+            column = self.quantile(stat)
+        else:
+            table = self.table(quantiles=())
+            if stat not in table:
+                raise ValueError(f"Unknown statistic {stat!r}")
+            column = table[stat]
+        return column.unstack(self.key)
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, path: PathLike) -> None:
+        """Write the aggregate (and read positions) to ``path`` atomically."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        pd.to_pickle(self, tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: PathLike) -> "FoodLogAggregate":
+        """Read an aggregate written by :meth:`save`."""
+        agg = pd.read_pickle(path)
+        if not isinstance(agg, cls):
+            raise TypeError(f"{path} does not hold a {cls.__name__}")
+        return agg
+
+
+def _sketch_mapping(relative_accuracy: float) -> tuple[float, int]:
+    """Bucket growth factor and index offset of a sketch with this accuracy."""
+    gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+    return gamma, int(np.ceil(np.log(_MIN_INDEXABLE) / np.log(gamma))) - 1
+
+
+def _sketch_bucket(x: np.ndarray, gamma: float, offset: int) -> np.ndarray:
+    """Signed log bucket of every value (0 for ``|x|`` below ``_MIN_INDEXABLE``)."""
+    mag = np.abs(x)
+    with np.errstate(divide="ignore"):
+        idx = np.ceil(np.log(mag) / np.log(gamma)) - offset
+    idx = np.where(mag < _MIN_INDEXABLE, 0, idx)
+    return (np.sign(x) * idx).astype(np.int64)
+
+
+def _sketch_value(bucket: np.ndarray, gamma: float, offset: int) -> np.ndarray:
+    k = np.abs(bucket) + offset
+    value = 2 * gamma ** k / (gamma + 1)
+    return np.where(bucket == 0, 0.0, np.sign(bucket) * value)
+
+
+def _sketch_quantile(sketch: pd.Series, q: float, gamma: float, offset: int) -> pd.Series:
+    """``q``-quantile per cell of bucket counts indexed by ``(*cell, bucket)``, sorted."""
+    levels = list(range(sketch.index.nlevels - 1))
+    counts = sketch.to_numpy()
+    cum = sketch.groupby(level=levels, sort=False).cumsum().to_numpy()
+    total = sketch.groupby(level=levels, sort=False).transform("sum").to_numpy()
+    # First bucket whose cumulative count passes the rank q·(n − 1).
+    hit = (cum - counts <= q * (total - 1)) & (q * (total - 1) < cum)
+    picked = sketch[hit]
+    value = _sketch_value(picked.index.get_level_values(-1).to_numpy(), gamma, offset)
+    return pd.Series(value, index=picked.index.droplevel(-1))
+
+
+def _compact(flat: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Distinct values of ``flat`` and each element's position among them."""
+    if size <= max(4 * len(flat), 1 << 20):
+        present = np.bincount(flat, minlength=size) > 0
+        return np.flatnonzero(present), (np.cumsum(present) - 1)[flat]
+    return np.unique(flat, return_inverse=True)
+
+
+def _expand(paths: Iterable[PathLike]) -> list[Path]:
+    files = []
+    for path in map(Path, paths):
+        files += sorted(path.glob("*.parquet")) if path.is_dir() else [path]
+    return files
+
+
+def _csv_extent(path: PathLike) -> tuple[bytes, int, int]:
+    """Header line, size and end of the last complete line of a CSV file."""
+    with open(path, "rb") as f:
+        header = f.readline()
+        # Stop at the last complete line: a row still being appended is
+        # picked up by the next scan.
+        f.seek(0, os.SEEK_END)
+        size = tail = f.tell()
+        while tail > len(header):
+            lo = max(len(header), tail - 4096)
+            f.seek(lo)
+            nl = f.read(tail - lo).rfind(b"\n")
+            if nl >= 0:
+                tail = lo + nl + 1
+                break
+            tail = lo
+    return header, size, tail
+
+
+def _csv_header(header: bytes) -> list[str]:
+    """Column names of a CSV header line (quoted names may hold commas)."""
+    return next(csv.reader([header.decode()]), [])
+
+
+def _csv_tasks(path: PathLike, sources: dict, chunk_bytes: int) -> list[tuple]:
+    """``(key, lo, hi, names)`` byte ranges of the unread part of a CSV file.
+
+    ``sources`` maps resolved paths to the offset read so far and is moved
+    to the end of the last complete line.
+
+    Raises:
+        ValueError: If the file is shorter than its recorded offset.
+    """
+    key = str(Path(path).resolve())
+    header, size, tail = _csv_extent(path)
+    start = sources.get(key, len(header))
+    if start > size:
+        raise ValueError(f"{path} is shorter than when it was last read; start from scratch")
+    names = _csv_header(header)
+    sources[key] = max(start, tail)
+    return [(key, lo, min(lo + chunk_bytes, tail), names) for lo in range(start, tail, chunk_bytes)]
+
+
+def _run_tasks(func, template, tasks: list, n_jobs: Optional[int]):
+    """Yield ``func(template, *task)`` for every task, in order, using up to ``n_jobs`` processes."""
+    n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, len(tasks)))
+    if n_jobs == 1:
+        for task in tasks:
+            yield func(template, *task)
+    else:
+        with ProcessPoolExecutor(n_jobs) as pool:
+            yield from pool.map(func, [template] * len(tasks), *zip(*tasks))
+
+
+def _read_csv_range(path: PathLike, lo: int, hi: int, names: Sequence[str],
+                    **kwargs) -> Optional[pd.DataFrame]:
+    """Rows of a headerless CSV byte range ``[lo, hi)``, or ``None`` if it has none."""
+    with open(path, "rb") as f:
+        # A range owns the lines that *start* inside it.
+        if lo:
+            f.seek(lo - 1)
+            f.readline()
+        begin = f.tell()
+        if begin >= hi:
+            return None
+        f.seek(hi - 1)
+        f.readline()
+        end = f.tell()
+        f.seek(begin)
+        data = f.read(end - begin)
+    return pd.read_csv(io.BytesIO(data), header=None, names=names, **kwargs)
+
+
+def _run_task(template: FoodLogAggregate, kind, key, lo, hi, names) -> FoodLogAggregate:
+    """Aggregate one byte range of a CSV, or one row group of a Parquet file."""
+    agg = FoodLogAggregate(template.group_by, key=template.key, value=template.value,
+                           relative_accuracy=template.relative_accuracy)
+    if kind == "parquet":
+        import pyarrow.parquet as pq
+
+        chunk = pq.ParquetFile(key).read_row_group(lo, columns=agg.columns).to_pandas()
+        return agg.update(chunk)
+    chunk = _read_csv_range(key, lo, hi, names, usecols=agg.columns, dtype={agg.value: float})
+    if chunk is not None:
+        agg.update(chunk)
+    return agg
+
+
+@profiled
+def summarize_nutrients(
+    source: Union[pd.DataFrame, PathLike, Sequence[PathLike]],
+    group_by: GroupBy = "Meal",
+    *,
+    stat: Union[str, float] = "mean",
+    n_jobs: Optional[int] = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    state: Optional[PathLike] = None,
+    relative_accuracy: float = 0.01,
+) -> pd.DataFrame:
+    """Nutrient summary of a food log that may not fit in memory.
+
+    Out-of-core version of ``summarize_nutrients`` from notebook 5.2: the same
+    ``group_by × Nutrient`` table of mean ``Amount`` by default.
+
+    Args:
+        source: A DataFrame, a CSV/Parquet file, a directory of Parquet parts
+            or a list of those files.
+        group_by: Column(s) forming the rows of the summary.
+        stat: Statistic in each cell (see :meth:`FoodLogAggregate.summary`).
+        n_jobs: Worker processes for file input.
+        chunk_bytes: Bytes of CSV per task.
+        state: File holding the aggregate between runs.  If it exists, only
+            rows appended to ``source`` since it was written are read; it is
+            then updated.  File input only: a DataFrame carries no record of
+            which rows an earlier run already counted.
+        relative_accuracy: Relative error bound of quantile statistics.
+
+    Returns:
+        DataFrame: One row per group, one column per nutrient.
+
+    Raises:
+        ValueError: If ``state`` is given with a DataFrame ``source``, or
+            belongs to a different grouping.
+    """
+    if state is not None and isinstance(source, pd.DataFrame):
+        raise ValueError("state= needs file input; update a FoodLogAggregate "
+                         "with only the new rows of a DataFrame instead")
+    if state is not None and Path(state).exists():
+        agg = FoodLogAggregate.load(state)
+        wanted = [group_by] if isinstance(group_by, str) else list(group_by)
+        if agg.group_by != wanted:
+            raise ValueError(f"{state} groups by {agg.group_by}, not {wanted}")
+    else:
+        agg = FoodLogAggregate(group_by, relative_accuracy=relative_accuracy)
+
+    if isinstance(source, pd.DataFrame):
+        agg.update(source)
+    else:
+        agg.scan(source, n_jobs=n_jobs, chunk_bytes=chunk_bytes)
+    if state is not None:
+        agg.save(state)
+    return agg.summary(stat)
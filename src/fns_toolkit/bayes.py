@@ -0,0 +1,232 @@
+"""Disk cache for PyMC posterior samples, keyed by what determines them.
+
+The Bayesian notebooks (5.1, 5.3, 10.2, 10.3, 10.4, 10.8) rebuild their
+models and call ``pm.sample`` on every execution, so re-rendering the site
+re-runs minutes of MCMC whose result has not changed.  :func:`sample` is a
+drop-in for ``pm.sample`` that first computes a fingerprint of
+
+* the model graph – every random variable, deterministic and potential,
+  printed without memory addresses;
+* every constant and shared value in that graph (priors' parameters,
+  observed data, ``pm.Data`` containers), hashed by their bytes;
+* the sampler arguments (draws, tune, chains, ``random_seed`` …) and the
+  PyMC version.
+
+If a trace with that fingerprint exists it is read back from netCDF in well
+under a second, without compiling anything.  Otherwise the model is sampled
+and the ``InferenceData`` is stored.  Old traces are evicted least recently
+used first once the cache exceeds ``max_bytes``.
+
+:func:`configure_compiledir` points pytensor's compiled C-module cache at the
+same cache directory, so fresh processes (and CI runners restoring that
+directory) reuse compiled functions on a miss too.  Call it before importing
+PyMC.
+
+Example:
+    >>> from fns_toolkit import bayes
+    >>> bayes.configure_compiledir()
+    >>> import pymc as pm
+    >>> with pm.Model() as model:
+    ...     ...
+    >>> idata = bayes.sample(model, draws=1000, chains=4, random_seed=11088)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from .datasets import default_cache_dir
+from .profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+DEFAULT_MAX_BYTES = 2 << 30
+_SUFFIX = ".nc"
+# Object reprs in the printed graph, e.g. "RNG(<Generator(PCG64) at 0x7F58…>)".
+_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def trace_cache_dir() -> Path:
+    """Where traces are stored: ``<dataset cache>/traces``."""
+    return default_cache_dir() / "traces"
+
+
+def configure_compiledir(path: Optional[PathLike] = None) -> Path:
+    """Share pytensor's compiled-module cache across processes.
+
+    Sets ``base_compiledir`` through ``PYTENSOR_FLAGS`` (read when pytensor is
+    first imported) and, if pytensor is already imported, on its config.
+
+    Args:
+        path: Directory to use (default: ``<dataset cache>/pytensor``).
+
+    Returns:
+        Path: The compile directory.
+    """
+    path = Path(path) if path is not None else default_cache_dir() / "pytensor"
+    path.mkdir(parents=True, exist_ok=True)
+    flags = [f for f in os.environ.get("PYTENSOR_FLAGS", "").split(",")
+             if f and not f.startswith("base_compiledir=")]
+    os.environ["PYTENSOR_FLAGS"] = ",".join(flags + [f"base_compiledir={path}"])
+    if "pytensor" in sys.modules:
+        sys.modules["pytensor"].config.base_compiledir = str(path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Fingerprints
+# ---------------------------------------------------------------------------
+
+def _hash_value(h, value) -> None:
+    array = np.asarray(value)
+    h.update(str((array.dtype.str, array.shape)).encode())
+    if array.dtype == object:
+        h.update(repr(array.tolist()).encode())
+    else:
+        h.update(np.ascontiguousarray(array).tobytes())
+
+
+def fingerprint(model, **sample_kwargs) -> str:
+    """SHA-256 of a model's graph, its data and the sampler settings.
+
+    Args:
+        model: A ``pymc.Model``.
+        **sample_kwargs: The arguments that will be passed to ``pm.sample``.
+
+    Returns:
+        str: Hex digest identifying the posterior sample.
+    """
+    import pymc as pm
+    import pytensor
+    from pytensor.compile.sharedvalue import SharedVariable
+    from pytensor.graph.basic import Constant
+
+    try:
+        from pytensor.graph.traversal import ancestors
+    except ImportError:     # pytensor < 2.32
+        from pytensor.graph.basic import ancestors
+
+    outputs = list(model.basic_RVs) + list(model.deterministics) + list(model.potentials)
+    h = hashlib.sha256()
+    h.update(f"pymc={pm.__version__};pytensor={pytensor.__version__}".encode())
+    graph = pytensor.printing.debugprint(outputs, file="str", id_type="", print_type=True)
+    h.update(_ADDRESS.sub("", graph).encode())
+    h.update(repr(sorted(rv.name for rv in model.observed_RVs)).encode())
+
+    # Constants and shared values are not fully printed above; hash their data.
+    for var in ancestors(outputs + list(model.rvs_to_values.values())):
+        if isinstance(var, Constant):
+            h.update(b"c")
+            _hash_value(h, var.data)
+        elif isinstance(var, SharedVariable):
+            value = var.get_value(borrow=True)
+            # RV generators are freshly seeded per model build and reseeded
+            # from random_seed by pm.sample; their state does not matter.
+            if isinstance(value, (np.random.Generator, np.random.RandomState)):
+                continue
+            h.update(f"s:{var.name}".encode())
+            _hash_value(h, value)
+
+    # Objects without a stable repr (e.g. step methods) make every call a miss.
+    h.update(json.dumps(sample_kwargs, sort_keys=True, default=repr).encode())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def _entries(cache_dir: Path) -> list[Path]:
+    return sorted(cache_dir.glob(f"*{_SUFFIX}"), key=lambda p: p.stat().st_mtime)
+
+
+def evict(cache_dir: Optional[PathLike] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> list[Path]:
+    """Delete least recently used traces until the cache fits in ``max_bytes``."""
+    cache_dir = Path(cache_dir) if cache_dir is not None else trace_cache_dir()
+    entries = _entries(cache_dir)
+    total = sum(p.stat().st_size for p in entries)
+    removed = []
+    for path in entries:
+        if total <= max_bytes:
+            break
+        total -= path.stat().st_size
+        path.unlink(missing_ok=True)
+        removed.append(path)
+    return removed
+
+
+def cache_info(cache_dir: Optional[PathLike] = None):
+    """Stored traces, most recently used last, with size and last use."""
+    import pandas as pd
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else trace_cache_dir()
+    rows = [{"key": p.stem, "bytes": p.stat().st_size,
+             "last_used": pd.Timestamp(p.stat().st_mtime, unit="s")} for p in _entries(cache_dir)]
+    return pd.DataFrame(rows, columns=["key", "bytes", "last_used"])
+
+
+def clear_cache(cache_dir: Optional[PathLike] = None) -> None:
+    """Delete every stored trace."""
+    evict(cache_dir, max_bytes=-1)
+
+
+@profiled
+def sample(
+    model=None,
+    *,
+    cache_dir: Optional[PathLike] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    refresh: bool = False,
+    **sample_kwargs,
+):
+    """``pm.sample`` with a disk cache of the resulting ``InferenceData``.
+
+    Pass ``random_seed`` to make a cached trace identical to a fresh one;
+    without it a hit returns the trace of an earlier run.
+
+    Args:
+        model: The model (default: the model of the enclosing ``with`` block).
+        cache_dir: Trace directory (default: :func:`trace_cache_dir`).
+        max_bytes: Size limit of the cache; LRU entries beyond it are evicted.
+        refresh: Sample again even if a cached trace exists.
+        **sample_kwargs: Passed to ``pm.sample``.
+
+    Returns:
+        arviz.InferenceData: The posterior sample.
+    """
+    import arviz as az
+    import pymc as pm
+
+    model = pm.modelcontext(model)
+    cache_dir = Path(cache_dir) if cache_dir is not None else trace_cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"{fingerprint(model, **sample_kwargs)}{_SUFFIX}"
+
+    if path.exists() and not refresh:
+        idata = az.from_netcdf(path)
+        for group in idata.groups():
+            getattr(idata, group).load()    # read fully, so the file can be evicted
+        os.utime(path)                      # mark as recently used
+        return idata
+
+    sample_kwargs.setdefault("return_inferencedata", True)
+    with model:
+        idata = pm.sample(**sample_kwargs)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        idata.to_netcdf(tmp)
+        os.replace(tmp, path)
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+    evict(cache_dir, max_bytes)
+    return idata
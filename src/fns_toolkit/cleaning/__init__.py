@@ -0,0 +1,50 @@
+"""Data-cleaning helpers: tidy column names, index missingness patterns and impute missing values."""
+
+from __future__ import annotations
+
+import re
+
+import pandas as pd
+
+from ..profiling import profiled
+from .impute import MissingFiller, carry_forward, fill_missing
+from .missingness import MissingnessIndex, missing_patterns
+from .multiple import MultipleImputationResult, multiple_impute, rubins_rules
+
+__all__ = [
+    "snake_case_columns",
+    "fill_missing",
+    "MissingFiller",
+    "carry_forward",
+    "missing_patterns",
+    "MissingnessIndex",
+    "multiple_impute",
+    "rubins_rules",
+    "MultipleImputationResult",
+]
+
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_NON_WORD = re.compile(r"[^0-9a-zA-Z]+")
+
+
+def _snake(name) -> str:
+    name = _CAMEL.sub("_", str(name).strip())
+    return _NON_WORD.sub("_", name).strip("_").lower()
+
+
+@profiled
+def snake_case_columns(df: pd.DataFrame, *, inplace: bool = False) -> pd.DataFrame:
+    """Rename columns to ``snake_case`` (``SmokingStatus`` → ``smoking_status``).
+
+    Args:
+        df: Input data.
+        inplace: Rename ``df`` itself instead of returning a renamed copy.
+
+    Returns:
+        DataFrame: The frame with cleaned column names.
+    """
+    names = [_snake(c) for c in df.columns]
+    if inplace:
+        df.columns = names
+        return df
+    return df.set_axis(names, axis=1)
@@ -0,0 +1,299 @@
+"""Single imputation of missing values.
+
+:class:`MissingFiller` learns fill statistics (overall or within groups such as
+``Sex`` × ``Social_Class``) and applies them.  The statistics it keeps are
+mergeable – per-group sums and counts for means, per-group value counts for
+modes – so they can be learned from one chunk at a time with
+:meth:`MissingFiller.partial_fit` and applied in a second pass.
+:func:`fill_missing` wraps both the in-memory and the chunked workflow.
+
+Example:
+    >>> fill_missing(df, "mean", by=["Sex", "Social_Class"],
+    ...              locf=["BMI_Baseline", "BMI_Year2", "BMI_Year4", "BMI_Year6"])
+    >>> fill_missing("epidemiological_study.csv", chunksize=500_000,
+    ...              output="epi_filled.csv")
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ..profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+Strategy = Union[str, Mapping[str, Optional[str]]]
+
+STRATEGIES = ("mean", "median", "mode", "constant")
+
+
+def carry_forward(values: np.ndarray) -> np.ndarray:
+    """Carry the last observation forward along the rows of a 2-D float array.
+
+    Leading gaps stay ``NaN``.  Works on the whole array at once: every cell is
+    replaced by the right-most observed cell to its left.
+    """
+    values = np.asarray(values, dtype=float)
+    positions = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    return values[np.arange(values.shape[0])[:, None], positions]
+
+
+class MissingFiller:
+    """Learn fill values for missing data and apply them.
+
+    Args:
+        strategy: ``"mean"``, ``"median"``, ``"mode"`` or ``"constant"``, or a
+            mapping ``column -> strategy`` (``None`` leaves a column alone).
+            With a single ``"mean"``/``"median"`` strategy, non-numeric columns
+            fall back to ``"mode"``.
+        columns: Columns to fill; all columns except ``by`` by default.
+        by: Grouping columns; statistics are learned within each group and
+            rows whose group was never seen fall back to the overall value.
+        locf: Ordered columns of a repeated measurement (e.g. BMI at each
+            follow-up) to fill by last observation carried forward before the
+            other strategies run.
+        value: Fill value (or ``column -> value`` mapping) for ``"constant"``.
+    """
+
+    def __init__(
+        self,
+        strategy: Strategy = "mean",
+        *,
+        columns: Optional[Sequence[str]] = None,
+        by: Optional[Union[str, Sequence[str]]] = None,
+        locf: Optional[Sequence[str]] = None,
+        value=None,
+    ):
+        self.strategy = strategy
+        self.columns = list(columns) if columns is not None else None
+        self.by = [by] if isinstance(by, str) else list(by or [])
+        self.locf = list(locf or [])
+        self.value = value
+        self._reset()
+
+    def _reset(self):
+        self.plan_: dict[str, str] = {}
+        self._sums = self._counts = None
+        self._total_sums = self._total_counts = None
+        self._medians = self._overall_medians = None
+        self._mode_counts: dict[str, pd.DataFrame] = {}
+        self._mode_totals: dict[str, pd.Series] = {}
+
+    # -- planning ---------------------------------------------------------
+
+    def _make_plan(self, df: pd.DataFrame) -> dict[str, str]:
+        columns = self.columns or [c for c in df.columns if c not in self.by]
+        plan = {}
+        for col in columns:
+            if isinstance(self.strategy, Mapping):
+                strategy = self.strategy.get(col)
+            else:
+                strategy = self.strategy
+            if strategy is None:
+                continue
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Unknown strategy {strategy!r}; choose from {STRATEGIES}")
+            numeric = pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+            if strategy in ("mean", "median") and not numeric:
+                if isinstance(self.strategy, Mapping):
+                    raise TypeError(f"Column {col!r} is not numeric; use 'mode' or 'constant'")
+                strategy = "mode"
+            plan[col] = strategy
+        return plan
+
+    def _columns(self, strategy: str) -> list[str]:
+        return [c for c, s in self.plan_.items() if s == strategy]
+
+    def _keys(self, df: pd.DataFrame) -> list:
+        return [df[b] for b in self.by] if self.by else [np.zeros(len(df), dtype=np.int8)]
+
+    def _row_groups(self, df: pd.DataFrame, index: pd.Index) -> np.ndarray:
+        """Position of each row's group in ``index`` (``-1`` if unseen)."""
+        if not self.by:
+            return np.zeros(len(df), dtype=np.intp)
+        if len(self.by) == 1:
+            keys = pd.Index(df[self.by[0]])
+        else:
+            keys = pd.MultiIndex.from_frame(df[self.by])
+        return index.get_indexer(keys)
+
+    # -- learning ---------------------------------------------------------
+
+    def partial_fit(self, df: pd.DataFrame) -> "MissingFiller":
+        """Add the statistics of one chunk to the running totals."""
+        if not self.plan_:
+            self.plan_ = self._make_plan(df)
+        if self._columns("median"):
+            raise ValueError("'median' cannot be learned chunk by chunk; use 'mean' or 'mode'")
+        return self._update(df)
+
+    def _update(self, df: pd.DataFrame) -> "MissingFiller":
+        keys = self._keys(df)
+        mean_cols = self._columns("mean")
+        if mean_cols:
+            grouped = df.groupby(keys, observed=True, sort=False)[mean_cols]
+            sums, counts = grouped.sum(), grouped.count()
+            # Overall totals also include rows whose group key is missing.
+            total_sums, total_counts = sums.sum(), counts.sum()
+            if self.by:
+                total_sums = pd.Series({c: df[c].sum() for c in mean_cols})
+                total_counts = pd.Series({c: df[c].count() for c in mean_cols})
+            if self._sums is None:
+                self._sums, self._counts = sums, counts
+                self._total_sums, self._total_counts = total_sums, total_counts
+            else:
+                self._sums = self._sums.add(sums, fill_value=0)
+                self._counts = self._counts.add(counts, fill_value=0)
+                self._total_sums = self._total_sums + total_sums
+                self._total_counts = self._total_counts + total_counts
+
+        for col in self._columns("mode"):
+            counts = df.groupby(keys + [df[col]], observed=True, sort=False).size()
+            counts = counts.unstack(-1, fill_value=0)
+            totals = df[col].value_counts() if self.by else counts.sum()
+            if col in self._mode_counts:
+                counts = self._mode_counts[col].add(counts, fill_value=0)
+                totals = self._mode_totals[col].add(totals, fill_value=0)
+            self._mode_counts[col], self._mode_totals[col] = counts, totals
+        return self
+
+    @profiled
+    def fit(self, df: pd.DataFrame) -> "MissingFiller":
+        """Learn the statistics from a complete frame."""
+        self._reset()
+        self.plan_ = self._make_plan(df)
+        median_cols = self._columns("median")
+        if median_cols:
+            self._medians = df.groupby(self._keys(df), observed=True, sort=False)[median_cols].median()
+            self._overall_medians = df[median_cols].median()
+        return self._update(df)
+
+    # -- learned values ---------------------------------------------------
+
+    def _group_values(self, strategy: str) -> tuple[pd.DataFrame, pd.Series]:
+        """Per-group and overall fill values for one strategy."""
+        if strategy == "mean":
+            return self._sums / self._counts.replace(0, np.nan), self._total_sums / self._total_counts
+        if strategy == "median":
+            return self._medians, self._overall_medians
+        groups, overall = {}, {}
+        for col, counts in self._mode_counts.items():
+            groups[col] = counts.idxmax(axis=1) if counts.shape[1] else pd.Series(np.nan, counts.index)
+            totals = self._mode_totals[col]
+            overall[col] = totals.idxmax() if len(totals) else np.nan
+        return pd.DataFrame(groups), pd.Series(overall, dtype=object)
+
+    @property
+    def statistics_(self) -> pd.Series:
+        """Overall fill value of every planned column."""
+        values = {}
+        for strategy in ("mean", "median", "mode"):
+            if self._columns(strategy):
+                values.update(self._group_values(strategy)[1].to_dict())
+        return pd.Series(values, dtype=object).reindex(list(self.plan_))
+
+    # -- applying ---------------------------------------------------------
+
+    @profiled
+    def transform(self, df: pd.DataFrame, *, inplace: bool = False) -> pd.DataFrame:
+        """Fill the missing values of ``df`` (copied once unless ``inplace``)."""
+        if not self.plan_:
+            raise RuntimeError("MissingFiller is not fitted yet")
+        out = df if inplace else df.copy()
+
+        if self.locf:
+            filled = carry_forward(out[self.locf].to_numpy(dtype=float, na_value=np.nan))
+            for j, col in enumerate(self.locf):
+                out[col] = filled[:, j]
+
+        for strategy in ("mean", "median", "mode"):
+            cols = self._columns(strategy)
+            if not cols:
+                continue
+            groups, overall = self._group_values(strategy)
+            rows = self._row_groups(out, groups.index)
+            seen = rows >= 0
+            for col in cols:
+                missing = out[col].isna().to_numpy()
+                if not missing.any():
+                    continue
+                per_group = groups[col].to_numpy()
+                fill = np.where(seen, per_group[np.where(seen, rows, 0)], overall[col])
+                fill = pd.Series(fill, index=out.index).fillna(overall[col])
+                if strategy == "mode":
+                    out[col] = out[col].fillna(fill.where(missing))
+                else:
+                    current = out[col].to_numpy(dtype=float, na_value=np.nan)
+                    out[col] = np.where(missing, fill.to_numpy(dtype=float), current)
+
+        for col in self._columns("constant"):
+            value = self.value.get(col) if isinstance(self.value, Mapping) else self.value
+            out[col] = out[col].fillna(value)
+        return out
+
+    def fit_transform(self, df: pd.DataFrame, *, inplace: bool = False) -> pd.DataFrame:
+        """:meth:`fit` followed by :meth:`transform`."""
+        return self.fit(df).transform(df, inplace=inplace)
+
+
+@profiled
+def fill_missing(
+    data: Union[pd.DataFrame, PathLike],
+    strategy: Strategy = "mean",
+    *,
+    columns: Optional[Sequence[str]] = None,
+    by: Optional[Union[str, Sequence[str]]] = None,
+    locf: Optional[Sequence[str]] = None,
+    value=None,
+    inplace: bool = False,
+    chunksize: Optional[int] = None,
+    output: Optional[PathLike] = None,
+    **read_csv_kwargs,
+) -> Union[pd.DataFrame, Path]:
+    """Impute missing values by mean, median, mode, constant or LOCF.
+
+    Args:
+        data: A DataFrame, or a CSV path (required for ``chunksize``).
+        strategy: See :class:`MissingFiller`.
+        columns: Columns to fill (default: all but ``by``).
+        by: Grouping column(s) for grouped statistics.
+        locf: Ordered repeated-measure columns to fill by LOCF first.
+        value: Value(s) for the ``"constant"`` strategy.
+        inplace: Fill the given DataFrame instead of a copy.
+        chunksize: Stream a CSV in chunks of this many rows: learn the
+            statistics in a first pass, then fill and write in a second pass.
+        output: Destination CSV of the chunked mode.
+        **read_csv_kwargs: Passed on to ``pd.read_csv`` for path inputs.
+
+    Returns:
+        DataFrame: The filled data, or ``Path`` of ``output`` in chunked mode.
+
+    Example:
+        >>> fill_missing(df, {"Age": "median", "Smoking": "mode"})
+    """
+    filler = MissingFiller(strategy, columns=columns, by=by, locf=locf, value=value)
+
+    if chunksize is None:
+        if not isinstance(data, pd.DataFrame):
+            data = pd.read_csv(data, **read_csv_kwargs)
+            inplace = True
+        return filler.fit_transform(data, inplace=inplace)
+
+    if isinstance(data, pd.DataFrame):
+        raise TypeError("chunksize needs a CSV path; a DataFrame is already in memory")
+    if output is None:
+        raise ValueError("chunksize needs an output path for the filled data")
+
+    for chunk in pd.read_csv(data, chunksize=chunksize, **read_csv_kwargs):
+        filler.partial_fit(chunk)
+    output = Path(output)
+    for i, chunk in enumerate(pd.read_csv(data, chunksize=chunksize, **read_csv_kwargs)):
+        filler.transform(chunk, inplace=True).to_csv(
+            output, mode="w" if i == 0 else "a", header=i == 0, index=False
+        )
+    return output
@@ -0,0 +1,323 @@
+"""Bit-packed index of missing-value patterns.
+
+Notebooks 10.2 and 10.3 look at missingness with
+``sns.heatmap(data.isna())`` – one drawn row per participant – and a separate
+``isna().mean()``.  :class:`MissingnessIndex` packs each row's missing mask
+into ``uint64`` words (bit ``j`` = column ``j`` is missing), keeps one code per
+row pointing at its distinct pattern, and answers everything else from the
+small pattern table:
+
+* pattern frequencies, per-column missing counts and rates;
+* co-missingness (rows where both columns are missing) as the popcount of
+  ANDed column bitsets;
+* whether the missingness is monotone (drop-out style) in a column order;
+* the rows with a pattern, or with given columns missing/observed, for
+  complete-case or pattern-mixture analyses, without rescanning the data.
+
+:meth:`MissingnessIndex.plot` draws the pattern table with its frequencies –
+one drawn row per pattern instead of per participant.
+
+Example:
+    >>> index = missing_patterns(df)
+    >>> index.frequencies().head()
+    >>> complete = df.iloc[index.complete_cases()]
+    >>> index = missing_patterns("epidemiological_study.csv", chunksize=1_000_000)
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ..profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# Bits set in every byte value, for NumPy without ``bitwise_count``.
+_POPCOUNT8 = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits of every ``uint64`` word."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    return _POPCOUNT8[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    """Pack the last axis of a boolean array into little-endian ``uint64`` words."""
+    packed = np.packbits(mask, axis=-1, bitorder="little")
+    pad = -packed.shape[-1] % 8
+    if pad:
+        packed = np.concatenate(
+            [packed, np.zeros(packed.shape[:-1] + (pad,), dtype=np.uint8)], axis=-1)
+    return np.ascontiguousarray(packed).view("<u8")
+
+
+def _unpack(words: np.ndarray, width: int) -> np.ndarray:
+    """Inverse of :func:`_pack`: the first ``width`` bits as booleans."""
+    bits = np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=-1, bitorder="little")
+    return bits[..., :width].astype(bool)
+
+
+class MissingnessIndex:
+    """Distinct missing-value patterns of a table and the rows that have them.
+
+    Build it with :func:`missing_patterns`, or add chunks of rows in order
+    with :meth:`update`.  Row positions are counted from the first row
+    added, so they index the concatenated chunks (``df.iloc[rows]``).
+
+    Attributes:
+        columns: Columns whose missingness is indexed (bit ``j`` = ``columns[j]``).
+        patterns: Distinct packed masks, one row of ``uint64`` words per pattern,
+            in order of first appearance.
+        codes: Pattern of every row (index into ``patterns``).
+        counts: Rows per pattern.
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        self.n_words = max(1, -(-len(self.columns) // 64))
+        self.patterns = np.zeros((0, self.n_words), dtype=np.uint64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        # Pattern codes of each chunk, joined on first use of ``codes``.
+        self._codes: list[np.ndarray] = []
+        self._n_rows = 0
+        # Column bitsets over rows, one (columns × words) block per chunk.
+        self._column_bits: list[np.ndarray] = []
+        self._lookup: dict[bytes, int] = {}
+        self._sorted: Optional[tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return self._n_rows
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Pattern of every row (index into ``patterns``)."""
+        if len(self._codes) != 1:
+            self._codes = [np.concatenate(self._codes) if self._codes
+                           else np.zeros(0, dtype=np.int32)]
+        return self._codes[0]
+
+    def update(self, chunk: pd.DataFrame) -> "MissingnessIndex":
+        """Append the rows of ``chunk``."""
+        mask = chunk[self.columns].isna().to_numpy()
+        words = _pack(mask)
+        if self.n_words == 1:
+            unique, inverse = np.unique(words[:, 0], return_inverse=True)
+            unique = unique[:, None]
+        else:
+            keys = np.ascontiguousarray(words).view(np.dtype((np.void, 8 * self.n_words)))[:, 0]
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            unique = words[first]
+        # Map the chunk's few distinct patterns to global pattern codes.
+        glob = np.empty(len(unique), dtype=np.int32)
+        new = []
+        for i, pattern in enumerate(unique):
+            key = pattern.tobytes()
+            if key not in self._lookup:
+                self._lookup[key] = len(self._lookup)
+                new.append(pattern)
+            glob[i] = self._lookup[key]
+        if new:
+            self.patterns = np.vstack([self.patterns, np.asarray(new, dtype=np.uint64)])
+        codes = glob[inverse.reshape(-1)]
+        self._codes.append(codes)
+        self._n_rows += len(codes)
+        counts = np.zeros(len(self.patterns), dtype=np.int64)
+        counts[:len(self.counts)] = self.counts
+        self.counts = counts + np.bincount(codes, minlength=len(self.patterns))
+        self._column_bits.append(_pack(mask.T))
+        self._sorted = None
+        return self
+
+    # -- summaries -----------------------------------------------------------
+
+    def pattern_matrix(self) -> np.ndarray:
+        """Boolean ``patterns × columns`` array (``True`` = missing)."""
+        return _unpack(self.patterns, len(self.columns))
+
+    def frequencies(self, *, sort: bool = True) -> pd.DataFrame:
+        """One row per distinct pattern.
+
+        Returns:
+            DataFrame: A boolean column per variable (``True`` = missing), then
+            ``n_missing`` (missing variables in the pattern), ``count`` and
+            ``percent`` of rows; indexed by pattern code and, with ``sort``,
+            most frequent first.
+        """
+        table = pd.DataFrame(self.pattern_matrix(), columns=self.columns)
+        table["n_missing"] = _popcount(self.patterns).sum(axis=1, dtype=np.int64)
+        table["count"] = self.counts
+        table["percent"] = 100 * self.counts / max(len(self), 1)
+        table.index.name = "pattern"
+        return table.sort_values("count", ascending=False, kind="stable") if sort else table
+
+    def missing_counts(self) -> pd.Series:
+        """Missing values per column (``data.isna().sum()``)."""
+        return pd.Series(self.counts @ self.pattern_matrix(), index=self.columns, name="missing")
+
+    def missing_rate(self) -> pd.Series:
+        """Fraction of rows missing per column (``data.isna().mean()``)."""
+        return (self.missing_counts() / max(len(self), 1)).rename("rate")
+
+    def co_missing(self) -> pd.DataFrame:
+        """Rows where both columns are missing; the diagonal is :meth:`missing_counts`."""
+        p = len(self.columns)
+        out = np.zeros((p, p), dtype=np.int64)
+        for bits in self._column_bits:
+            for j in range(p):
+                out[j] += _popcount(bits[j] & bits).sum(axis=1, dtype=np.int64)
+        return pd.DataFrame(out, index=self.columns, columns=self.columns)
+
+    def monotone_order(self) -> Optional[list[str]]:
+        """A column order in which the missingness is monotone, or ``None``.
+
+        Missingness is monotone when, whenever a column is missing, every
+        later column is missing too (as with drop-out from follow-up
+        visits).  Sorting by missing count finds such an order if one exists.
+        """
+        order = np.argsort(self.missing_counts().to_numpy(), kind="stable")
+        return [self.columns[j] for j in order] if self.is_monotone(
+            [self.columns[j] for j in order]) else None
+
+    def is_monotone(self, order: Optional[Sequence[str]] = None) -> bool:
+        """Whether the missingness is monotone in ``order``.
+
+        Args:
+            order: Columns from first to last; by default any order will do
+                (see :meth:`monotone_order`).  Columns left out are ignored.
+        """
+        if order is None:
+            return self.monotone_order() is not None
+        position = [self.columns.index(name) for name in order]
+        bits = self.pattern_matrix()[:, position]
+        # Missing bits must form a suffix: never observed after missing.
+        return bool(np.all(bits[:, 1:] >= bits[:, :-1]))
+
+    # -- row selection -------------------------------------------------------
+
+    def _grouped(self) -> tuple[np.ndarray, np.ndarray]:
+        """Rows sorted by pattern and the start of every pattern's run."""
+        if self._sorted is None:
+            order = np.argsort(self.codes, kind="stable")
+            starts = np.concatenate([[0], np.cumsum(self.counts)])
+            self._sorted = (order, starts)
+        return self._sorted
+
+    def pattern_code(self, missing: Iterable[str]) -> Optional[int]:
+        """Code of the pattern with exactly the ``missing`` columns, or ``None``."""
+        mask = np.isin(self.columns, list(missing))
+        return self._lookup.get(_pack(mask[None, :])[0].tobytes())
+
+    def rows(self, patterns: Union[int, Iterable[int]]) -> np.ndarray:
+        """Sorted positions of the rows with any of the given pattern codes."""
+        order, starts = self._grouped()
+        codes = [patterns] if np.isscalar(patterns) else list(patterns)
+        parts = [order[starts[c]:starts[c + 1]] for c in codes]
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def complete_cases(self) -> np.ndarray:
+        """Positions of the rows with no missing value in the indexed columns."""
+        code = self.pattern_code(())
+        return self.rows(code) if code is not None else np.zeros(0, dtype=np.int64)
+
+    def where(self, *, missing: Iterable[str] = (), observed: Iterable[str] = ()) -> np.ndarray:
+        """Positions of the rows with all ``missing`` columns missing and all ``observed`` ones present."""
+        bits = self.pattern_matrix()
+        want = np.ones(len(self.patterns), dtype=bool)
+        for name in missing:
+            want &= bits[:, self.columns.index(name)]
+        for name in observed:
+            want &= ~bits[:, self.columns.index(name)]
+        return self.rows(np.flatnonzero(want))
+
+    def groups(self, *, min_count: int = 1):
+        """Yield ``(missing columns, row positions)`` per pattern, most frequent first.
+
+        For pattern-mixture analyses; patterns with fewer than ``min_count``
+        rows are skipped.
+        """
+        bits = self.pattern_matrix()
+        for code in np.argsort(-self.counts, kind="stable"):
+            if self.counts[code] < min_count:
+                break
+            yield tuple(np.asarray(self.columns)[bits[code]]), self.rows(code)
+
+    # -- plot ----------------------------------------------------------------
+
+    def plot(self, *, top: int = 20, ax=None):
+        """Pattern table with the frequency of each pattern beside it.
+
+        Replaces the per-row ``sns.heatmap(data.isna())``: one row per
+        distinct pattern (the ``top`` most frequent), missing cells dark,
+        and a bar of the pattern's row count.  The column labels carry each
+        variable's missing percentage.
+
+        Args:
+            top: Number of patterns shown.
+            ax: Matplotlib axes for the pattern table; defaults to the
+                current axes.  The bars go in an inset to its right.
+
+        Returns:
+            Axes: The pattern-table axes.
+        """
+        import matplotlib.pyplot as plt
+
+        ax = ax if ax is not None else plt.gca()
+        table = self.frequencies().head(top)
+        bits = table[self.columns].to_numpy()
+        ax.imshow(bits, aspect="auto", cmap="Greys", vmin=0, vmax=1.5, interpolation="nearest")
+        rate = 100 * self.missing_rate()
+        ax.set_xticks(np.arange(len(self.columns)),
+                      [f"{c} ({rate[c]:.0f}%)" for c in self.columns], rotation=90)
+        ax.set_yticks(np.arange(len(table)), [str(n) for n in table["n_missing"]])
+        ax.set_ylabel("pattern (missing variables)")
+
+        bars = ax.inset_axes([1.02, 0, 0.25, 1], sharey=ax)
+        bars.barh(np.arange(len(table)), table["count"], height=0.8, color="C0")
+        bars.tick_params(axis="y", left=False, labelleft=False)
+        bars.set_xlabel("rows")
+        shown = table["count"].sum()
+        ax.set_title(f"{len(table)} of {len(self.patterns)} patterns, "
+                     f"{100 * shown / max(len(self), 1):.1f}% of {len(self)} rows")
+        return ax
+
+
+@profiled
+def missing_patterns(
+    data: Union[pd.DataFrame, PathLike, Iterable[pd.DataFrame]],
+    columns: Optional[Sequence[str]] = None,
+    *,
+    chunksize: Optional[int] = None,
+) -> MissingnessIndex:
+    """Index the missing-value patterns of a table.
+
+    Args:
+        data: A DataFrame, a CSV file or an iterable of DataFrame chunks.
+        columns: Columns to index; all of them by default.
+        chunksize: Rows per chunk when reading a CSV file (the whole file
+            at once by default).
+
+    Returns:
+        MissingnessIndex: The pattern index, with rows numbered in file order.
+    """
+    if isinstance(data, pd.DataFrame):
+        chunks: Iterable[pd.DataFrame] = [data]
+    elif isinstance(data, (str, os.PathLike)):
+        # Missingness only: read every column as text to skip type inference.
+        reader = pd.read_csv(data, usecols=columns, dtype=str, chunksize=chunksize)
+        chunks = [reader] if chunksize is None else reader
+    else:
+        chunks = data
+    index = None
+    for chunk in chunks:
+        if index is None:
+            index = MissingnessIndex(columns if columns is not None else list(chunk.columns))
+        index.update(chunk)
+    if index is None:
+        index = MissingnessIndex(columns or [])
+    return index
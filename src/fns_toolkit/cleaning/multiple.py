@@ -0,0 +1,230 @@
+"""Multiple imputation with Rubin's-rules pooling.
+
+:func:`multiple_impute` runs ``m`` independent chained-equation imputations
+(``IterativeImputer(sample_posterior=True)``, each with its own seed from
+``SeedSequence.spawn``) in a process pool, fits the same analysis model on
+every completed dataset and pools the results with :func:`rubins_rules`.
+
+The numeric data are placed in shared memory once; workers map that block
+instead of receiving a pickled copy per chain.  Completed datasets live only
+inside the worker that produced them and are optionally written straight to
+``output_dir``, so the parent never holds ``m`` copies of the data.
+
+Example:
+    >>> res = multiple_impute(df, "BMI_Baseline ~ Age + Sugar_Intake + SFA_Intake", m=20)
+    >>> res.pooled
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .._shared import SharedArray, attach
+from ..profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+Model = Union[str, Callable[[pd.DataFrame], object]]
+
+
+@dataclass
+class MultipleImputationResult:
+    """Pooled estimates plus the per-imputation pieces they came from."""
+
+    pooled: pd.DataFrame
+    estimates: pd.DataFrame
+    variances: pd.DataFrame
+    paths: list = field(default_factory=list)
+
+
+@profiled
+def rubins_rules(
+    estimates: pd.DataFrame,
+    variances: pd.DataFrame,
+    *,
+    df_complete: Optional[float] = None,
+    alpha: float = 0.05,
+) -> pd.DataFrame:
+    """Pool ``m`` sets of estimates and their sampling variances.
+
+    Args:
+        estimates: ``m × terms`` point estimates.
+        variances: ``m × terms`` squared standard errors.
+        df_complete: Residual degrees of freedom of the complete-data model;
+            enables the Barnard–Rubin small-sample correction.
+        alpha: 1 − confidence level of the intervals.
+
+    Returns:
+        DataFrame: One row per term with the pooled estimate, within-, between-
+        and total variance, standard error, degrees of freedom, CI, p-value
+        and fraction of missing information (``fmi``).
+    """
+    m = len(estimates)
+    if m < 2:
+        raise ValueError("Rubin's rules need at least two imputations")
+    qbar = estimates.mean()
+    within = variances.mean()
+    between = estimates.var(ddof=1)
+    total = within + (1 + 1 / m) * between
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = (1 + 1 / m) * between / within
+        dof = (m - 1) * (1 + 1 / r) ** 2
+        if df_complete is not None:
+            lam = (1 + 1 / m) * between / total
+            dof_obs = (df_complete + 1) / (df_complete + 3) * df_complete * (1 - lam)
+            dof = 1 / (1 / dof + 1 / dof_obs)
+        dof = dof.fillna(np.inf).clip(upper=1e12)
+        fmi = (r + 2 / (dof + 3)) / (r + 1)
+
+    se = np.sqrt(total)
+    crit = stats.t.ppf(1 - alpha / 2, dof)
+    statistic = qbar / se
+    return pd.DataFrame({
+        "estimate": qbar,
+        "within_var": within,
+        "between_var": between,
+        "total_var": total,
+        "std_error": se,
+        "df": dof,
+        "ci_low": qbar - crit * se,
+        "ci_high": qbar + crit * se,
+        "statistic": statistic,
+        "p_value": 2 * stats.t.sf(np.abs(statistic), dof),
+        "fmi": fmi,
+    })
+
+
+def _fit_model(model: Model, data: pd.DataFrame) -> tuple[pd.Series, pd.Series, Optional[float]]:
+    if isinstance(model, str):
+        import statsmodels.formula.api as smf
+
+        fitted = smf.ols(model, data).fit()
+    else:
+        fitted = model(data)
+    if isinstance(fitted, tuple):
+        est, se = fitted[:2]
+        return pd.Series(est, dtype=float), pd.Series(se, dtype=float) ** 2, None
+    return (
+        pd.Series(fitted.params, dtype=float),
+        pd.Series(fitted.bse, dtype=float) ** 2,
+        getattr(fitted, "df_resid", None),
+    )
+
+
+# Per-process state of the pool workers, set once by ``_init_worker``.
+_WORKER: dict = {}
+
+
+def _init_worker(spec, columns, extra):
+    shm, array = attach(spec)
+    _WORKER.update(shm=shm, array=array, columns=columns, extra=extra)
+
+
+def _run_chain(i, seed, model, imputer_kwargs, output_dir, fmt):
+    from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+    from sklearn.impute import IterativeImputer
+
+    imputer = IterativeImputer(sample_posterior=True, random_state=seed, **imputer_kwargs)
+    completed = pd.DataFrame(imputer.fit_transform(_WORKER["array"]), columns=_WORKER["columns"])
+    extra = _WORKER["extra"]
+    if extra is not None:
+        completed = pd.concat([completed, extra], axis=1)
+
+    path = None
+    if output_dir is not None:
+        path = Path(output_dir) / f"imputation_{i + 1:03d}.{fmt}"
+        if fmt == "parquet":
+            completed.to_parquet(path, index=False)
+        else:
+            completed.to_csv(path, index=False)
+    est, var, df_resid = _fit_model(model, completed)
+    return i, est, var, df_resid, path
+
+
+@profiled
+def multiple_impute(
+    data: pd.DataFrame,
+    model: Model,
+    *,
+    m: int = 20,
+    seed: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+    n_jobs: Optional[int] = None,
+    max_iter: int = 10,
+    output_dir: Optional[PathLike] = None,
+    fmt: str = "csv",
+    alpha: float = 0.05,
+    **imputer_kwargs,
+) -> MultipleImputationResult:
+    """Impute ``m`` times in parallel, fit ``model`` on each, pool by Rubin's rules.
+
+    Args:
+        data: Analysis data.  Numeric columns are imputed; other columns are
+            passed through and must be complete (encode them first).
+        model: A ``statsmodels`` OLS formula, or a picklable (module-level)
+            function ``f(completed_df)`` returning a fitted result with
+            ``params``/``bse`` or an ``(estimates, std_errors)`` pair.
+        m: Number of imputations.
+        seed: Root seed; chain ``i`` uses child ``i`` of ``SeedSequence(seed)``.
+        columns: Columns to use (default: all).
+        n_jobs: Worker processes (default: ``os.cpu_count()``).
+        max_iter: Chained-equation iterations per imputation.
+        output_dir: Write each completed dataset here as soon as it exists.
+        fmt: ``"csv"`` or ``"parquet"`` for ``output_dir``.
+        alpha: 1 − confidence level of the pooled intervals.
+        **imputer_kwargs: Passed to ``sklearn.impute.IterativeImputer``.
+
+    Returns:
+        MultipleImputationResult: ``pooled`` table, per-imputation
+        ``estimates``/``variances`` and the written ``paths``.
+    """
+    if columns is not None:
+        data = data[list(columns)]
+    numeric = data.select_dtypes("number").columns
+    other = data.columns.difference(numeric, sort=False)
+    if other.size and data[other].isna().any().any():
+        raise ValueError(
+            f"Non-numeric columns with missing values: {list(other[data[other].isna().any()])}; "
+            "encode them as numbers first"
+        )
+    extra = data[other].reset_index(drop=True) if other.size else None
+
+    if output_dir is not None:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(m)]
+    imputer_kwargs = dict(imputer_kwargs, max_iter=max_iter)
+    n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, m))
+
+    with SharedArray(data[numeric].to_numpy(dtype=float, na_value=np.nan)) as shared:
+        initargs = (shared.spec, list(numeric), extra)
+        jobs = [(i, s, model, imputer_kwargs, output_dir, fmt) for i, s in enumerate(seeds)]
+        if n_jobs == 1:
+            _init_worker(*initargs)
+            try:
+                done = [_run_chain(*job) for job in jobs]
+            finally:
+                _WORKER.pop("array")
+                _WORKER.pop("shm").close()
+                _WORKER.clear()
+        else:
+            with ProcessPoolExecutor(n_jobs, initializer=_init_worker, initargs=initargs) as pool:
+                done = [f.result() for f in [pool.submit(_run_chain, *job) for job in jobs]]
+    done.sort(key=lambda r: r[0])
+
+    estimates = pd.DataFrame([r[1] for r in done])
+    variances = pd.DataFrame([r[2] for r in done])
+    pooled = rubins_rules(estimates, variances, df_complete=done[0][3], alpha=alpha)
+    return MultipleImputationResult(
+        pooled=pooled,
+        estimates=estimates,
+        variances=variances,
+        paths=[r[4] for r in done if r[4] is not None],
+    )
@@ -0,0 +1,233 @@
+"""Command-line tools installed with the toolkit.
+
+``fns-download-data`` fetches the course datasets listed in a manifest instead
+of cloning the whole repository::
+
+    fns-download-data                      # everything, into the default data dir
+    fns-download-data metabolomics_dataset --dest data/
+    fns-download-data --list
+
+Files are downloaded concurrently over pooled keep-alive connections, written to
+``<file>.part`` first and resumed with an HTTP ``Range`` request if a previous
+run was interrupted.  Every file is checked against the SHA-256 in the manifest,
+and files that are already present and valid are skipped, so re-running the
+command is cheap.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, Sequence
+
+from .datasets import default_data_dir, file_sha256
+
+MANIFEST_PATH = Path(__file__).with_name("data_manifest.json")
+DEFAULT_BASE_URL = (
+    "https://raw.githubusercontent.com/ggkuhnle/data-analysis-toolkit-FNS/main/notebooks/"
+)
+DEFAULT_WORKERS = 8
+_CHUNK = 1 << 16
+_TIMEOUT = 30
+
+_local = threading.local()
+
+
+def load_manifest(source: Optional[str] = None) -> dict:
+    """Read a manifest from a path or ``http(s)`` URL (default: the bundled one)."""
+    if source and source.startswith(("http://", "https://")):
+        response = _session().get(source, timeout=_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    with open(source or MANIFEST_PATH) as fh:
+        return json.load(fh)
+
+
+def write_manifest(root: Path, out: Path, base_url: str, names: Sequence[str] = ()) -> dict:
+    """Build a manifest from the files under ``root`` (a ``notebooks/`` folder)."""
+    from .datasets import DATASETS
+
+    files = dict(DATASETS, food_preferences="06_qualitative/data/food_preferences.txt")
+    entries = []
+    for name, relative in sorted(files.items()):
+        path = root / relative
+        if (names and name not in names) or not path.is_file():
+            continue
+        entries.append({
+            "name": name,
+            "path": relative,
+            "sha256": file_sha256(path),
+            "size": path.stat().st_size,
+        })
+    manifest = {"base_url": base_url, "files": entries}
+    with open(out, "w") as fh:
+        json.dump(manifest, fh, indent=2)
+        fh.write("\n")
+    return manifest
+
+
+def _session():
+    """One ``requests.Session`` per thread, so connections are reused safely."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+
+        session = requests.Session()
+        session.headers["User-Agent"] = "fns-download-data"
+        _local.session = session
+    return session
+
+
+def _sha_of_prefix(path: Path) -> "hashlib._Hash":
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest
+
+
+def fetch(entry: dict, dest: Path, base_url: str, *, force: bool = False, retries: int = 2) -> str:
+    """Download one manifest entry into ``dest``.
+
+    Returns:
+        str: ``"skipped"``, ``"downloaded"`` or ``"resumed"``.
+
+    Raises:
+        ValueError: If the file still fails its checksum after ``retries``.
+        requests.HTTPError: On HTTP errors other than an unsatisfiable range.
+    """
+    target = dest / entry["path"]
+    part = target.with_name(target.name + ".part")
+    expected, size = entry["sha256"], entry.get("size")
+
+    if not force and target.is_file():
+        if (size is None or target.stat().st_size == size) and file_sha256(target) == expected:
+            return "skipped"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    url = base_url.rstrip("/") + "/" + entry["path"]
+
+    status = "downloaded"
+    for _ in range(retries + 1):
+        offset = part.stat().st_size if part.exists() else 0
+        if size is not None and offset > size:
+            part.unlink()
+            offset = 0
+        digest = _sha_of_prefix(part) if offset else hashlib.sha256()
+
+        if size is None or offset < size:
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            with _session().get(url, headers=headers, stream=True, timeout=_TIMEOUT) as response:
+                if response.status_code == 416:  # stale .part: start again
+                    part.unlink()
+                    continue
+                response.raise_for_status()
+                if offset and response.status_code == 206:
+                    status, mode = "resumed", "ab"
+                else:  # server ignored the range
+                    digest, mode = hashlib.sha256(), "wb"
+                with open(part, mode) as fh:
+                    for chunk in response.iter_content(_CHUNK):
+                        fh.write(chunk)
+                        digest.update(chunk)
+
+        if digest.hexdigest() == expected:
+            os.replace(part, target)
+            return status
+        part.unlink()
+    raise ValueError(f"{entry['path']}: SHA-256 mismatch after {retries + 1} attempts")
+
+
+def download(
+    names: Sequence[str] = (),
+    dest: Optional[Path] = None,
+    *,
+    manifest: Optional[dict] = None,
+    base_url: Optional[str] = None,
+    workers: int = DEFAULT_WORKERS,
+    force: bool = False,
+) -> dict[str, str]:
+    """Fetch several datasets in parallel.
+
+    Args:
+        names: Dataset names from the manifest; all of them when empty.
+        dest: Target folder; defaults to :func:`fns_toolkit.datasets.default_data_dir`.
+        manifest: Parsed manifest; defaults to the bundled one.
+        base_url: Override the manifest's ``base_url`` (e.g. a mirror).
+        workers: Maximum concurrent downloads.
+        force: Download even if a valid copy exists.
+
+    Returns:
+        dict: ``name -> status`` (``"skipped"``, ``"downloaded"``, ``"resumed"``
+        or ``"failed: <reason>"``).
+    """
+    manifest = manifest or load_manifest()
+    dest = Path(dest) if dest is not None else default_data_dir()
+    base_url = base_url or manifest.get("base_url", DEFAULT_BASE_URL)
+    entries = manifest["files"]
+    if names:
+        unknown = set(names) - {e["name"] for e in entries}
+        if unknown:
+            raise KeyError(f"Not in manifest: {', '.join(sorted(unknown))}")
+        entries = [e for e in entries if e["name"] in names]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(fetch, e, dest, base_url, force=force): e for e in entries}
+        for future in as_completed(futures):
+            name = futures[future]["name"]
+            try:
+                results[name] = future.result()
+            except Exception as exc:  # keep going; report at the end
+                results[name] = f"failed: {exc}"
+    return results
+
+
+def download_data(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point of the ``fns-download-data`` console script."""
+    parser = argparse.ArgumentParser(
+        prog="fns-download-data",
+        description="Download the Food & Nutrition Science toolkit datasets.",
+    )
+    parser.add_argument("names", nargs="*", help="datasets to fetch (default: all)")
+    parser.add_argument("-d", "--dest", type=Path, default=None,
+                        help=f"target folder (default: {default_data_dir()})")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--manifest", help="manifest path or URL")
+    parser.add_argument("--base-url", help="override the manifest's base URL")
+    parser.add_argument("--force", action="store_true", help="re-download valid files")
+    parser.add_argument("--list", action="store_true", help="list datasets and exit")
+    parser.add_argument("--write-manifest", type=Path, metavar="NOTEBOOKS_DIR",
+                        help="regenerate the manifest from a local checkout and exit")
+    args = parser.parse_args(argv)
+
+    if args.write_manifest:
+        out = Path(args.manifest) if args.manifest else MANIFEST_PATH
+        base_url = args.base_url or DEFAULT_BASE_URL
+        manifest = write_manifest(args.write_manifest, out, base_url, args.names)
+        print(f"Wrote {len(manifest['files'])} entries to {out}")
+        return 0
+
+    manifest = load_manifest(args.manifest)
+    if args.list:
+        for entry in manifest["files"]:
+            print(f"{entry['name']:<24} {entry['size']:>10,} B  {entry['path']}")
+        return 0
+
+    try:
+        results = download(args.names, args.dest, manifest=manifest, base_url=args.base_url,
+                           workers=args.workers, force=args.force)
+    except KeyError as exc:
+        parser.error(exc.args[0])
+    for name, status in sorted(results.items()):
+        print(f"{'❌' if status.startswith('failed') else '✅'} {name}: {status}")
+    return int(any(s.startswith("failed") for s in results.values()))
+
+
+if __name__ == "__main__":
+    sys.exit(download_data())
@@ -0,0 +1,372 @@
+"""Pre-aggregated data layer for the nutrient dashboard.
+
+Notebook 5.5 passes the raw food log to
+``sns.lineplot(x="Date", y="Amount", hue="Nutrient")``, so seaborn groups and
+bootstraps every row again on each render.  :class:`NutrientCube` keeps one
+cell per ``(Date, Meal, Nutrient, ID)`` with the ``count``, ``sum`` and
+``sumsq`` of ``Amount``, which is all that means, standard deviations and
+confidence intervals need:
+
+* :meth:`NutrientCube.query` filters cells, rolls ``Date`` up to weeks or
+  months and adds them up per group.  Results are kept in an LRU cache keyed
+  by the query, so re-rendering the same view costs a dictionary lookup.
+* :meth:`NutrientCube.update` and :meth:`NutrientCube.scan` merge new rows in;
+  ``scan`` remembers how far it has read each CSV and only parses the rows
+  appended since.
+* :func:`plot_trends` and :func:`plot_bars` draw query results, never the rows.
+
+The cube grows with the number of days × meals × nutrients × hippos, not with
+the length of the log.
+
+Example:
+    >>> cube = NutrientCube().scan("large_food_log.csv")
+    >>> weekly = cube.query(("Date", "Nutrient"), freq="W", Meal="Dinner")
+    >>> plot_trends(weekly)
+"""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import DEFAULT_CHUNK_BYTES, _csv_tasks, _read_csv_range, _run_tasks
+from .profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+DIMENSIONS = ("Date", "Meal", "Nutrient", "ID")
+_SUMS = ("count", "sum", "sumsq")
+
+
+class NutrientCube:
+    """Mergeable ``count``/``sum``/``sumsq`` of a food log per day, meal, nutrient and hippo.
+
+    Args:
+        value: Numeric column being summarised.
+        cache_size: Number of query results kept by the LRU cache.
+    """
+
+    def __init__(self, *, value: str = "Amount", cache_size: int = 128):
+        self.value = value
+        self.cache_size = cache_size
+        empty = pd.MultiIndex.from_arrays([[]] * len(DIMENSIONS), names=DIMENSIONS)
+        self.cells = pd.DataFrame({s: pd.Series(dtype=float) for s in _SUMS}, index=empty)
+        # Bytes already read, per CSV file.
+        self.sources: dict[str, int] = {}
+        self._reset_cache()
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name in ("_cache", "_flat", "_buckets"):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset_cache()
+
+    def _reset_cache(self) -> None:
+        self._cache: OrderedDict = OrderedDict()
+        self._hits = self._misses = 0
+        self._flat: Optional[pd.DataFrame] = None
+        self._buckets: dict[str, pd.Series] = {}
+
+    # -- building ------------------------------------------------------------
+
+    def update(self, rows: pd.DataFrame) -> "NutrientCube":
+        """Add raw log rows (columns ``Date``, ``Meal``, ``Nutrient``, ``ID`` and the value)."""
+        amount = pd.to_numeric(rows[self.value], errors="coerce").to_numpy(dtype=float)
+        frame = pd.DataFrame({
+            "Date": pd.to_datetime(rows["Date"], format="ISO8601").dt.normalize(),
+            **{dim: rows[dim].astype(str) for dim in DIMENSIONS[1:]},
+            "count": 1.0,
+            "sum": amount,
+            "sumsq": amount * amount,
+        })
+        frame = frame[~np.isnan(amount) & rows[list(DIMENSIONS)].notna().all(axis=1).to_numpy()]
+        if len(frame):
+            self._combine(frame.groupby(list(DIMENSIONS), sort=False)[list(_SUMS)].sum())
+        return self
+
+    def _combine(self, cells: pd.DataFrame) -> None:
+        if len(self.cells):
+            cells = pd.concat([self.cells, cells]).groupby(level=list(range(len(DIMENSIONS)))).sum()
+        self.cells = cells.sort_index()
+        self._reset_cache()
+
+    def merge(self, other: "NutrientCube") -> "NutrientCube":
+        """Add another cube (of different rows) into this one."""
+        if other.value != self.value:
+            raise ValueError(f"Cannot merge a cube of {other.value!r} into one of {self.value!r}")
+        if len(other.cells):
+            self._combine(other.cells)
+        for path, pos in other.sources.items():
+            self.sources[path] = max(pos, self.sources.get(path, 0))
+        return self
+
+    @profiled
+    def scan(
+        self,
+        paths: Union[PathLike, Iterable[PathLike]],
+        *,
+        n_jobs: Optional[int] = 1,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    ) -> "NutrientCube":
+        """Read the rows of one or more CSV logs that were appended since the last scan.
+
+        Args:
+            paths: CSV file(s) with the columns of ``large_food_log.csv``.
+            n_jobs: Worker processes (``None`` = ``os.cpu_count()``).
+            chunk_bytes: Bytes of CSV per task.
+
+        Returns:
+            NutrientCube: ``self``, updated.
+        """
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        tasks = [task for path in paths for task in _csv_tasks(path, self.sources, chunk_bytes)]
+        for part in _run_tasks(_scan_range, self.value, tasks, n_jobs):
+            self.merge(part)
+        return self
+
+    # -- queries -------------------------------------------------------------
+
+    def _table(self) -> pd.DataFrame:
+        if self._flat is None:
+            self._flat = self.cells.reset_index()
+        return self._flat
+
+    def _dates(self, freq: Optional[str]) -> pd.Series:
+        """``Date`` of every cell, floored to the start of its ``freq`` period."""
+        dates = self._table()["Date"]
+        if freq in (None, "D"):
+            return dates
+        if freq not in self._buckets:
+            self._buckets[freq] = dates.dt.to_period(freq).dt.start_time
+        return self._buckets[freq]
+
+    @profiled
+    def query(
+        self,
+        by: Sequence[str] = ("Date", "Nutrient"),
+        *,
+        freq: Optional[str] = None,
+        start=None,
+        end=None,
+        confidence: float = 0.95,
+        **filters,
+    ) -> pd.DataFrame:
+        """Mean, spread and confidence interval of the value per group.
+
+        Args:
+            by: Dimensions to group by, any of ``Date``, ``Meal``,
+                ``Nutrient`` and ``ID``.
+            freq: Roll ``Date`` up to periods: ``"W"`` (weeks), ``"M"``
+                (months) or any pandas period alias; ``None`` keeps days.
+            start: First date included.
+            end: Last date included.
+            confidence: Level of the t-based confidence interval of the mean.
+            **filters: Keep only cells whose ``Meal``, ``Nutrient`` or ``ID``
+                equals a value or lies in a list, e.g. ``Meal="Dinner"``,
+                ``Nutrient=["Iron", "Calcium"]``.
+
+        Returns:
+            DataFrame: Indexed by ``by``, with ``count``, ``mean``, ``std``,
+            ``sem``, ``ci_low`` and ``ci_high``.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = set(by) - set(DIMENSIONS) | set(filters) - set(DIMENSIONS[1:])
+        if unknown:
+            raise ValueError(f"Unknown dimension(s) {sorted(unknown)}; dates are "
+                             f"selected with start= and end=")
+        selection = tuple(sorted(
+            (dim, tuple(sorted(map(str, _values(v))))) for dim, v in filters.items()
+        ))
+        key = (tuple(by), freq, _day(start), _day(end), confidence, selection)
+        if key in self._cache:
+            self._hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key].copy()
+
+        self._misses += 1
+        result = self._query(by, freq, key[2], key[3], confidence, dict(selection))
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result.copy()
+
+    def _query(self, by, freq, start, end, confidence, selection) -> pd.DataFrame:
+        table = self._table()
+        dates = self._dates(freq)
+        keep = np.ones(len(table), dtype=bool)
+        if start is not None:
+            keep &= (table["Date"] >= start).to_numpy()
+        if end is not None:
+            keep &= (table["Date"] <= end).to_numpy()
+        for dim, values in selection.items():
+            keep &= table[dim].isin(values).to_numpy()
+
+        keys = [dates[keep] if dim == "Date" else table[dim][keep] for dim in by]
+        sums = table.loc[keep, list(_SUMS)].groupby(keys).sum() if by else \
+            table.loc[keep, list(_SUMS)].sum().to_frame().T
+        return _describe(sums, confidence)
+
+    def cache_info(self) -> dict:
+        """Hits, misses and size of the query cache since the last update."""
+        return {"hits": self._hits, "misses": self._misses,
+                "size": len(self._cache), "maxsize": self.cache_size}
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, path: PathLike) -> None:
+        """Write the cube (and read positions) to ``path`` atomically."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        pd.to_pickle(self, tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: PathLike) -> "NutrientCube":
+        """Read a cube written by :meth:`save`."""
+        cube = pd.read_pickle(path)
+        if not isinstance(cube, cls):
+            raise TypeError(f"{path} does not hold a {cls.__name__}")
+        return cube
+
+
+def _values(value) -> list:
+    """Values of a filter: a string or any other scalar is a single value."""
+    return [value] if isinstance(value, str) or not pd.api.types.is_list_like(value) else list(value)
+
+
+def _day(value) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(value).normalize()
+
+
+def _describe(sums: pd.DataFrame, confidence: float) -> pd.DataFrame:
+    """Mean, SD, SEM and t confidence interval from ``count``/``sum``/``sumsq``."""
+    from scipy import stats
+
+    n = sums["count"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums["sum"] / n
+        var = ((sums["sumsq"] - sums["sum"] * mean) / (n - 1)).clip(lower=0)
+        sem = np.sqrt(var / n)
+        half = stats.t.ppf(0.5 + confidence / 2, n - 1) * sem
+    return pd.DataFrame({
+        "count": n.astype(np.int64),
+        "mean": mean,
+        "std": np.sqrt(var),
+        "sem": sem,
+        "ci_low": mean - half,
+        "ci_high": mean + half,
+    })
+
+
+def _scan_range(value: str, key: str, lo: int, hi: int, names: Sequence[str]) -> NutrientCube:
+    """Cube of one byte range of a CSV log."""
+    cube = NutrientCube(value=value)
+    rows = _read_csv_range(key, lo, hi, names, usecols=list(DIMENSIONS) + [value],
+                           dtype={value: float})
+    return cube.update(rows) if rows is not None else cube
+
+
+# ---------------------------------------------------------------------------
+# Plots of query results
+# ---------------------------------------------------------------------------
+
+def _split(summary: pd.DataFrame, x: str, hue: Optional[str]):
+    if hue is None:
+        yield None, summary.droplevel([n for n in summary.index.names if n != x]) \
+            if summary.index.nlevels > 1 else summary
+        return
+    for level, part in summary.groupby(level=hue, sort=True):
+        yield level, part.droplevel([n for n in part.index.names if n != x])
+
+
+def plot_trends(
+    summary: pd.DataFrame,
+    *,
+    x: str = "Date",
+    hue: Optional[str] = "Nutrient",
+    band: bool = True,
+    ax=None,
+):
+    """Line per ``hue`` level of the mean over ``x``, with its confidence band.
+
+    Draws what ``sns.lineplot(x=x, y=value, hue=hue)`` draws, from a
+    :meth:`NutrientCube.query` result grouped by ``(x, hue)``.
+
+    Args:
+        summary: Query result indexed by ``x`` (and ``hue``).
+        x: Index level on the horizontal axis.
+        hue: Index level drawn as separate lines, or ``None``.
+        band: Shade the ``ci_low``–``ci_high`` interval.
+        ax: Matplotlib axes; defaults to the current axes.
+
+    Returns:
+        Axes: The axes drawn on.
+    """
+    import matplotlib.pyplot as plt
+
+    ax = ax if ax is not None else plt.gca()
+    for level, part in _split(summary, x, hue):
+        part = part.sort_index()
+        line, = ax.plot(part.index, part["mean"], label=level)
+        if band:
+            ax.fill_between(part.index, part["ci_low"], part["ci_high"],
+                            color=line.get_color(), alpha=0.2, linewidth=0)
+    if x == "Date":
+        ax.tick_params(axis="x", labelrotation=45)
+    ax.set_xlabel(x)
+    ax.set_ylabel("mean")
+    if hue is not None:
+        ax.legend(title=hue)
+    return ax
+
+
+def plot_bars(
+    summary: pd.DataFrame,
+    *,
+    x: str = "Meal",
+    hue: Optional[str] = "Nutrient",
+    ax=None,
+):
+    """Grouped bars of the mean per ``x`` and ``hue``, with confidence-interval error bars.
+
+    The pre-aggregated counterpart of ``sns.catplot(kind="bar")``.
+
+    Args:
+        summary: Query result indexed by ``x`` (and ``hue``).
+        x: Index level along the horizontal axis.
+        hue: Index level drawn as side-by-side bars, or ``None``.
+        ax: Matplotlib axes; defaults to the current axes.
+
+    Returns:
+        Axes: The axes drawn on.
+    """
+    import matplotlib.pyplot as plt
+
+    ax = ax if ax is not None else plt.gca()
+    parts = list(_split(summary, x, hue))
+    categories = list(dict.fromkeys(v for _, part in parts for v in part.index))
+    width = 0.8 / len(parts)
+    for i, (level, part) in enumerate(parts):
+        part = part.reindex(categories)
+        pos = np.arange(len(categories)) - 0.4 + width * (i + 0.5)
+        err = np.vstack([part["mean"] - part["ci_low"], part["ci_high"] - part["mean"]])
+        ax.bar(pos, part["mean"], width, yerr=err, capsize=3, label=level)
+    ax.set_xticks(np.arange(len(categories)), [str(c) for c in categories])
+    ax.set_xlabel(x)
+    ax.set_ylabel("mean")
+    if hue is not None:
+        ax.legend(title=hue)
+    return ax
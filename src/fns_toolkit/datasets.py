@@ -0,0 +1,619 @@
+"""Dataset access for the toolkit notebooks.
+
+``get_dataset`` parses a CSV once and keeps a columnar copy in a local cache.
+Each cache entry is a directory holding one ``.npy`` block per dtype (all the
+float columns of a table live in a single 2-D block, text columns are stored as
+categorical codes) plus a small JSON manifest.  Later calls memory-map those
+blocks, so loading a cached table costs a few file opens instead of a full CSV
+parse.
+
+Registered datasets come with a :class:`Schema` that is applied while the
+CSV is parsed: categorical columns get fixed, documented levels (so ``Sex``
+or ``Physical_Activity`` have the same codes in every notebook), measurements
+are read as ``float32``, counts and flags as the smallest safe integer type,
+numeric IDs as nullable integers and ``Date`` as ``datetime64``.  The cache
+entry also stores the numeric design matrix of the table, which
+:func:`design_matrix` memory-maps without a copy.
+
+The cache key contains the SHA-256 of the source file and a fingerprint of
+the schema, so editing a CSV or a schema invalidates its entry.  Entries are
+built in a private temporary directory and published with an atomic
+``rename``; several kernels sharing one cache directory therefore never see a
+half-written entry.
+
+Example:
+    >>> df = get_dataset("epidemiological_study")
+    >>> df["Physical_Activity"].cat.codes          # Low=0, Medium=1, High=2
+    >>> X = design_matrix("epidemiological_study")  # float32, memory-mapped
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Mapping, Optional, Sequence, Union
+
+from .profiling import profiled
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# Bump whenever the on-disk layout changes so old entries are ignored.
+_CACHE_VERSION = 2
+_MANIFEST = "manifest.json"
+_DESIGN = "design.npy"
+_HASH_CHUNK = 1 << 20
+
+# Name → location relative to the ``notebooks/`` folder of the repository.
+DATASETS = {
+    "hippo_diets": "01_infrastructure/data/hippo_diets.csv",
+    "hippo_nutrients": "03_data_handling/data/hippo_nutrients.csv",
+    "vitamin_trial": "04_data_analysis/data/vitamin_trial.csv",
+    "simulated_trial": "04_data_analysis/data/simulated_trial.csv",
+    "large_food_log": "05_advanced/data/large_food_log.csv",
+    "hipponol_trial_data": "10_mini_projects/data/hipponol_trial_data.csv",
+    "metabolomics_dataset": "10_mini_projects/data/metabolomics_dataset.csv",
+    "epidemiological_study": "10_mini_projects/data/epidemiological_study.csv",
+}
+
+
+# ---------------------------------------------------------------------------
+# Schemas
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Column:
+    """Storage type of one CSV column.
+
+    Attributes:
+        name: Column name in the CSV header.
+        dtype: ``"category"``, a NumPy type (``"float32"``, ``"int8"``), a
+            nullable pandas integer (``"Int32"``) or ``"datetime64[ns]"``.
+        categories: Levels of a categorical column in code order; empty
+            keeps the levels found in the file.
+        ordered: Whether the levels are ordinal.
+        design: Whether the column belongs in :func:`design_matrix`.
+    """
+
+    name: str
+    dtype: str
+    categories: Sequence[str] = ()
+    ordered: bool = False
+    design: bool = True
+
+    def __post_init__(self):
+        object.__setattr__(self, "categories", tuple(self.categories))
+        if self.categories and self.dtype != "category":
+            raise ValueError(f"{self.name}: categories need dtype 'category'")
+        if self.ordered and not self.categories:
+            raise ValueError(f"{self.name}: an ordered column needs explicit categories")
+
+    @property
+    def is_datetime(self) -> bool:
+        return self.dtype.startswith("datetime64")
+
+    def _parse_dtype(self):
+        """Type handed to ``pd.read_csv``; integers are read wide and narrowed later."""
+        import pandas as pd
+
+        if self.dtype == "category":
+            return "category"
+        target = pd.api.types.pandas_dtype(self.dtype)
+        if target.kind in "iu":
+            # read_csv silently wraps values that overflow a narrow type, and
+            # its nullable-integer parser is several times slower than the
+            # float one (exact for |x| < 2**53).
+            return "float64" if isinstance(target, pd.api.extensions.ExtensionDtype) else "int64"
+        return target
+
+    def _convert(self, values: pd.Series) -> pd.Series:
+        """Check a freshly parsed column and bring it to :attr:`dtype`."""
+        import numpy as np
+        import pandas as pd
+
+        if self.dtype == "category":
+            if not self.categories:
+                return values
+            unknown = set(values.cat.categories) - set(self.categories)
+            if unknown:
+                raise ValueError(
+                    f"{self.name}: unexpected values {sorted(unknown)}; "
+                    f"expected {list(self.categories)}"
+                )
+            return values.cat.set_categories(self.categories, ordered=self.ordered)
+        if self.is_datetime:
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                raise ValueError(f"{self.name}: values are not ISO 8601 dates")
+            return values
+        target = pd.api.types.pandas_dtype(self.dtype)
+        if target.kind in "iu" and len(values):
+            info = np.iinfo(getattr(target, "numpy_dtype", target))
+            low, high = values.min(), values.max()
+            if pd.notna(low) and (low < info.min or high > info.max):
+                raise ValueError(f"{self.name}: values {low}..{high} do not fit {self.dtype}")
+        try:
+            return values.astype(target, copy=False)
+        except TypeError:                           # non-integral floats
+            raise ValueError(f"{self.name}: non-integer values do not fit {self.dtype}") from None
+
+
+@dataclass(frozen=True)
+class Schema:
+    """Column types of one dataset, applied while its CSV is parsed.
+
+    Attributes:
+        columns: The typed columns; columns of the file not listed here get
+            ``default``.
+        default: Type of unlisted columns (``None`` keeps pandas' choice).
+    """
+
+    columns: Sequence[Column] = field(default_factory=tuple)
+    default: Optional[str] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "columns", tuple(self.columns))
+
+    @classmethod
+    def from_dict(cls, spec: Mapping) -> "Schema":
+        """Build a schema from a JSON/YAML-style mapping (see :meth:`to_dict`)."""
+        spec = dict(spec)
+        spec["columns"] = [Column(**c) for c in spec.get("columns", ())]
+        return cls(**spec)
+
+    def to_dict(self) -> dict:
+        return {"default": self.default, "columns": [asdict(c) for c in self.columns]}
+
+    def fingerprint(self) -> str:
+        """Short hash of the schema; part of the cache key."""
+        text = json.dumps(self.to_dict(), sort_keys=True, default=list)
+        return hashlib.sha256(text.encode()).hexdigest()[:10]
+
+    def column(self, name: str) -> Optional[Column]:
+        for c in self.columns:
+            if c.name == name:
+                return c
+        return Column(name, self.default) if self.default else None
+
+    def read_csv(self, source: PathLike) -> pd.DataFrame:
+        """Parse ``source`` with this schema's types.
+
+        Raises:
+            ValueError: If a value does not fit its declared type.
+        """
+        import pandas as pd
+
+        header = pd.read_csv(source, nrows=0).columns
+        typed = [c for c in map(self.column, header) if c is not None]
+        dtype = {c.name: c._parse_dtype() for c in typed if not c.is_datetime}
+        dates = [c.name for c in typed if c.is_datetime]
+        df = pd.read_csv(source, dtype=dtype, parse_dates=dates, date_format="ISO8601")
+        for c in typed:
+            df[c.name] = c._convert(df[c.name])
+        return df
+
+    def design_columns(self, names: Sequence[str]) -> list[str]:
+        """The design-matrix columns among ``names``, in file order."""
+        return [n for n in names if (c := self.column(n)) is not None and c.design]
+
+
+def _id(name: str = "ID", dtype: str = "category") -> Column:
+    return Column(name, dtype, design=False)
+
+
+def _levels(name: str, *categories: str, ordered: bool = False) -> Column:
+    return Column(name, "category", categories, ordered=ordered)
+
+
+# Fixed levels follow the notebooks' encodings (LabelEncoder order for
+# nominal columns, the hand-written ``.map`` order for ordinal ones).
+SCHEMAS: dict[str, Schema] = {
+    "hippo_diets": Schema([
+        _id(), Column("Calories", "int16"), Column("Protein", "float32"),
+        Column("Date", "datetime64[ns]", design=False),
+    ]),
+    "hippo_nutrients": Schema([
+        _id(), _levels("Nutrient", "Calcium", "Iron", "Vitamin_D"), Column("Year", "int16"),
+        Column("Value", "float32"), Column("Age", "int8"), _levels("Sex", "F", "M"),
+    ]),
+    "vitamin_trial": Schema([
+        _id(), _levels("Group", "Control", "Treatment"), Column("Vitamin_D", "float32"),
+        Column("Time", "int8"), _levels("Outcome", "Normal", "Improved", ordered=True),
+    ]),
+    "simulated_trial": Schema([
+        _id("participant_id", "Int32"), Column("group", "int8"),
+    ], default="float32"),
+    "large_food_log": Schema([
+        _id(), _levels("Meal", "Breakfast", "Lunch", "Dinner", ordered=True),
+        _levels("Nutrient", "Calcium", "Iron", "Protein", "Vitamin_D"),
+        Column("Amount", "float32"), Column("Date", "datetime64[ns]", design=False),
+    ]),
+    "hipponol_trial_data": Schema([
+        _id("ID", "Int32"), Column("Age", "int8"), _levels("Sex", "Female", "Male"),
+        _levels("SmokingStatus", "Non-smoker", "Smoker"), _levels("Group", "Control", "Hipponol"),
+        Column("Survival", "int8"),
+    ], default="float32"),
+    "metabolomics_dataset": Schema([Column("Label", "int8")], default="float32"),
+    # Every column but the ID has missing values, so counts stay float32.
+    "epidemiological_study": Schema([
+        _id("ID", "Int32"), _levels("Sex", "F", "M"), _levels("Smoking", "No", "Yes"),
+        _levels("Physical_Activity", "Low", "Medium", "High", ordered=True),
+        _levels("Social_Class", "A", "B", "C1", "C2", "D", "E", ordered=True),
+    ], default="float32"),
+}
+
+
+def list_datasets() -> list[str]:
+    """Return the names accepted by :func:`get_dataset`."""
+    return sorted(DATASETS)
+
+
+def default_cache_dir() -> Path:
+    """Location of the shared dataset cache.
+
+    ``$FNS_TOOLKIT_CACHE`` wins, then ``$XDG_CACHE_HOME/fns_toolkit``, then
+    ``~/.cache/fns_toolkit``.
+    """
+    env = os.environ.get("FNS_TOOLKIT_CACHE")
+    if env:
+        return Path(env).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg).expanduser() if xdg else Path.home() / ".cache"
+    return base / "fns_toolkit"
+
+
+def default_data_dir() -> Path:
+    """Where ``fns-download-data`` puts datasets by default.
+
+    ``$FNS_TOOLKIT_DATA`` wins, then ``$XDG_DATA_HOME/fns_toolkit``, then
+    ``~/.local/share/fns_toolkit``.
+    """
+    env = os.environ.get("FNS_TOOLKIT_DATA")
+    if env:
+        return Path(env).expanduser()
+    xdg = os.environ.get("XDG_DATA_HOME")
+    base = Path(xdg).expanduser() if xdg else Path.home() / ".local" / "share"
+    return base / "fns_toolkit"
+
+
+def _candidate_roots(data_dir: Optional[PathLike]) -> list[Path]:
+    roots = []
+    if data_dir is not None:
+        roots.append(Path(data_dir).expanduser())
+    roots.append(default_data_dir())
+    # Notebooks read ``data/<file>`` relative to their own folder.
+    roots.append(Path.cwd())
+    roots.append(Path.cwd() / "data")
+    # Editable install / source checkout: <repo>/src/fns_toolkit/datasets.py
+    roots.append(Path(__file__).resolve().parents[2] / "notebooks")
+    return roots
+
+
+def resolve_dataset(name: PathLike, data_dir: Optional[PathLike] = None) -> Path:
+    """Find the source file for a registered dataset name or a file path.
+
+    Args:
+        name: A key of :data:`DATASETS` (with or without ``.csv``) or a path.
+        data_dir: Extra folder to search first; either a ``notebooks/`` root
+            or a folder that directly contains the file.
+
+    Returns:
+        Path: The resolved source file.
+
+    Raises:
+        FileNotFoundError: If the file cannot be located.
+    """
+    path = Path(name).expanduser()
+    if path.suffix and path.is_file():
+        return path.resolve()
+
+    key = path.stem if path.suffix == ".csv" else str(name)
+    relative = DATASETS.get(key)
+    filename = Path(relative).name if relative else path.name
+    if not Path(filename).suffix:
+        filename += ".csv"
+
+    for root in _candidate_roots(data_dir):
+        candidates = [root / filename]
+        if relative:
+            candidates.insert(0, root / relative)
+        for candidate in candidates:
+            if candidate.is_file():
+                return candidate.resolve()
+
+    raise FileNotFoundError(
+        f"Dataset {str(name)!r} not found. Run `fns-download-data` or pass data_dir=."
+    )
+
+
+def file_sha256(path: PathLike) -> str:
+    """Hex SHA-256 of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_name(source: Path, sha: str, schema: Optional[Schema]) -> str:
+    tag = schema.fingerprint() if schema is not None else "raw"
+    return f"{source.stem}-v{_CACHE_VERSION}-{tag}-{sha[:20]}"
+
+
+def _design_block(df: pd.DataFrame, names: Sequence[str]) -> np.ndarray:
+    """``(n_columns, n_rows)`` float32 array of ``names``; categories become their codes."""
+    import numpy as np
+    import pandas as pd
+
+    block = np.empty((len(names), len(df)), dtype=np.float32)
+    for row, name in zip(block, names):
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            codes = col.cat.codes.to_numpy()
+            row[:] = np.where(codes < 0, np.nan, codes)
+        else:
+            row[:] = col.to_numpy(dtype=np.float32, na_value=np.nan)
+    return block
+
+
+def _write_entry(df: pd.DataFrame, target: Path, meta: dict,
+                 design: Sequence[str] = ()) -> None:
+    """Write ``df`` as dtype blocks + manifest into the (empty) folder ``target``."""
+    import numpy as np
+    import pandas as pd
+
+    groups: dict[str, list[np.ndarray]] = {}
+    columns = []
+    for name in df.columns:
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype) or col.dtype == object:
+            cat = col if isinstance(col.dtype, pd.CategoricalDtype) else col.astype("category")
+            codes = cat.cat.codes.to_numpy()        # smallest type that holds the levels
+            key = f"codes{codes.dtype.str}"
+            block = groups.setdefault(key, [])
+            columns.append({
+                "name": name,
+                "block": key,
+                "index": len(block),
+                "categories": cat.cat.categories.tolist(),
+                "ordered": bool(cat.cat.ordered),
+            })
+            block.append(codes)
+        elif isinstance(col.dtype, pd.api.extensions.ExtensionDtype) and col.dtype.kind in "iub":
+            # Nullable integers: values block + a boolean mask block.
+            values = col.to_numpy(dtype=col.dtype.numpy_dtype, na_value=0)
+            key = values.dtype.str
+            block = groups.setdefault(key, [])
+            mask = groups.setdefault("mask", [])
+            columns.append({"name": name, "block": key, "index": len(block), "mask": len(mask)})
+            block.append(values)
+            mask.append(col.isna().to_numpy())
+        else:
+            values = col.to_numpy()
+            key = values.dtype.str
+            block = groups.setdefault(key, [])
+            columns.append({"name": name, "block": key, "index": len(block)})
+            block.append(values)
+
+    blocks = {}
+    for i, (key, arrays) in enumerate(groups.items()):
+        filename = f"block{i}.npy"
+        # Shape (n_columns, n_rows): every column is one contiguous row, which
+        # is also the layout pandas uses for its own 2-D blocks.
+        np.save(target / filename, np.vstack(arrays) if arrays else np.empty((0, 0)))
+        blocks[key] = filename
+
+    manifest = dict(meta, version=_CACHE_VERSION, nrows=len(df), blocks=blocks, columns=columns)
+    if design:
+        # Saved transposed, i.e. Fortran-ordered: loads as (n_rows, n_columns)
+        # with every column contiguous.
+        np.save(target / _DESIGN, _design_block(df, design).T)
+        manifest["design"] = list(design)
+    with open(target / _MANIFEST, "w") as fh:
+        json.dump(manifest, fh)
+
+
+def _read_entry(entry: Path) -> pd.DataFrame:
+    import numpy as np
+    import pandas as pd
+
+    with open(entry / _MANIFEST) as fh:
+        manifest = json.load(fh)
+
+    # 'c' = copy-on-write: no bytes are read up front, and writes from the
+    # notebook stay private to the process instead of corrupting the cache.
+    blocks = {
+        key: np.load(entry / filename, mmap_mode="c").view(np.ndarray)
+        for key, filename in manifest["blocks"].items()
+    }
+    columns = manifest["columns"]
+    names = [c["name"] for c in columns]
+
+    plain = not any("categories" in c or "mask" in c for c in columns)
+    if len(blocks) == 1 and plain:
+        (block,) = blocks.values()
+        order = [c["index"] for c in columns]
+        if order == list(range(len(order))):
+            return pd.DataFrame(block.T, columns=names, copy=False)
+
+    data = {}
+    for c in columns:
+        values = blocks[c["block"]][c["index"]]
+        if "categories" in c:
+            dtype = pd.CategoricalDtype(c["categories"], ordered=c["ordered"])
+            values = pd.Categorical.from_codes(values, dtype=dtype)
+        elif "mask" in c:
+            values = pd.arrays.IntegerArray(values, blocks["mask"][c["mask"]])
+        data[c["name"]] = values
+    return pd.DataFrame(data, columns=names, copy=False)
+
+
+def _read_design(entry: Path) -> pd.DataFrame:
+    import numpy as np
+    import pandas as pd
+
+    with open(entry / _MANIFEST) as fh:
+        names = json.load(fh).get("design")
+    if not names:
+        raise LookupError(f"{entry.name} has no design matrix; pass a schema=")
+    matrix = np.load(entry / _DESIGN, mmap_mode="c").view(np.ndarray)
+    return pd.DataFrame(matrix, columns=names, copy=False)
+
+
+def _publish(tmp: Path, entry: Path) -> None:
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        # Another process published the same entry first; theirs is identical.
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not (entry / _MANIFEST).is_file():
+            raise
+
+
+def _prune_stale(cache_dir: Path, source: Path, keep: Path) -> None:
+    # Entries of other schemas for the same file stay; older file contents and
+    # older cache layouts go.
+    current = f"{source.stem}-v{_CACHE_VERSION}-"
+    same_schema = keep.name.rsplit("-", 1)[0] + "-"
+    for old in cache_dir.glob(f"{source.stem}-v*"):
+        stale = old.name.startswith(same_schema) or not old.name.startswith(current)
+        if old != keep and stale and old.is_dir():
+            # Safe even if another kernel still maps the old blocks: on POSIX
+            # the pages stay valid until that mapping is dropped.
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def _resolve_schema(schema: Union[bool, Schema, None], source: Path) -> Optional[Schema]:
+    if schema is True:
+        return SCHEMAS.get(source.stem)
+    return schema or None
+
+
+def _cache_entry(
+    name: PathLike,
+    data_dir: Optional[PathLike],
+    cache_dir: Optional[PathLike],
+    refresh: bool,
+    schema: Union[bool, Schema, None],
+) -> Path:
+    """Path of the up-to-date cache entry for ``name``, building it if needed."""
+    source = resolve_dataset(name, data_dir)
+    schema = _resolve_schema(schema, source)
+    cache_dir = Path(cache_dir).expanduser() if cache_dir is not None else default_cache_dir()
+    sha = file_sha256(source)
+    entry = cache_dir / _entry_name(source, sha, schema)
+
+    if refresh and entry.exists():
+        shutil.rmtree(entry, ignore_errors=True)
+    if (entry / _MANIFEST).is_file():
+        return entry
+
+    import pandas as pd
+
+    if schema is None:
+        df, design = pd.read_csv(source), ()
+    else:
+        df = schema.read_csv(source)
+        design = schema.design_columns(df.columns)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir))
+    try:
+        meta = {"source": str(source), "sha256": sha,
+                "schema": schema.to_dict() if schema is not None else None}
+        _write_entry(df, tmp, meta, design)
+        _publish(tmp, entry)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+    _prune_stale(cache_dir, source, entry)
+    return entry
+
+
+@profiled
+def get_dataset(
+    name: PathLike,
+    *,
+    data_dir: Optional[PathLike] = None,
+    cache_dir: Optional[PathLike] = None,
+    refresh: bool = False,
+    schema: Union[bool, Schema, None] = True,
+) -> pd.DataFrame:
+    """Load a toolkit dataset through the columnar cache.
+
+    The first call for a given file content parses the CSV and stores it in
+    the cache; every later call memory-maps the stored blocks.  Columns are
+    typed by the dataset's :class:`Schema`; text columns without one come
+    back as ``category`` dtype.
+
+    Args:
+        name: Dataset name (see :func:`list_datasets`) or a path to a CSV.
+        data_dir: Extra folder to search for the source file.
+        cache_dir: Cache location; defaults to :func:`default_cache_dir`.
+        refresh: Rebuild the cache entry even if it is up to date.
+        schema: ``True`` uses the registered schema of the file (see
+            :data:`SCHEMAS`, matched by file name), ``False``/``None`` keeps
+            ``pd.read_csv``'s own types, or pass a :class:`Schema`.
+
+    Returns:
+        DataFrame: The dataset, backed by copy-on-write memory maps.
+
+    Raises:
+        ValueError: If a value does not fit the schema.
+    """
+    entry = _cache_entry(name, data_dir, cache_dir, refresh, schema)
+    try:
+        return _read_entry(entry)
+    except (OSError, ValueError, KeyError):
+        # Damaged or concurrently pruned entry: rebuild it once.
+        return _read_entry(_cache_entry(name, data_dir, cache_dir, True, schema))
+
+
+@profiled
+def design_matrix(
+    name: PathLike,
+    *,
+    data_dir: Optional[PathLike] = None,
+    cache_dir: Optional[PathLike] = None,
+    refresh: bool = False,
+    schema: Union[bool, Schema] = True,
+) -> pd.DataFrame:
+    """Model-ready numeric view of a dataset, without copying it.
+
+    All design columns of the schema (everything except IDs and dates) as
+    one float32 block; categorical columns hold their level codes, and
+    missing values are ``NaN``.  The frame and its ``.to_numpy()`` are views
+    of a copy-on-write memory map of the cache entry, so nothing is read
+    until it is used.
+
+    Args:
+        name: Dataset name (see :func:`list_datasets`) or a path to a CSV.
+        data_dir: Extra folder to search for the source file.
+        cache_dir: Cache location; defaults to :func:`default_cache_dir`.
+        refresh: Rebuild the cache entry even if it is up to date.
+        schema: As for :func:`get_dataset`; a schema is required.
+
+    Returns:
+        DataFrame: ``n_rows × n_design_columns`` float32 values.
+
+    Raises:
+        LookupError: If the dataset has no schema.
+    """
+    entry = _cache_entry(name, data_dir, cache_dir, refresh, schema)
+    try:
+        return _read_design(entry)
+    except (OSError, ValueError, KeyError):
+        return _read_design(_cache_entry(name, data_dir, cache_dir, True, schema))
+
+
+def clear_cache(cache_dir: Optional[PathLike] = None) -> None:
+    """Delete every cached dataset."""
+    cache_dir = Path(cache_dir).expanduser() if cache_dir is not None else default_cache_dir()
+    if cache_dir.is_dir():
+        shutil.rmtree(cache_dir)
@@ -0,0 +1,340 @@
+"""SQLite storage for food logs, tuned for bulk loads and repeated queries.
+
+Notebook 5.4 stores ``large_food_log.csv`` with ``df.to_sql(..., if_exists=
+"replace")`` and queries an unindexed table, so every rebuild rewrites the
+whole table and every ``GROUP BY`` scans it.  :class:`FoodLogDB` instead
+
+* loads CSVs in chunks with ``executemany`` inside a single transaction,
+  in WAL mode with relaxed ``synchronous`` and a large page cache;
+* creates covering indexes on ``(ID, Date)`` and ``(Meal, Nutrient)`` –
+  after the first bulk load, when building them is cheapest;
+* appends: it remembers how many bytes of each CSV it has loaded and
+  seeks past them, so an append costs only the new rows however long the
+  log already is;
+* answers parameterised aggregate queries from a small pool of read-only
+  connections, which WAL lets run while a load is in progress.
+
+Example:
+    >>> db = FoodLogDB("nutrition.db")
+    >>> db.load_csv("data/large_food_log.csv")
+    >>> db.summary("Meal", nutrient="Protein")
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import DEFAULT_CHUNK_BYTES, _csv_extent, _csv_header, _read_csv_range
+from .profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+TABLE = "food_log"
+COLUMNS = {"ID": "TEXT", "Meal": "TEXT", "Nutrient": "TEXT", "Amount": "REAL", "Date": "TEXT"}
+# Each index also carries the columns the common queries read, so SQLite can
+# answer them from the index alone.
+INDEXES = {
+    "idx_food_log_id_date": ("ID", "Date", "Nutrient", "Amount"),
+    "idx_food_log_meal_nutrient": ("Meal", "Nutrient", "Amount"),
+}
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": -64_000,       # KiB, i.e. ~64 MB
+    "mmap_size": 256 << 20,
+}
+AGGREGATES = ("AVG", "SUM", "COUNT", "MIN", "MAX")
+
+
+def connect(path: PathLike, *, readonly: bool = False) -> sqlite3.Connection:
+    """Open ``path`` with the pragmas above (read-only connections skip WAL setup)."""
+    if readonly:
+        conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True,
+                               check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    for name, value in PRAGMAS.items():
+        if readonly and name == "journal_mode":
+            continue
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+class FoodLogDB:
+    """A food-log table in SQLite with bulk loading and a query pool.
+
+    Args:
+        path: Database file (created if missing).
+        pool_size: Number of read-only connections kept for queries.
+    """
+
+    def __init__(self, path: PathLike, *, pool_size: int = 4):
+        self.path = Path(path)
+        self.pool_size = pool_size
+        self._writer = connect(self.path)
+        self._create_schema()
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _create_schema(self) -> None:
+        cols = ", ".join(f"{name} {kind}" for name, kind in COLUMNS.items())
+        self._writer.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} ({cols})")
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS load_log "
+            "(source TEXT PRIMARY KEY, rows INTEGER NOT NULL, loaded_bytes INTEGER)"
+        )
+        # Databases from before byte offsets were recorded.
+        if "loaded_bytes" not in {r[1] for r in self._writer.execute("PRAGMA table_info(load_log)")}:
+            self._writer.execute("ALTER TABLE load_log ADD COLUMN loaded_bytes INTEGER")
+
+    def _create_indexes(self) -> None:
+        for name, cols in INDEXES.items():
+            self._writer.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {TABLE} ({', '.join(cols)})")
+        # Sample the indexes for planner statistics instead of reading them all.
+        self._writer.execute("PRAGMA analysis_limit=1000")
+        self._writer.execute("ANALYZE")
+
+    # -- loading -------------------------------------------------------------
+
+    @profiled
+    def load_csv(
+        self,
+        paths: Union[PathLike, Iterable[PathLike]],
+        *,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        replace: bool = False,
+    ) -> int:
+        """Insert the not-yet-loaded rows of one or more CSV files.
+
+        Only complete lines are loaded; a row still being written is picked
+        up by the next call.
+
+        Args:
+            paths: CSV file(s) with the columns of :data:`COLUMNS`.
+            chunk_bytes: Bytes of CSV parsed and inserted per ``executemany`` call.
+            replace: Empty the table first (a full rebuild).
+
+        Returns:
+            int: Number of rows inserted.
+        """
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        conn = self._writer
+        if replace:
+            conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            conn.execute("DELETE FROM load_log")
+            self._create_schema()
+        # Building indexes once after a bulk load is much faster than
+        # updating them row by row, so a fresh table gets them at the end.
+        fresh = conn.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {TABLE})").fetchone()[0]
+        if fresh:
+            for name in INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+        names = list(COLUMNS)
+        insert = f"INSERT INTO {TABLE} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        inserted = 0
+        conn.execute("BEGIN")
+        try:
+            for path in paths:
+                source = str(Path(path).resolve())
+                header, size, tail = _csv_extent(path)
+                row = conn.execute("SELECT rows, loaded_bytes FROM load_log WHERE source = ?",
+                                   (source,)).fetchone()
+                done, start = row if row else (0, len(header))
+                if start is None:
+                    start = _line_offset(path, done)
+                if start > size:
+                    raise ValueError(f"{path} is shorter than when it was last loaded; "
+                                     "reload it with replace=True")
+                columns = _csv_header(header)
+                for lo in range(start, tail, chunk_bytes):
+                    chunk = _read_csv_range(path, lo, min(lo + chunk_bytes, tail), columns,
+                                            usecols=names, dtype={"Amount": float})
+                    if chunk is None:
+                        continue
+                    # SQLite stores NaN as NULL, so no conversion is needed.
+                    conn.executemany(insert, chunk[names].itertuples(index=False, name=None))
+                    done += len(chunk)
+                    inserted += len(chunk)
+                conn.execute(
+                    "INSERT INTO load_log (source, rows, loaded_bytes) VALUES (?, ?, ?) "
+                    "ON CONFLICT(source) DO UPDATE SET rows = excluded.rows, "
+                    "loaded_bytes = excluded.loaded_bytes",
+                    (source, done, max(start, tail)),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._create_indexes()
+        return inserted
+
+    # -- querying ------------------------------------------------------------
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection from the pool."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._opened < self.pool_size
+                self._opened += grow
+            conn = connect(self.path, readonly=True) if grow else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @profiled
+    def query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        """Run a parameterised query on a pooled connection."""
+        with self.connection() as conn:
+            cur = conn.execute(sql, params)
+            return pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+
+    @profiled
+    def summary(
+        self,
+        group_by: Union[str, Sequence[str]] = "Meal",
+        *,
+        stat: str = "AVG",
+        nutrient: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        wide: bool = True,
+    ) -> pd.DataFrame:
+        """``stat(Amount)`` by ``group_by`` and nutrient, like notebook 5.4.
+
+        Args:
+            group_by: Column(s) of :data:`COLUMNS` to group by.
+            stat: One of :data:`AGGREGATES`.
+            nutrient: Only this nutrient.
+            start: First date (``YYYY-MM-DD``), inclusive.
+            end: Last date, inclusive.
+            wide: Spread nutrients across columns.
+
+        Returns:
+            DataFrame: The aggregate table.
+        """
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+        stat = stat.upper()
+        if stat not in AGGREGATES or not set(group_by) <= set(COLUMNS):
+            raise ValueError(f"stat must be one of {AGGREGATES} and group_by columns of {list(COLUMNS)}")
+        where, params = [], []
+        for clause, value in (("Nutrient = ?", nutrient), ("Date >= ?", start), ("Date <= ?", end)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        keys = ", ".join(dict.fromkeys(group_by + ["Nutrient"]))
+        sql = (f"SELECT {keys}, {stat}(Amount) AS value FROM {TABLE}"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + f" GROUP BY {keys} ORDER BY {keys}")
+        result = self.query(sql, params)
+        if wide and "Nutrient" not in group_by:
+            return result.pivot_table(index=group_by, columns="Nutrient", values="value", aggfunc="first")
+        return result
+
+    @profiled
+    def participant(self, id_: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """Rows of one participant, optionally within a date range (uses the ID index)."""
+        sql = f"SELECT ID, Date, Nutrient, Amount FROM {TABLE} WHERE ID = ?"
+        params = [id_]
+        if start is not None:
+            sql += " AND Date >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND Date <= ?"
+            params.append(end)
+        return self.query(sql + " ORDER BY Date", params)
+
+    def close(self) -> None:
+        """Close the writer and every pooled connection."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        self._opened = 0
+        self._writer.close()
+
+    def __enter__(self) -> "FoodLogDB":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _line_offset(path: PathLike, rows: int) -> int:
+    """Byte offset after the header and ``rows`` data lines (for old load logs)."""
+    with open(path, "rb") as f:
+        f.readline()
+        for _ in range(rows):
+            f.readline()
+        return f.tell()
+
+
+def benchmark(csv: PathLike, workdir: PathLike, *, n_queries: int = 50) -> pd.DataFrame:
+    """Compare notebook 5.4's ``to_sql`` approach with :class:`FoodLogDB`.
+
+    Args:
+        csv: Food-log CSV to load.
+        workdir: Directory for the two temporary databases.
+        n_queries: Repetitions of each query for the latency figures.
+
+    Returns:
+        DataFrame: Load seconds and median query milliseconds per approach.
+    """
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    queries = [
+        ("meal_nutrient_avg", f"SELECT Meal, Nutrient, AVG(Amount) FROM {TABLE} GROUP BY Meal, Nutrient", ()),
+        ("protein_by_meal", f"SELECT Meal, AVG(Amount) FROM {TABLE} WHERE Nutrient = ? GROUP BY Meal", ("Protein",)),
+    ]
+    first_id = pd.read_csv(csv, usecols=["ID"], nrows=1)["ID"].iloc[0]
+    queries.append(("one_participant", f"SELECT Date, Nutrient, Amount FROM {TABLE} WHERE ID = ?", (first_id,)))
+
+    def timed(conn):
+        out = {}
+        for name, sql, params in queries:
+            times = []
+            for _ in range(n_queries):
+                t0 = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                times.append(time.perf_counter() - t0)
+            out[f"{name}_ms"] = 1000 * float(np.median(times))
+        return out
+
+    rows = []
+    baseline = workdir / "to_sql.db"
+    baseline.unlink(missing_ok=True)
+    t0 = time.perf_counter()
+    with sqlite3.connect(baseline) as conn:
+        pd.read_csv(csv).to_sql(TABLE, conn, if_exists="replace", index=False)
+    load = time.perf_counter() - t0
+    with sqlite3.connect(baseline) as conn:
+        rows.append({"approach": "to_sql", "load_s": load, **timed(conn)})
+
+    tuned = workdir / "fns_toolkit.db"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{tuned}{suffix}").unlink(missing_ok=True)
+    t0 = time.perf_counter()
+    with FoodLogDB(tuned) as db:
+        db.load_csv(csv)
+        load = time.perf_counter() - t0
+        with db.connection() as conn:
+            rows.append({"approach": "FoodLogDB", "load_s": load, **timed(conn)})
+    return pd.DataFrame(rows).set_index("approach")
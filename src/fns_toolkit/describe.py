@@ -0,0 +1,546 @@
+"""Descriptive "Table 1" built from mergeable summaries.
+
+Notebook 10.2 builds its baseline table from ``agg(["mean", "std"])`` for the
+continuous variables, one ``value_counts`` per categorical variable and
+string concatenation – several scans of a table that must fit in memory.
+:class:`TableOne` reads each chunk of rows once and keeps, per stratum of the
+``by`` column:
+
+* count, missing count, mean, centred sum of squares (merged with Chan et
+  al.'s parallel form of Welford's update), minimum and maximum of every
+  continuous variable;
+* level counts and missing count of every categorical variable;
+* optionally the medians and quartiles, either ``"exact"`` (keeps the values,
+  so memory grows with the rows) or ``"approx"`` (a log-bucket sketch within
+  ``relative_accuracy`` of the exact quantiles, as in :mod:`.aggregate`).
+
+Two states of different rows merge into the state of all of them, so the
+table can be built chunk by chunk, or from CSV byte ranges in worker
+processes.  :meth:`TableOne.format` only does arithmetic and string
+formatting on the accumulated state.
+
+Example:
+    >>> table_one(df, ["Age", "BMI_Baseline"], ["Sex", "Smoking"], by="CVD_Incidence")
+    >>> table_one("epidemiological_study.csv", by="Sex", quantiles="approx", n_jobs=4)
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import (
+    DEFAULT_CHUNK_BYTES,
+    _csv_tasks,
+    _read_csv_range,
+    _run_tasks,
+    _sketch_bucket,
+    _sketch_mapping,
+    _sketch_quantile,
+)
+from .profiling import profiled
+from .stats.univariate import group_moments
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+QUANTILES = (None, "exact", "approx")
+OVERALL = "Overall"
+
+
+def _grow(array: np.ndarray, rows: int, fill=0) -> np.ndarray:
+    """``array`` with rows appended up to ``rows`` rows."""
+    extra = rows - array.shape[0]
+    if extra <= 0:
+        return array
+    return np.vstack([array, np.full((extra,) + array.shape[1:], fill, dtype=array.dtype)])
+
+
+def _pooled(n, mean, m2, axis=0):
+    """Count, mean and centred sum of squares of groups pooled along ``axis``."""
+    total = n.sum(axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        grand = np.nansum(n * np.nan_to_num(mean), axis=axis) / total
+        m2 = np.nansum(m2 + n * (np.nan_to_num(mean) - np.expand_dims(grand, axis)) ** 2, axis=axis)
+    return total, grand, m2
+
+
+class TableOne:
+    """Mergeable per-stratum summaries of continuous and categorical variables.
+
+    Args:
+        continuous: Numeric columns, summarised as mean (SD).
+        categorical: Columns summarised as counts (%) per level.
+        by: Column defining the strata (rows where it is missing are
+            skipped); ``None`` gives a single ``"Overall"`` column.
+        quantiles: ``None``, ``"exact"`` or ``"approx"`` to add
+            median [Q1, Q3] rows.
+        relative_accuracy: Relative error bound of ``"approx"`` quantiles.
+    """
+
+    def __init__(
+        self,
+        continuous: Sequence[str] = (),
+        categorical: Sequence[str] = (),
+        *,
+        by: Optional[str] = None,
+        quantiles: Optional[str] = None,
+        relative_accuracy: float = 0.01,
+    ):
+        if quantiles not in QUANTILES:
+            raise ValueError(f"quantiles must be one of {QUANTILES}")
+        self.continuous = list(continuous)
+        self.categorical = list(categorical)
+        self.by = by
+        self.quantiles = quantiles
+        self.relative_accuracy = relative_accuracy
+        self._gamma, self._offset = _sketch_mapping(relative_accuracy)
+
+        p, k = len(self.continuous), len(self.categorical)
+        self.strata: list = []
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.n = np.zeros((0, p))
+        self.mean = np.zeros((0, p))
+        self.m2 = np.zeros((0, p))
+        self.min = np.zeros((0, p))
+        self.max = np.zeros((0, p))
+        self.levels: dict[str, list] = {var: [] for var in self.categorical}
+        self.counts: dict[str, np.ndarray] = {var: np.zeros((0, 0), np.int64) for var in self.categorical}
+        self.level_missing = np.zeros((0, k), dtype=np.int64)
+        # Level order of categorical dtypes (e.g. Low < Medium < High).
+        self.level_order: dict[str, list] = {}
+        # quantiles="exact": (stratum codes, values) chunks per variable.
+        self.values: dict[str, list] = {var: [] for var in self.continuous}
+        # quantiles="approx": bucket counts indexed by (variable, stratum, bucket).
+        self.sketch = pd.Series(dtype=np.int64, index=pd.MultiIndex.from_arrays(
+            [[], [], []], names=["variable", "stratum", "bucket"]))
+        # Bytes of each CSV already read.
+        self.sources: dict[str, int] = {}
+
+    def _config(self) -> tuple:
+        return (self.continuous, self.categorical, self.by, self.quantiles, self.relative_accuracy)
+
+    @property
+    def columns(self) -> list[str]:
+        """Columns read from the data."""
+        return ([self.by] if self.by else []) + self.continuous + self.categorical
+
+    def _stratum_index(self, labels) -> np.ndarray:
+        """Global index of every stratum label, adding new strata."""
+        position = {label: i for i, label in enumerate(self.strata)}
+        index = np.empty(len(labels), dtype=np.int64)
+        for i, label in enumerate(labels):
+            if label not in position:
+                position[label] = len(self.strata)
+                self.strata.append(label)
+            index[i] = position[label]
+        size = len(self.strata)
+        self.rows = np.concatenate([self.rows, np.zeros(size - len(self.rows), np.int64)])
+        for name in ("n", "mean", "m2"):
+            setattr(self, name, _grow(getattr(self, name), size))
+        self.min = _grow(self.min, size, np.inf)
+        self.max = _grow(self.max, size, -np.inf)
+        self.level_missing = _grow(self.level_missing, size)
+        for var in self.categorical:
+            self.counts[var] = _grow(self.counts[var], size)
+        return index
+
+    def _level_index(self, var: str, labels) -> np.ndarray:
+        position = {label: i for i, label in enumerate(self.levels[var])}
+        index = np.empty(len(labels), dtype=np.int64)
+        for i, label in enumerate(labels):
+            if label not in position:
+                position[label] = len(self.levels[var])
+                self.levels[var].append(label)
+            index[i] = position[label]
+        counts = self.counts[var]
+        width = len(self.levels[var]) - counts.shape[1]
+        if width > 0:
+            self.counts[var] = np.hstack([counts, np.zeros((counts.shape[0], width), np.int64)])
+        return index
+
+    # -- building ------------------------------------------------------------
+
+    def update(self, chunk: pd.DataFrame) -> "TableOne":
+        """Add the rows of ``chunk``."""
+        if self.by is None:
+            codes = np.zeros(len(chunk), dtype=np.int64)
+            index = self._stratum_index([OVERALL])
+        else:
+            codes, labels = pd.factorize(chunk[self.by])
+            index = self._stratum_index(list(labels))
+        keep = codes >= 0
+        codes = np.where(keep, index[np.maximum(codes, 0)] if len(index) else -1, -1)
+        n_strata = len(self.strata)
+        self.rows += np.bincount(codes[keep], minlength=n_strata)
+
+        if self.continuous:
+            block = chunk[self.continuous].to_numpy(dtype=float, na_value=np.nan)
+            n, mean, m2 = group_moments(block, codes, n_strata)
+            total = self.n + n
+            with np.errstate(invalid="ignore", divide="ignore"):
+                delta = np.nan_to_num(mean) - np.nan_to_num(self.mean)
+                self.mean = np.nan_to_num(self.mean) + delta * np.where(total > 0, n / total, 0)
+                self.m2 = self.m2 + np.nan_to_num(m2) + delta ** 2 * np.where(
+                    total > 0, self.n * n / total, 0)
+            self.n = total
+            np.fmin.at(self.min, codes[keep], block[keep])
+            np.fmax.at(self.max, codes[keep], block[keep])
+            self._update_quantiles(block[keep], codes[keep])
+
+        for j, var in enumerate(self.categorical):
+            column = chunk[var]
+            if isinstance(column.dtype, pd.CategoricalDtype) and var not in self.level_order:
+                self.level_order[var] = list(column.cat.categories)
+            local, labels = pd.factorize(column)
+            level = self._level_index(var, list(labels))
+            observed = keep & (local >= 0)
+            width = len(self.levels[var])
+            flat = codes[observed] * width + level[local[observed]]
+            self.counts[var] += np.bincount(flat, minlength=n_strata * width).reshape(n_strata, width)
+            self.level_missing[:, j] += np.bincount(codes[keep & (local < 0)], minlength=n_strata)
+        return self
+
+    def _update_quantiles(self, block: np.ndarray, codes: np.ndarray) -> None:
+        if self.quantiles is None:
+            return
+        for j, var in enumerate(self.continuous):
+            observed = ~np.isnan(block[:, j])
+            values, strata = block[observed, j], codes[observed]
+            if self.quantiles == "exact":
+                self.values[var].append((strata, values))
+            elif len(values):
+                buckets = _sketch_bucket(values, self._gamma, self._offset)
+                counts = pd.Series(1, index=pd.MultiIndex.from_arrays(
+                    [np.full(len(values), var, dtype=object), strata, buckets],
+                    names=self.sketch.index.names)).groupby(level=[0, 1, 2]).sum()
+                self._add_sketch(counts)
+
+    def _add_sketch(self, counts: pd.Series) -> None:
+        if len(self.sketch):
+            counts = pd.concat([self.sketch, counts]).groupby(level=[0, 1, 2]).sum()
+        self.sketch = counts.sort_index()
+
+    def merge(self, other: "TableOne") -> "TableOne":
+        """Add another state (of different rows) into this one."""
+        if other._config() != self._config():
+            raise ValueError("Can only merge tables with the same variables, strata and quantiles")
+        index = self._stratum_index(other.strata)
+        n_strata = len(self.strata)
+
+        def placed(array, fill=0.0):
+            out = np.full((n_strata,) + array.shape[1:], fill, dtype=array.dtype)
+            out[index] = array
+            return out
+
+        self.rows += placed(other.rows, 0)
+        n, mean, m2 = placed(other.n), placed(other.mean), placed(other.m2)
+        total = self.n + n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean - self.mean
+            self.mean = self.mean + delta * np.where(total > 0, n / total, 0)
+            self.m2 = self.m2 + m2 + delta ** 2 * np.where(total > 0, self.n * n / total, 0)
+        self.n = total
+        self.min = np.fmin(self.min, placed(other.min, np.inf))
+        self.max = np.fmax(self.max, placed(other.max, -np.inf))
+
+        self.level_missing += placed(other.level_missing, 0)
+        for var in self.categorical:
+            level = self._level_index(var, other.levels[var])
+            counts = placed(other.counts[var], 0)
+            np.add.at(self.counts[var], (slice(None), level), counts)
+            self.level_order.setdefault(var, other.level_order.get(var))
+            if self.level_order[var] is None:
+                del self.level_order[var]
+
+        for var in self.continuous:
+            self.values[var] += [(index[s], v) for s, v in other.values[var]]
+        if len(other.sketch):
+            sketch = other.sketch.copy()
+            sketch.index = sketch.index.set_levels(
+                index[sketch.index.levels[1].to_numpy()], level="stratum", verify_integrity=False)
+            self._add_sketch(sketch.groupby(level=[0, 1, 2]).sum())
+        for path, pos in other.sources.items():
+            self.sources[path] = max(pos, self.sources.get(path, 0))
+        return self
+
+    @profiled
+    def scan(
+        self,
+        paths: Union[PathLike, Iterable[PathLike]],
+        *,
+        n_jobs: Optional[int] = 1,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    ) -> "TableOne":
+        """Read the unread part of one or more CSV files.
+
+        Args:
+            paths: CSV file(s).
+            n_jobs: Worker processes (``None`` = ``os.cpu_count()``).
+            chunk_bytes: Bytes of CSV per task.
+
+        Returns:
+            TableOne: ``self``, updated.
+        """
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        tasks = [task for path in paths for task in _csv_tasks(path, self.sources, chunk_bytes)]
+        for part in _run_tasks(_scan_range, self._empty(), tasks, n_jobs):
+            self.merge(part)
+        return self
+
+    def _empty(self) -> "TableOne":
+        return TableOne(self.continuous, self.categorical, by=self.by,
+                        quantiles=self.quantiles, relative_accuracy=self.relative_accuracy)
+
+    # -- results -------------------------------------------------------------
+
+    def _order(self) -> list[int]:
+        try:
+            return sorted(range(len(self.strata)), key=lambda i: self.strata[i])
+        except TypeError:
+            return list(range(len(self.strata)))
+
+    def _quantiles(self, qs: Sequence[float]) -> dict[tuple, np.ndarray]:
+        """``{(variable, stratum or OVERALL): quantiles}`` of every continuous variable."""
+        out = {}
+        if self.quantiles == "exact":
+            for var in self.continuous:
+                if not self.values[var]:
+                    continue
+                strata = np.concatenate([s for s, _ in self.values[var]])
+                values = np.concatenate([v for _, v in self.values[var]])
+                for i, label in enumerate(self.strata):
+                    mine = values[strata == i]
+                    if len(mine):
+                        out[(var, label)] = np.quantile(mine, qs)
+                out[(var, OVERALL)] = np.quantile(values, qs)
+        elif self.quantiles == "approx" and len(self.sketch):
+            overall = self.sketch.groupby(level=["variable", "bucket"]).sum()
+            pooled_min = dict(zip(self.continuous, np.min(self.min, axis=0)))
+            pooled_max = dict(zip(self.continuous, np.max(self.max, axis=0)))
+            for q_i, q in enumerate(qs):
+                by_stratum = _sketch_quantile(self.sketch, q, self._gamma, self._offset)
+                for (var, s), value in by_stratum.items():
+                    j = self.continuous.index(var)
+                    clipped = min(max(value, self.min[s, j]), self.max[s, j])
+                    out.setdefault((var, self.strata[s]), np.empty(len(qs)))[q_i] = clipped
+                for var, value in _sketch_quantile(overall, q, self._gamma, self._offset).items():
+                    clipped = min(max(value, pooled_min[var]), pooled_max[var])
+                    out.setdefault((var, OVERALL), np.empty(len(qs)))[q_i] = clipped
+        return out
+
+    def moments(self) -> pd.DataFrame:
+        """Long table of the continuous statistics per ``(variable, stratum)``."""
+        order = self._order()
+        labels = [self.strata[i] for i in order]
+        n, mean, m2 = self.n[order], self.mean[order], self.m2[order]
+        rows, lo, hi = self.rows[order], self.min[order], self.max[order]
+        if self.by is not None and len(order):
+            tn, tmean, tm2 = _pooled(n, mean, m2)
+            n, mean, m2 = np.vstack([n, tn]), np.vstack([mean, tmean]), np.vstack([m2, tm2])
+            rows = np.append(rows, rows.sum())
+            lo, hi = np.vstack([lo, lo.min(axis=0)]), np.vstack([hi, hi.max(axis=0)])
+            labels = labels + [OVERALL]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(m2 / (n - 1))
+        frames = []
+        for j, var in enumerate(self.continuous):
+            frame = pd.DataFrame({
+                "variable": var,
+                "stratum": labels,
+                "n": n[:, j].astype(np.int64),
+                "missing": (rows - n[:, j]).astype(np.int64),
+                "mean": np.where(n[:, j] > 0, mean[:, j], np.nan),
+                "std": std[:, j],
+                "min": np.where(n[:, j] > 0, lo[:, j], np.nan),
+                "max": np.where(n[:, j] > 0, hi[:, j], np.nan),
+            })
+            frames.append(frame)
+        table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=["variable", "stratum", "n", "missing", "mean", "std", "min", "max"])
+        if self.quantiles is not None:
+            quantiles = self._quantiles((0.25, 0.5, 0.75))
+            values = np.array([quantiles.get((v, s), [np.nan] * 3)
+                               for v, s in zip(table["variable"], table["stratum"])]).reshape(-1, 3)
+            table["q1"], table["median"], table["q3"] = values.T
+        return table.set_index(["variable", "stratum"])
+
+    def frequencies(self) -> pd.DataFrame:
+        """Long table of level counts and percentages per ``(variable, level, stratum)``.
+
+        Percentages are of the non-missing values of the stratum; missing
+        values are the level ``NaN``.
+        """
+        order = self._order()
+        labels = [self.strata[i] for i in order]
+        frames = []
+        for j, var in enumerate(self.categorical):
+            levels = self.levels[var]
+            if var in self.level_order:
+                known = [lv for lv in self.level_order[var] if lv in levels]
+                levels = known + [lv for lv in levels if lv not in known]
+            else:
+                try:
+                    levels = sorted(levels)
+                except TypeError:
+                    pass
+            position = [self.levels[var].index(lv) for lv in levels]
+            counts = self.counts[var][order][:, position]
+            missing = self.level_missing[order, j]
+            names = labels
+            if self.by is not None and len(order):
+                counts = np.vstack([counts, counts.sum(axis=0)])
+                missing = np.append(missing, missing.sum())
+                names = labels + [OVERALL]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                percent = 100 * counts / counts.sum(axis=1, keepdims=True)
+            for s, label in enumerate(names):
+                frames.append(pd.DataFrame({
+                    "variable": var, "level": levels + [np.nan], "stratum": label,
+                    "count": np.append(counts[s], missing[s]),
+                    "percent": np.append(percent[s], np.nan),
+                }))
+        if not frames:
+            return pd.DataFrame(columns=["count", "percent"], index=pd.MultiIndex.from_arrays(
+                [[], [], []], names=["variable", "level", "stratum"]))
+        return pd.concat(frames, ignore_index=True).set_index(["variable", "level", "stratum"])
+
+    def format(self, *, digits: int = 1, overall: bool = True) -> pd.DataFrame:
+        """Publication-style Table 1: one column per stratum, one row per statistic.
+
+        Continuous variables show ``mean (SD)`` and, with quantiles,
+        ``median [Q1, Q3]``; categorical levels show ``count (percent%)``.
+        Missing counts are listed where there are any.
+
+        Args:
+            digits: Decimals of means, SDs, quantiles and percentages.
+            overall: Add an ``"Overall"`` column when stratified.
+        """
+        moments, freqs = self.moments(), self.frequencies()
+        labels = [self.strata[i] for i in self._order()]
+        columns = labels + ([OVERALL] if self.by is not None and overall and labels else [])
+        if self.by is None:
+            columns = [OVERALL]
+        n_rows = dict(zip(labels, self.rows[self._order()]))
+        n_rows[OVERALL] = int(self.rows.sum())
+
+        f = f"{{:.{digits}f}}"
+        rows = {("N", ""): [str(n_rows.get(c, 0)) for c in columns]}
+        for var in self.continuous:
+            stats = moments.loc[var]
+            rows[(var, "mean (SD)")] = [
+                f"{f.format(stats.at[c, 'mean'])} ({f.format(stats.at[c, 'std'])})" for c in columns]
+            if self.quantiles is not None:
+                rows[(var, "median [Q1, Q3]")] = [
+                    f"{f.format(stats.at[c, 'median'])} "
+                    f"[{f.format(stats.at[c, 'q1'])}, {f.format(stats.at[c, 'q3'])}]" for c in columns]
+            if stats["missing"].any():
+                rows[(var, "missing")] = [str(stats.at[c, "missing"]) for c in columns]
+        for var in self.categorical:
+            table = freqs.loc[var]
+            for level in table.index.get_level_values("level").unique():
+                part = table.xs(level, level="level", drop_level=True) if pd.notna(level) else \
+                    table[table.index.get_level_values("level").isna()].droplevel("level")
+                if pd.isna(level):
+                    if part["count"].any():
+                        rows[(var, "missing")] = [str(int(part.at[c, "count"])) for c in columns]
+                    continue
+                rows[(var, str(level))] = [
+                    f"{int(part.at[c, 'count'])} ({f.format(part.at[c, 'percent'])}%)" for c in columns]
+        index = pd.MultiIndex.from_tuples(rows, names=["variable", "statistic"])
+        return pd.DataFrame(list(rows.values()), index=index, columns=columns)
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, path: PathLike) -> None:
+        """Write the state (and read positions) to ``path`` atomically."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        pd.to_pickle(self, tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: PathLike) -> "TableOne":
+        """Read a state written by :meth:`save`."""
+        table = pd.read_pickle(path)
+        if not isinstance(table, cls):
+            raise TypeError(f"{path} does not hold a {cls.__name__}")
+        return table
+
+
+def _scan_range(template: TableOne, key: str, lo: int, hi: int, names) -> TableOne:
+    """State of one byte range of a CSV file."""
+    table = template._empty()
+    chunk = _read_csv_range(key, lo, hi, names, usecols=table.columns)
+    return table.update(chunk) if chunk is not None else table
+
+
+def _infer(sample: pd.DataFrame, by: Optional[str]) -> tuple[list[str], list[str]]:
+    """Numeric columns are continuous; the rest (and booleans) categorical."""
+    continuous, categorical = [], []
+    for name in sample.columns:
+        if name == by:
+            continue
+        dtype = sample[name].dtype
+        numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        (continuous if numeric else categorical).append(name)
+    return continuous, categorical
+
+
+@profiled
+def table_one(
+    data: Union[pd.DataFrame, PathLike, Iterable[pd.DataFrame]],
+    continuous: Optional[Sequence[str]] = None,
+    categorical: Optional[Sequence[str]] = None,
+    *,
+    by: Optional[str] = None,
+    quantiles: Optional[str] = None,
+    digits: int = 1,
+    overall: bool = True,
+    n_jobs: Optional[int] = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> pd.DataFrame:
+    """Baseline-characteristics table in one pass over the data.
+
+    Args:
+        data: A DataFrame, a CSV file (read in byte ranges, in parallel with
+            ``n_jobs``) or an iterable of DataFrame chunks.
+        continuous: Columns shown as mean (SD); with ``categorical`` also
+            ``None``, numeric columns are continuous and the others
+            categorical (pass both lists to leave out ID columns).
+        categorical: Columns shown as count (%).
+        by: Column whose levels become the table's columns.
+        quantiles: ``"exact"`` or ``"approx"`` to add median [Q1, Q3].
+        digits: Decimals in the formatted cells.
+        overall: Add an ``"Overall"`` column when stratified.
+        n_jobs: Worker processes for CSV input.
+        chunk_bytes: Bytes of CSV per task.
+
+    Returns:
+        DataFrame: Formatted cells indexed by ``(variable, statistic)``.
+    """
+    chunks = None
+    if isinstance(data, pd.DataFrame):
+        sample = data
+    elif isinstance(data, (str, os.PathLike)):
+        sample = pd.read_csv(data, nrows=1000)
+    else:
+        chunks = iter(data)
+        sample = next(chunks, pd.DataFrame())
+    if continuous is None and categorical is None:
+        continuous, categorical = _infer(sample, by)
+
+    table = TableOne(continuous or (), categorical or (), by=by, quantiles=quantiles)
+    if isinstance(data, pd.DataFrame):
+        table.update(data)
+    elif chunks is None:
+        table.scan(data, n_jobs=n_jobs, chunk_bytes=chunk_bytes)
+    else:
+        table.update(sample)
+        for chunk in chunks:
+            table.update(chunk)
+    return table.format(digits=digits, overall=overall)
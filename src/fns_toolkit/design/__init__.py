@@ -0,0 +1,9 @@
+"""Trial design: simulated power curves and sample-size searches."""
+
+from .simulation import SampleSizeResult, power, sample_size
+
+__all__ = [
+    "power",
+    "sample_size",
+    "SampleSizeResult",
+]
@@ -0,0 +1,427 @@
+"""Monte Carlo power and sample size for two-arm trial designs.
+
+``simulate_trial.py``, ``create_data.py`` and notebook 10.8 each simulate one
+trial and run one test.  :func:`power` estimates the power of a whole grid of
+designs – sample sizes, allocation ratios, effect sizes, SDs – from thousands
+of simulated trials per grid cell, and :func:`sample_size` searches for the
+smallest ``n`` reaching a target power.
+
+All replicates of a batch are drawn as one ``(replicates, n)`` array per arm
+and tested column-wise:
+
+* ``"t"`` – pooled-variance two-sample t-test of a normal outcome;
+* ``"ancova"`` – treatment effect on a follow-up adjusted for a correlated
+  baseline (``follow-up ~ group + baseline``), as in the Hipponol trial;
+* ``"logrank"`` – log-rank test of exponential survival times with
+  administrative censoring at ``follow_up`` and random drop-out.
+
+The random numbers do not depend on the design parameters: every arm uses
+fixed standard normal/exponential/uniform streams, drawn participant by
+participant, and effects, SDs and hazards are applied afterwards.  One draw
+therefore serves every cell of the grid, and the draws for ``n`` participants
+are the first ``n`` columns of the draws for any larger ``n`` (common random
+numbers), which keeps power curves smooth and lets the sample-size search
+slice instead of redrawing.  Batch ``b`` of arm ``a`` always comes from the
+same child of ``SeedSequence(seed)``, so results do not depend on ``n_jobs``.
+
+Example:
+    >>> power("t", n=[40, 60, 80], effect=[0.4, 0.6], sd=1)
+    >>> power("ancova", n=100, effect=-8, sd=15, correlation=0.8)
+    >>> sample_size("logrank", hazard_ratio=0.5, median_control=3.5,
+    ...             follow_up=24, dropout=0.4, target=0.9)
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from ..profiling import profiled
+
+DEFAULT_REPLICATES = 10_000
+# Replicates per batch; part of the random stream layout, so keep it fixed.
+DEFAULT_BATCH_SIZE = 500
+# Largest block of draws a process keeps for reuse between evaluations.
+_CACHE_BYTES = 512 << 20
+
+_ARMS = ("control", "treatment")
+
+
+# ---------------------------------------------------------------------------
+# Tests: per-prefix summaries of the draws, then p-values per design
+# ---------------------------------------------------------------------------
+
+def _t_summary(c, t):
+    """Means and pooled sum of squares of the standard normal draws."""
+    (zc,), (zt,) = c, t
+    mc, mt = zc.mean(axis=1), zt.mean(axis=1)
+    ss = ((zc - mc[:, None]) ** 2).sum(axis=1) + ((zt - mt[:, None]) ** 2).sum(axis=1)
+    return {"diff": mt - mc, "ss": ss, "nc": zc.shape[1], "nt": zt.shape[1]}
+
+
+def _t_pvalue(s, *, effect, sd):
+    # t is invariant to the outcome's scale: work in units of sd.
+    df = s["nc"] + s["nt"] - 2
+    se = np.sqrt(s["ss"] / df * (1 / s["nc"] + 1 / s["nt"]))
+    return 2 * stats.t.sf(np.abs((s["diff"] + effect / sd) / se), df)
+
+
+def _ancova_summary(c, t):
+    """Within-group cross products of the baseline (x) and noise (e) draws."""
+    (xc, ec), (xt, et) = c, t
+    out = {"nc": xc.shape[1], "nt": xt.shape[1]}
+    cross = {"xx": 0.0, "xe": 0.0, "ee": 0.0}
+    for x, e in ((xc, ec), (xt, et)):
+        dx = x - x.mean(axis=1, keepdims=True)
+        de = e - e.mean(axis=1, keepdims=True)
+        cross["xx"] = cross["xx"] + (dx * dx).sum(axis=1)
+        cross["xe"] = cross["xe"] + (dx * de).sum(axis=1)
+        cross["ee"] = cross["ee"] + (de * de).sum(axis=1)
+    out.update(cross)
+    out["dx"] = xt.mean(axis=1) - xc.mean(axis=1)
+    out["de"] = et.mean(axis=1) - ec.mean(axis=1)
+    return out
+
+
+def _ancova_pvalue(s, *, effect, sd, correlation):
+    # follow-up = effect·treated + sd·(ρ·baseline + √(1-ρ²)·noise), in units of sd.
+    rho = correlation
+    w = np.sqrt(1 - rho ** 2)
+    sxy = rho * s["xx"] + w * s["xe"]
+    syy = rho ** 2 * s["xx"] + 2 * rho * w * s["xe"] + w ** 2 * s["ee"]
+    dy = effect / sd + rho * s["dx"] + w * s["de"]
+    slope = sxy / s["xx"]
+    estimate = dy - slope * s["dx"]
+    df = s["nc"] + s["nt"] - 3
+    sigma2 = np.maximum(syy - sxy * slope, 0) / df
+    se = np.sqrt(sigma2 * (1 / s["nc"] + 1 / s["nt"] + s["dx"] ** 2 / s["xx"]))
+    return 2 * stats.t.sf(np.abs(estimate / se), df)
+
+
+def _logrank_summary(c, t):
+    return {"control": c, "treatment": t}
+
+
+def _logrank_pvalue(s, *, hazard_ratio, median_control, follow_up, dropout):
+    (ec, uc), (et, ut) = s["control"], s["treatment"]
+    rate = np.log(2) / median_control
+    time = np.hstack([ec / rate, et / (rate * hazard_ratio)])
+    event = (time <= follow_up) & (np.hstack([uc, ut]) >= dropout)
+    time = np.minimum(time, follow_up)
+    treated = np.r_[np.zeros(ec.shape[1], bool), np.ones(et.shape[1], bool)]
+
+    # Continuous times: no tied events, so every event has d = 1.
+    order = np.argsort(time, axis=1, kind="stable")
+    event = np.take_along_axis(event, order, axis=1)
+    arm = treated[order]
+    n = time.shape[1]
+    at_risk = n - np.arange(n)
+    treated_at_risk = np.cumsum(arm[:, ::-1], axis=1)[:, ::-1]
+    expected = treated_at_risk / at_risk
+    o_minus_e = np.where(event, arm - expected, 0).sum(axis=1)
+    variance = np.where(event, expected * (1 - expected), 0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = o_minus_e / np.sqrt(variance)
+    return np.where(variance > 0, 2 * stats.norm.sf(np.abs(z)), 1.0)
+
+
+@dataclass(frozen=True)
+class _Test:
+    streams: tuple[str, ...]
+    summary: Callable
+    pvalue: Callable
+    defaults: dict
+    min_arm: int = 2
+
+
+TESTS: dict[str, _Test] = {
+    "t": _Test(("normal",), _t_summary, _t_pvalue, {"effect": None, "sd": 1.0}),
+    "ancova": _Test(("normal", "normal"), _ancova_summary, _ancova_pvalue,
+                    {"effect": None, "sd": 1.0, "correlation": 0.5}),
+    "logrank": _Test(("exponential", "uniform"), _logrank_summary, _logrank_pvalue,
+                     {"hazard_ratio": None, "median_control": 1.0,
+                      "follow_up": np.inf, "dropout": 0.0}, min_arm=1),
+}
+
+
+def _test(name: str) -> _Test:
+    try:
+        return TESTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown test {name!r}; choose from {sorted(TESTS)}") from None
+
+
+# ---------------------------------------------------------------------------
+# Draws
+# ---------------------------------------------------------------------------
+
+def _draw(kind: str, rng: np.random.Generator, n: int, size: int) -> np.ndarray:
+    # Drawn as (n, size) so that fewer participants are a prefix of the
+    # stream; returned as the (size, n) view.
+    if kind == "normal":
+        return rng.standard_normal((n, size)).T
+    if kind == "exponential":
+        return rng.standard_exponential((n, size)).T
+    return rng.random((n, size)).T
+
+
+_WORKER: dict = {}
+
+
+def _draws(test: str, entropy, batch: int, size: int, n_arms: tuple[int, int]) -> list:
+    """``[control, treatment]`` lists of ``(size, n_arm)`` draws, from the cache if possible."""
+    spec = _test(test)
+    cache = _WORKER.setdefault("draws", {})
+    key = (test, entropy, batch, size)
+    arms = cache.get(key)
+    if arms is None or any(arrays[0].shape[1] < n for arrays, n in zip(arms, n_arms)):
+        arms = []
+        for a, n in enumerate(n_arms):
+            arrays = []
+            for s, kind in enumerate(spec.streams):
+                seed = np.random.SeedSequence(entropy, spawn_key=(a, s, batch))
+                arrays.append(_draw(kind, np.random.default_rng(seed), n, size))
+            arms.append(arrays)
+        cache[key] = arms
+        held = sum(a.nbytes for entry in cache.values() for arrays in entry for a in arrays)
+        if held > _CACHE_BYTES:
+            cache.clear()
+            cache[key] = arms
+    return [[a[:, :n] for a in arrays] for arrays, n in zip(arms, n_arms)]
+
+
+def _run_batch(test: str, cells: list[dict], entropy, batch: int, size: int) -> np.ndarray:
+    """Number of significant replicates of every cell in one batch."""
+    spec = _test(test)
+    n_max = tuple(max(cell[f"n_{arm}"] for cell in cells) for arm in _ARMS)
+    control, treatment = _draws(test, entropy, batch, size, n_max)
+    summaries = {}
+    hits = np.empty(len(cells), dtype=np.int64)
+    for i, cell in enumerate(cells):
+        nc, nt = cell["n_control"], cell["n_treatment"]
+        if (nc, nt) not in summaries:
+            summaries[(nc, nt)] = spec.summary([a[:, :nc] for a in control],
+                                               [a[:, :nt] for a in treatment])
+        params = {k: cell[k] for k in spec.defaults}
+        hits[i] = np.count_nonzero(spec.pvalue(summaries[(nc, nt)], **params) < cell["alpha"])
+    return hits
+
+
+def _simulate(test, cells, replicates, batch_size, entropy, pool=None) -> np.ndarray:
+    """Estimated power of every cell."""
+    sizes = [batch_size] * (replicates // batch_size)
+    if replicates % batch_size:
+        sizes.append(replicates % batch_size)
+    jobs = [(test, cells, entropy, b, size) for b, size in enumerate(sizes)]
+    if pool is None:
+        parts = [_run_batch(*job) for job in jobs]
+    else:
+        parts = list(pool.map(_run_batch, *zip(*jobs)))
+    return np.sum(parts, axis=0) / replicates
+
+
+def _clear_worker():
+    _WORKER.clear()
+
+
+class _Runner:
+    """Runs simulations in this process or a pool; clears the draw cache afterwards."""
+
+    def __init__(self, n_jobs: Optional[int]):
+        self.n_jobs = max(1, n_jobs or os.cpu_count() or 1)
+        self.pool = None
+
+    def __enter__(self):
+        if self.n_jobs > 1:
+            self.pool = ProcessPoolExecutor(self.n_jobs, initializer=_clear_worker)
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.shutdown()
+        _WORKER.clear()
+
+    def __call__(self, test, cells, replicates, batch_size, entropy) -> np.ndarray:
+        return _simulate(test, cells, replicates, batch_size, entropy, self.pool)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def _split(n: int, allocation: float) -> tuple[int, int]:
+    """``(n_control, n_treatment)`` for ``allocation`` treated per control."""
+    n_treatment = int(round(n * allocation / (1 + allocation)))
+    return n - n_treatment, n_treatment
+
+
+def _cells(test: str, n, allocation, alpha, params: dict) -> list[dict]:
+    spec = _test(test)
+    unknown = set(params) - set(spec.defaults)
+    if unknown:
+        raise TypeError(f"{test!r} does not take {sorted(unknown)}; "
+                        f"parameters are {sorted(spec.defaults)}")
+    grid = {"n": n, "allocation": allocation, "alpha": alpha}
+    for name, default in spec.defaults.items():
+        value = params.get(name, default)
+        if value is None:
+            raise TypeError(f"{test!r} needs {name}=")
+        grid[name] = value
+    axes = {k: list(np.atleast_1d(v)) for k, v in grid.items()}
+
+    cells = []
+    for values in itertools.product(*axes.values()):
+        cell = {k: v.item() if isinstance(v, np.generic) else v for k, v in zip(axes, values)}
+        cell["n_control"], cell["n_treatment"] = _split(int(cell["n"]), cell["allocation"])
+        if min(cell["n_control"], cell["n_treatment"]) < spec.min_arm or \
+                cell["n_control"] + cell["n_treatment"] < 4:
+            raise ValueError(f"n={cell['n']} is too small for allocation {cell['allocation']}")
+        cells.append(cell)
+    return cells
+
+
+@profiled
+def power(
+    test: str = "t",
+    *,
+    n,
+    allocation=1.0,
+    alpha=0.05,
+    replicates: int = DEFAULT_REPLICATES,
+    seed: Optional[int] = None,
+    n_jobs: Optional[int] = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **params,
+) -> pd.DataFrame:
+    """Simulated power over a grid of two-arm designs.
+
+    Every argument given as a list becomes an axis of the grid; scalars are
+    fixed.
+
+    Args:
+        test: ``"t"``, ``"ancova"`` or ``"logrank"``.
+        n: Total sample size(s).
+        allocation: Treated participants per control (``1`` = 1:1).
+        alpha: Two-sided significance level(s).
+        replicates: Simulated trials per grid cell.
+        seed: Root seed.
+        n_jobs: Worker processes (``None`` = ``os.cpu_count()``); batches of
+            replicates, each covering the whole grid, are spread over them.
+        batch_size: Replicates drawn at once.
+        **params: Design parameters of the test, scalars or lists:
+
+            * ``t``: ``effect`` (treatment − control mean), ``sd`` (1);
+            * ``ancova``: ``effect``, ``sd`` (1) and ``correlation``
+              between baseline and follow-up (0.5);
+            * ``logrank``: ``hazard_ratio`` (treatment / control),
+              ``median_control`` survival time (1), ``follow_up`` time
+              (no limit) and ``dropout`` probability of random censoring (0).
+
+    Returns:
+        DataFrame: One row per grid cell with its parameters, ``n_control``,
+        ``n_treatment``, ``power`` and the Monte Carlo standard error
+        ``mc_error``.
+    """
+    cells = _cells(test, n, allocation, alpha, params)
+    entropy = np.random.SeedSequence(seed).entropy
+    with _Runner(n_jobs) as run:
+        estimate = run(test, cells, replicates, batch_size, entropy)
+    table = pd.DataFrame(cells)
+    table.insert(0, "test", test)
+    table["replicates"] = replicates
+    table["power"] = estimate
+    table["mc_error"] = np.sqrt(estimate * (1 - estimate) / replicates)
+    return table
+
+
+@dataclass
+class SampleSizeResult:
+    """Outcome of :func:`sample_size`."""
+
+    n: int
+    n_control: int
+    n_treatment: int
+    power: float
+    mc_error: float
+    evaluations: pd.DataFrame
+
+
+@profiled
+def sample_size(
+    test: str = "t",
+    *,
+    target: float = 0.8,
+    allocation: float = 1.0,
+    alpha: float = 0.05,
+    n_min: int = 4,
+    n_max: int = 100_000,
+    replicates: int = DEFAULT_REPLICATES,
+    seed: Optional[int] = None,
+    n_jobs: Optional[int] = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **params,
+) -> SampleSizeResult:
+    """Smallest total ``n`` whose simulated power reaches ``target``.
+
+    ``n`` is doubled from ``n_min`` until the target is reached and then
+    bisected.  Every evaluation uses the same random streams, so smaller
+    ``n`` reuse the leading columns of the draws already made for the upper
+    bracket.
+
+    Args:
+        test: ``"t"``, ``"ancova"`` or ``"logrank"``.
+        target: Power to reach.
+        allocation: Treated participants per control.
+        alpha: Two-sided significance level.
+        n_min: Smallest total sample size tried.
+        n_max: Largest total sample size tried.
+        replicates: Simulated trials per evaluated ``n``.
+        seed: Root seed.
+        n_jobs: Worker processes.
+        batch_size: Replicates drawn at once.
+        **params: Scalar design parameters of the test (see :func:`power`).
+
+    Returns:
+        SampleSizeResult: The sample size, its power and every evaluated
+        ``n`` in ``evaluations``.
+
+    Raises:
+        ValueError: If even ``n_max`` does not reach ``target``.
+    """
+    entropy = np.random.SeedSequence(seed).entropy
+    evaluated: dict[int, float] = {}
+
+    with _Runner(n_jobs) as run:
+        def estimate(n: int) -> float:
+            if n not in evaluated:
+                cells = _cells(test, n, allocation, alpha, params)
+                if len(cells) > 1:
+                    raise ValueError("sample_size takes scalar design parameters")
+                evaluated[n] = float(run(test, cells, replicates, batch_size, entropy)[0])
+            return evaluated[n]
+
+        lo, hi = None, max(n_min, 4)
+        while estimate(hi) < target:
+            if hi >= n_max:
+                raise ValueError(f"Power at n_max={n_max} is {evaluated[hi]:.3f} < {target}")
+            lo, hi = hi, min(2 * hi, n_max)
+        lo = lo if lo is not None else hi
+        # Draws for ``hi`` are cached; every midpoint below reuses a prefix.
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            lo, hi = (mid, hi) if estimate(mid) < target else (lo, mid)
+
+    p = evaluated[hi]
+    table = pd.DataFrame({"n": list(evaluated), "power": list(evaluated.values())}).sort_values("n")
+    table["mc_error"] = np.sqrt(table["power"] * (1 - table["power"]) / replicates)
+    nc, nt = _split(hi, allocation)
+    return SampleSizeResult(n=hi, n_control=nc, n_treatment=nt, power=p,
+                            mc_error=float(np.sqrt(p * (1 - p) / replicates)),
+                            evaluations=table.reset_index(drop=True))
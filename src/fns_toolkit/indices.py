@@ -0,0 +1,217 @@
+"""Dietary index scores computed in one vectorised pass.
+
+Notebook 10.9 computes its nutritional index by writing ``intakes.txt``,
+compiling and running ``nutrition_index.f90`` and reading
+``index_scores.txt`` back, so every run pays for a compiler, a process and
+two text files.  Here an index is *declared* as a list of
+:class:`Component` objects and scored in memory:
+
+* each component takes one intake column, optionally energy-adjusted (a
+  density per ``per_energy`` kcal, or a percentage of energy);
+* the adjusted intake is optionally capped;
+* it then contributes either ``weight × intake`` (a weighted sum like the
+  notebook's) or, with ``zero`` and ``full`` standards, HEI-style points:
+  ``0`` at ``zero``, ``weight`` at ``full`` and linear in between.  Setting
+  ``full`` below ``zero`` scores a nutrient to moderate.
+
+All components are evaluated together as ``participants × components``
+array operations, so millions of participants take well under a second.
+
+Example:
+    >>> NUTRITIONAL_INDEX.score(intakes)                  # notebook 10.9
+    >>> fibre = DietaryIndex("fibre_sugar", [
+    ...     Component("Fibre", weight=10, zero=0, full=14, per_energy=1000),
+    ...     Component("Sugar", weight=10, zero=25, full=10, kcal_per_g=4),
+    ... ], energy="Energy_kcal")
+    >>> fibre.score(df, components=True)
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+
+Data = Union[pd.DataFrame, Mapping[str, np.ndarray]]
+
+
+@dataclass(frozen=True)
+class Component:
+    """One scored intake of a dietary index.
+
+    Attributes:
+        column: Intake column (e.g. grams per day).
+        weight: Multiplier of the intake, or the maximum points with
+            standards.
+        zero: Intake (after adjustment) scoring 0 points.
+        full: Intake (after adjustment) scoring ``weight`` points.
+        cap: Upper limit applied to the adjusted intake.
+        per_energy: Express the intake per this many kcal of energy.
+        kcal_per_g: Express the intake as a percentage of energy, with
+            this many kcal per gram.
+        name: Label of the component (default: ``column``).
+    """
+
+    column: str
+    weight: float = 1.0
+    zero: Optional[float] = None
+    full: Optional[float] = None
+    cap: Optional[float] = None
+    per_energy: Optional[float] = None
+    kcal_per_g: Optional[float] = None
+    name: Optional[str] = None
+
+    def __post_init__(self):
+        if (self.zero is None) != (self.full is None):
+            raise ValueError(f"{self.column}: give both zero and full, or neither")
+        if self.zero is not None and self.zero == self.full:
+            raise ValueError(f"{self.column}: zero and full must differ")
+        if self.per_energy is not None and self.kcal_per_g is not None:
+            raise ValueError(f"{self.column}: use per_energy or kcal_per_g, not both")
+
+    @property
+    def label(self) -> str:
+        return self.name or self.column
+
+    @property
+    def energy_adjusted(self) -> bool:
+        return self.per_energy is not None or self.kcal_per_g is not None
+
+
+@dataclass(frozen=True)
+class DietaryIndex:
+    """A named set of components whose points are summed.
+
+    Attributes:
+        name: Name of the index (and of the score column).
+        components: The scored intakes.
+        energy: Energy intake column (kcal) for energy-adjusted components.
+    """
+
+    name: str
+    components: Sequence[Component] = field(default_factory=tuple)
+    energy: Optional[str] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "components", tuple(self.components))
+        if not self.components:
+            raise ValueError("A dietary index needs at least one component")
+        if self.energy is None and any(c.energy_adjusted for c in self.components):
+            raise ValueError("Energy-adjusted components need the index's energy column")
+
+    @classmethod
+    def from_dict(cls, spec: Mapping) -> "DietaryIndex":
+        """Build an index from a JSON/YAML-style mapping (see :meth:`to_dict`)."""
+        spec = dict(spec)
+        spec["components"] = [Component(**c) for c in spec.get("components", ())]
+        return cls(**spec)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "energy": self.energy,
+            "components": [{k: v for k, v in asdict(c).items() if v is not None}
+                           for c in self.components],
+        }
+
+    @property
+    def columns(self) -> list[str]:
+        """Every input column the index reads."""
+        cols = list(dict.fromkeys(c.column for c in self.components))
+        return cols + [self.energy] if self.energy and self.energy not in cols else cols
+
+    def _parameters(self) -> dict[str, np.ndarray]:
+        """Per-component constants as arrays that broadcast over participants."""
+        def values(attr, default):
+            return np.array([default if getattr(c, attr) is None else getattr(c, attr)
+                             for c in self.components], dtype=float)
+
+        standard = np.array([c.zero is not None for c in self.components])
+        kcal_per_g = values("kcal_per_g", np.nan)
+        energy_scale = np.where(
+            np.isnan(kcal_per_g),
+            values("per_energy", 0.0),                  # per N kcal
+            kcal_per_g * 100.0,                         # % of energy
+        )
+        return {
+            "zero": values("zero", 0.0),
+            "span": values("full", 1.0) - values("zero", 0.0),
+            "low": np.where(standard, 0.0, -np.inf),
+            "high": np.where(standard, 1.0, np.inf),
+            "cap": values("cap", np.inf),
+            "weight": values("weight", 1.0),
+            "adjusted": np.array([c.energy_adjusted for c in self.components]),
+            "energy_scale": energy_scale,
+        }
+
+    def points(self, data: Data) -> np.ndarray:
+        """``participants × components`` array of component points."""
+        p = self._parameters()
+        intake = _matrix(data, [c.column for c in self.components])
+        if p["adjusted"].any():
+            energy = np.asarray(data[self.energy], dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                per_kcal = p["energy_scale"] / energy[:, None]
+            intake = np.where(p["adjusted"], intake * per_kcal, intake)
+        intake = np.minimum(intake, p["cap"])
+        ratio = np.clip((intake - p["zero"]) / p["span"], p["low"], p["high"])
+        return ratio * p["weight"]
+
+    @profiled
+    def score(self, data: Data, *, components: bool = False) -> Union[pd.Series, pd.DataFrame]:
+        """Score every participant.
+
+        A missing intake (or energy) gives a missing score.
+
+        Args:
+            data: DataFrame (or mapping of column → array) with
+                :attr:`columns`.
+            components: Also return every component's points.
+
+        Returns:
+            Series named after the index, or a DataFrame of component
+            points followed by the total.
+        """
+        points = self.points(data)
+        total = points.sum(axis=1)
+        index = data.index if isinstance(data, pd.DataFrame) else None
+        if not components:
+            return pd.Series(total, index=index, name=self.name)
+        out = pd.DataFrame(points, index=index, columns=[c.label for c in self.components])
+        out[self.name] = total
+        return out
+
+
+def _matrix(data: Data, columns: list[str]) -> np.ndarray:
+    if isinstance(data, pd.DataFrame):
+        return data[columns].to_numpy(dtype=float, na_value=np.nan)
+    return np.column_stack([np.asarray(data[c], dtype=float) for c in columns])
+
+
+def score(data: Data, index: Union[DietaryIndex, Mapping], *,
+          components: bool = False) -> Union[pd.Series, pd.DataFrame]:
+    """Score ``data`` with an index or an index specification mapping.
+
+    Args:
+        data: Intakes, one row per participant.
+        index: A :class:`DietaryIndex` or a mapping for
+            :meth:`DietaryIndex.from_dict`.
+        components: Also return every component's points.
+
+    Returns:
+        Series of scores, or a DataFrame with component points and the total.
+    """
+    if not isinstance(index, DietaryIndex):
+        index = DietaryIndex.from_dict(index)
+    return index.score(data, components=components)
+
+
+# Notebook 10.9's index: 0.4 × sugar + 0.6 × SFA (g/day); lower is healthier.
+NUTRITIONAL_INDEX = DietaryIndex(
+    "Nutritional_Index",
+    [Component("Sugar_Intake", weight=0.4), Component("SFA_Intake", weight=0.6)],
+)
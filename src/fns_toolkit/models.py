@@ -0,0 +1,433 @@
+"""One model specification fitted across many subgroups, outcomes and variants.
+
+Notebook 10.2 reshapes the BMI follow-ups wide → long with ``pd.melt`` and
+fits one ``mixedlm``; production analyses fit the same specification for
+every outcome, ``Social_Class`` stratum and sensitivity subset, and redoing
+the reshape and the formula parsing for each fit costs more than the fits.
+:func:`fit_many`
+
+* reshapes once: :class:`ModelData` holds the long table (built column by
+  column, no ``melt``) and caches the patsy design matrices of every
+  formula it has seen, so subgroups are row selections of one design with
+  the same categorical coding;
+* places the designs, subgroup codes and subset masks in shared memory and
+  fits the ``variants × subsets × groups`` grid in a process pool;
+* returns one tidy frame of estimates, standard errors, intervals and fit
+  diagnostics.  A fit that fails becomes a row with its ``error`` and the
+  other fits carry on.
+
+Example:
+    >>> bmi = ModelData(df, long={"values": {"BMI": {"BMI_Baseline": 0, "BMI_Year2": 2,
+    ...                                              "BMI_Year4": 4, "BMI_Year6": 6}}})
+    >>> fit_many(bmi, ModelSpec("BMI ~ Time + Age + Sex", kind="mixedlm", groups="ID"),
+    ...          by="Social_Class")
+    >>> fit_many(df, "{outcome} ~ Age + Sex + Smoking",
+    ...          variants={"outcome": ["Sugar_Intake", "SFA_Intake"]},
+    ...          subsets={"non-smokers": "Smoking == 'Never'"})
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ._shared import SharedArray, attach
+from .profiling import profiled
+
+KINDS = ("ols", "logit", "mixedlm", "cox")
+_STATISTICS = ("estimate", "std_error", "statistic", "p_value", "ci_low", "ci_high")
+_DIAGNOSTICS = ("n_obs", "converged", "iterations", "log_likelihood", "warnings", "error")
+# Diagnostics of a fit that did not run.
+_FAILED = dict(n_obs=0, converged=False, iterations=np.nan, log_likelihood=np.nan,
+               warnings="", error="")
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """A model to fit.
+
+    Attributes:
+        formula: Patsy formula; ``{name}`` placeholders are filled from the
+            ``variants`` of :func:`fit_many`.  For ``"cox"`` the left-hand
+            side is ``duration + event`` and the intercept is dropped.
+        kind: ``"ols"``, ``"logit"``, ``"mixedlm"`` (random intercept per
+            ``groups``) or ``"cox"``.
+        groups: Cluster column of ``"mixedlm"`` (e.g. ``"ID"``).
+        name: Label in the results (default: ``kind``).
+    """
+
+    formula: str
+    kind: str = "ols"
+    groups: Optional[str] = None
+    name: Optional[str] = None
+
+    def __post_init__(self):
+        if self.kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}, not {self.kind!r}")
+        if (self.kind == "mixedlm") != (self.groups is not None):
+            raise ValueError("groups is required for, and only used by, kind='mixedlm'")
+
+    @classmethod
+    def from_dict(cls, spec: Mapping) -> "ModelSpec":
+        return cls(**spec)
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+    @property
+    def label(self) -> str:
+        return self.name or self.kind
+
+
+@dataclass(frozen=True)
+class LongFormat:
+    """Wide → long reshape of repeated measurements.
+
+    Attributes:
+        values: ``long column -> {wide column: time}``, e.g.
+            ``{"BMI": {"BMI_Baseline": 0, "BMI_Year2": 2}}``.  Times missing
+            from one measurement's mapping give ``NaN`` rows.
+        time: Name of the time column.
+    """
+
+    values: Mapping[str, Mapping[str, float]] = field(default_factory=dict)
+    time: str = "Time"
+
+    @classmethod
+    def from_dict(cls, spec: Mapping) -> "LongFormat":
+        return cls(**spec)
+
+    def to_dict(self) -> dict:
+        return {"values": {k: dict(v) for k, v in self.values.items()}, "time": self.time}
+
+    def apply(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Long table: the other columns repeated once per time, time-major."""
+        wide = [c for mapping in self.values.values() for c in mapping]
+        times = sorted({t for mapping in self.values.values() for t in mapping.values()})
+        n = len(data)
+        repeated = data.drop(columns=wide).reset_index(drop=True)
+        table = repeated.take(np.tile(np.arange(n), len(times))).reset_index(drop=True)
+        table[self.time] = np.repeat(np.asarray(times), n)
+        empty = np.full(n, np.nan)
+        for name, mapping in self.values.items():
+            column = {t: c for c, t in mapping.items()}
+            table[name] = np.concatenate([
+                data[column[t]].to_numpy(dtype=float, na_value=np.nan) if t in column else empty
+                for t in times
+            ])
+        return table
+
+
+@dataclass
+class _Design:
+    """Patsy design of one formula over the rows it can use."""
+
+    y: np.ndarray
+    X: np.ndarray
+    names: list
+    rows: np.ndarray
+    clusters: Optional[np.ndarray] = None
+
+
+class ModelData:
+    """Analysis table, reshaped once, with cached design matrices.
+
+    Reuse one instance across :func:`fit_many` calls to skip the reshape and
+    the formula parsing.
+
+    Args:
+        data: Wide analysis data.
+        long: A :class:`LongFormat` (or its ``to_dict`` mapping) to model
+            repeated measurements in long format.
+        cache_size: Design matrices kept.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        long: Optional[Union[LongFormat, Mapping]] = None,
+        *,
+        cache_size: int = 32,
+    ):
+        if isinstance(long, Mapping):
+            long = LongFormat.from_dict(long)
+        self.long = long
+        self.table = long.apply(data) if long is not None else data.reset_index(drop=True)
+        self.cache_size = cache_size
+        self._designs: "OrderedDict[tuple, _Design]" = OrderedDict()
+
+    def design(self, formula: str, kind: str = "ols", groups: Optional[str] = None) -> _Design:
+        """Response and design matrix of ``formula`` over its complete rows (cached)."""
+        key = (formula, kind, groups)
+        if key in self._designs:
+            self._designs.move_to_end(key)
+            return self._designs[key]
+        import patsy
+
+        y, X = patsy.dmatrices(formula, self.table, NA_action="drop", return_type="dataframe")
+        if kind == "cox" and "Intercept" in X:
+            X = X.drop(columns="Intercept")
+        rows = X.index.to_numpy(dtype=np.int64)
+        clusters = None
+        if groups is not None:
+            codes, _ = pd.factorize(self.table[groups].to_numpy()[rows])
+            keep = codes >= 0
+            y, X, rows, clusters = y[keep], X[keep], rows[keep], codes[keep].astype(np.int64)
+        design = _Design(np.asarray(y, dtype=np.float64), np.asarray(X, dtype=np.float64),
+                         list(X.columns), rows, clusters)
+        self._designs[key] = design
+        while len(self._designs) > self.cache_size:
+            self._designs.popitem(last=False)
+        return design
+
+
+# Per-process state of the pool workers, set once by ``_init_worker``.
+_WORKER: dict = {}
+
+
+def _init_worker(specs, meta):
+    shms, arrays = [], {}
+    for key, spec in specs.items():
+        shm, arrays[key] = attach(spec)
+        shms.append(shm)
+    _WORKER.update(shms=shms, arrays=arrays, meta=meta)
+
+
+def _ols(y: np.ndarray, X: pd.DataFrame, alpha: float):
+    """OLS as ``statsmodels`` computes it (pseudo-inverse, rank-based df), minus its result objects."""
+    from scipy import stats
+
+    n = len(y)
+    pinv = np.linalg.pinv(X.to_numpy())
+    beta = pinv @ y
+    resid = y - X.to_numpy() @ beta
+    dof = n - np.linalg.matrix_rank(X.to_numpy())
+    ssr = float(resid @ resid)
+    se = np.sqrt(np.diag(pinv @ pinv.T) * ssr / dof)
+    statistic = beta / se
+    crit = stats.t.ppf(1 - alpha / 2, dof)
+    terms = np.column_stack([beta, se, statistic, 2 * stats.t.sf(np.abs(statistic), dof),
+                             beta - crit * se, beta + crit * se])
+    llf = -n / 2 * (np.log(2 * np.pi * ssr / n) + 1)
+    return list(X.columns), terms, dict(n_obs=n, converged=True, iterations=0, log_likelihood=llf)
+
+
+def _fit(kind: str, y: np.ndarray, X: pd.DataFrame, clusters, alpha: float):
+    """Fit one model; returns ``(term names, terms × 6 statistics, diagnostics)``."""
+    if kind == "ols":
+        return _ols(y[:, 0], X, alpha)
+    if kind == "cox":
+        from .survival import cox_ph
+
+        frame = X.assign(_duration=y[:, 0], _event=y[:, 1])
+        res = cox_ph(frame, "_duration", "_event", covariates=list(X.columns), alpha=alpha)
+        # coef, se(coef), z, p, lower, upper
+        terms = res.summary.iloc[:, [0, 2, 5, 6, 3, 4]].to_numpy()
+        return list(res.summary.index), terms, dict(
+            n_obs=res.n, converged=res.converged, iterations=res.iterations,
+            log_likelihood=res.log_likelihood)
+
+    import statsmodels.api as sm
+
+    if kind == "logit":
+        res = sm.Logit(y[:, 0], X).fit(disp=0)
+        converged, iterations = res.mle_retvals["converged"], res.mle_retvals["iterations"]
+    else:
+        res = sm.MixedLM(y[:, 0], X, groups=clusters).fit()
+        converged, iterations = bool(res.converged), np.nan
+    ci = np.asarray(res.conf_int(alpha))
+    terms = np.column_stack([res.params, res.bse, res.tvalues, res.pvalues, ci[:, 0], ci[:, 1]])
+    return list(res.params.index), terms, dict(
+        n_obs=int(res.nobs), converged=converged, iterations=iterations,
+        log_likelihood=float(res.llf))
+
+
+def _fit_task(task_id, design, subset, group, alpha):
+    """Fit one cell of the grid from the shared arrays."""
+    arrays, meta = _WORKER["arrays"], _WORKER["meta"]
+    kind, names = meta[design]
+    rows = arrays[(design, "rows")]
+    selected = np.ones(len(rows), dtype=bool)
+    if group >= 0:
+        selected &= arrays["strata"][rows] == group
+    if subset >= 0:
+        selected &= arrays["subsets"][subset][rows]
+    X = arrays[(design, "X")][selected]
+    y = arrays[(design, "y")][selected]
+    clusters = arrays[(design, "clusters")][selected] if (design, "clusters") in arrays else None
+    # Within a subgroup, dummies of absent levels are all zero and those of
+    # the subgroup's own level (or any covariate it fixes) are constant.
+    names = np.asarray(names, dtype=object)
+    constant = np.all(X == X[:1], axis=0) & (names != "Intercept")
+    if "Intercept" not in names and kind != "cox":
+        constant &= ~np.any(X != 0, axis=0)
+    X = pd.DataFrame(X[:, ~constant], columns=list(names[~constant]))
+
+    diagnostics = dict(_FAILED, n_obs=int(selected.sum()))
+    terms, values = [None], np.full((1, len(_STATISTICS)), np.nan)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        if constant.any():
+            warnings.warn(f"dropped constant columns {list(names[constant])}")
+        try:
+            if not len(y):
+                raise ValueError("no complete rows")
+            terms, values, fitted = _fit(kind, y, X, clusters, alpha)
+            diagnostics.update(fitted)
+        except Exception as exc:  # keep going; the failure is reported in its row
+            diagnostics["error"] = f"{type(exc).__name__}: {exc}"
+    messages = dict.fromkeys(str(w.message).splitlines()[0] for w in caught)
+    diagnostics["warnings"] = "; ".join(messages)
+    if any(issubclass(w.category, _convergence_warnings()) for w in caught):
+        diagnostics["converged"] = False
+    return task_id, terms, values, diagnostics
+
+
+def _convergence_warnings() -> tuple:
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning
+
+    return (ConvergenceWarning,)
+
+
+def _release_worker() -> None:
+    _WORKER.pop("arrays", None)
+    for shm in _WORKER.pop("shms", []):
+        shm.close()
+    _WORKER.clear()
+
+
+@profiled
+def fit_many(
+    data: Union[ModelData, pd.DataFrame],
+    spec: Union[ModelSpec, str, Mapping],
+    *,
+    variants: Optional[Mapping[str, Sequence]] = None,
+    by: Optional[Union[str, Sequence[str]]] = None,
+    subsets: Optional[Mapping[str, str]] = None,
+    long: Optional[Union[LongFormat, Mapping]] = None,
+    alpha: float = 0.05,
+    n_jobs: Optional[int] = None,
+) -> pd.DataFrame:
+    """Fit one model specification over a grid of variants, subsets and subgroups.
+
+    Args:
+        data: A :class:`ModelData` (reshaped, with cached designs) or a wide
+            DataFrame (reshaped with ``long`` if given).
+        spec: A :class:`ModelSpec`, a formula (OLS) or a spec mapping.
+        variants: ``placeholder -> values`` filled into the formula; every
+            combination is fitted (e.g. ``{"outcome": ["BMI", "SBP"]}``).
+        by: Column(s) whose levels are fitted separately.
+        subsets: ``label -> DataFrame.query expression`` for sensitivity
+            analyses; each subset is fitted in addition to all rows.
+        long: Wide → long reshape when ``data`` is a DataFrame.
+        alpha: 1 − confidence level of the intervals.
+        n_jobs: Worker processes (default: ``os.cpu_count()``).
+
+    Returns:
+        DataFrame: One row per fitted term, with the ``model``, the variant
+        placeholders, ``subset`` and ``by`` columns, then ``term``,
+        ``estimate``, ``std_error``, ``statistic``, ``p_value``, ``ci_low``,
+        ``ci_high``, ``n_obs``, ``converged``, ``iterations``,
+        ``log_likelihood``, ``warnings`` and ``error``.  A failed fit is a
+        single row with ``term`` missing and its ``error`` set; a variant
+        whose formula cannot be built is one such row, with ``subset`` and
+        the ``by`` columns missing.
+    """
+    if isinstance(spec, str):
+        spec = ModelSpec(spec)
+    elif isinstance(spec, Mapping):
+        spec = ModelSpec.from_dict(spec)
+    if not isinstance(data, ModelData):
+        data = ModelData(data, long)
+    elif long is not None:
+        raise ValueError("Pass long= when building the ModelData, not to fit_many")
+    table = data.table
+    by = [by] if isinstance(by, str) else list(by or [])
+    variants = {k: list(v) for k, v in (variants or {}).items()}
+
+    combos = [dict(zip(variants, values)) for values in itertools.product(*variants.values())]
+    formulas = [spec.formula.format(**combo) for combo in combos]
+    # A formula that cannot be built (e.g. an outcome missing from the data)
+    # fails its own variants only.
+    designs, failed = {}, {}
+    for f in dict.fromkeys(formulas):
+        try:
+            designs[f] = data.design(f, spec.kind, spec.groups)
+        except Exception as exc:
+            failed[f] = f"{type(exc).__name__}: {exc}"
+    design_ids = {f: i for i, f in enumerate(designs)}
+
+    if by:
+        grouped = table.groupby(by, sort=True, dropna=True, observed=True)
+        strata = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        labels = list(grouped.size().index)
+        groups = list(range(len(labels)))
+    else:
+        strata, labels, groups = np.zeros(0, dtype=np.int64), [None], [-1]
+    subset_names = [None] + list(subsets or {})
+    masks = np.zeros((len(subset_names) - 1, len(table)), dtype=bool)
+    for i, expr in enumerate((subsets or {}).values()):
+        masks[i] = table.eval(expr).to_numpy(dtype=bool)
+
+    fitted_combos = [c for c, f in enumerate(formulas) if f in designs]
+    grid = list(itertools.product(fitted_combos, range(-1, len(subset_names) - 1), groups))
+    tasks = [(i, design_ids[formulas[c]], s, g, alpha) for i, (c, s, g) in enumerate(grid)]
+    n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, len(tasks)))
+
+    with ExitStack() as stack:
+        def share(array):
+            return stack.enter_context(SharedArray(array)).spec
+
+        specs = {"strata": share(strata), "subsets": share(masks)}
+        meta = {}
+        for f, design in designs.items():
+            d = design_ids[f]
+            specs[(d, "X")], specs[(d, "y")] = share(design.X), share(design.y)
+            specs[(d, "rows")] = share(design.rows)
+            if design.clusters is not None:
+                specs[(d, "clusters")] = share(design.clusters)
+            meta[d] = (spec.kind, design.names)
+        if n_jobs == 1:
+            _init_worker(specs, meta)
+            try:
+                done = [_fit_task(*task) for task in tasks]
+            finally:
+                _release_worker()
+        else:
+            with ProcessPoolExecutor(n_jobs, initializer=_init_worker,
+                                     initargs=(specs, meta)) as pool:
+                chunksize = max(1, len(tasks) // (4 * n_jobs))
+                done = list(pool.map(_fit_task, *zip(*tasks), chunksize=chunksize))
+
+    cells = [(*grid[task_id], terms, values, fitted) for task_id, terms, values, fitted in done]
+    for c, f in enumerate(formulas):
+        if f in failed:
+            cells.append((c, -1, None, [None], np.full((1, len(_STATISTICS)), np.nan),
+                          dict(_FAILED, error=failed[f])))
+    columns: dict[str, list] = {name: [] for name in ["model", *variants, "subset", *by, "term"]}
+    blocks, diagnostics = [], {name: [] for name in _DIAGNOSTICS}
+    for c, s, g, terms, values, fitted in cells:
+        keys = {"model": spec.label, **combos[c], "subset": subset_names[s + 1]}
+        if by:
+            keys.update(zip(by, labels[g] if len(by) > 1 else (labels[g],))
+                        if g is not None else dict.fromkeys(by))
+        for name, value in keys.items():
+            columns[name] += [value] * len(terms)
+        columns["term"] += terms
+        blocks.append(values)
+        for name in _DIAGNOSTICS:
+            diagnostics[name] += [fitted[name]] * len(terms)
+    table = pd.DataFrame(columns)
+    table[list(_STATISTICS)] = np.vstack(blocks)
+    for name, values in diagnostics.items():
+        table[name] = values
+    return table
@@ -0,0 +1,341 @@
+"""Out-of-core PCA with Hotelling's T² and SPE (Q-residual) outlier limits.
+
+Notebook 10.4 standardises the whole metabolite matrix in memory, fits a
+two-component PCA and loops over samples to compute Hotelling's T².  For
+100k+ samples × 10k features that matrix no longer fits in memory, and a new
+plate of samples should be checked against the *existing* model instead of
+refitting.
+
+:class:`StreamingPCA` works on any row-sliceable matrix – typically a
+``float32`` ``.npy`` file opened with ``np.load(..., mmap_mode="r")`` (see
+:func:`to_memmap`) – and only ever holds ``chunk_size`` rows:
+
+1. one pass for the per-feature means and standard deviations (merged
+   chunk by chunk in float64);
+2. the components, either by randomised SVD (a few passes, each a pair of
+   matrix products per chunk) or with scikit-learn's ``IncrementalPCA``;
+3. one pass over the training data to calibrate the T² and SPE limits.
+
+:meth:`StreamingPCA.score` then scores a whole new batch in a few matrix
+products.  T² needs no matrix inverse: the score covariance is diagonal (the
+eigenvalues), and tiny eigenvalues are floored as the notebook's ridge term
+did.
+
+Example:
+    >>> X = to_memmap("metabolomics.csv", "metabolomics.npy", columns=metabolites)
+    >>> pca = StreamingPCA(n_components=5).fit(X)
+    >>> pca.score(new_plate)[["t2", "spe", "outlier"]]
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# Working memory per chunk when chunk_size is not given.
+_CHUNK_BYTES = 256 << 20
+# Eigenvalues below this fraction of the largest are floored (ridge).
+_EIG_FLOOR = 1e-10
+
+
+@profiled
+def to_memmap(
+    source: Union[PathLike, pd.DataFrame],
+    path: PathLike,
+    *,
+    columns: Optional[Sequence[str]] = None,
+    dtype=np.float32,
+    chunksize: int = 50_000,
+) -> np.memmap:
+    """Copy a CSV (read in chunks) or DataFrame into a ``.npy`` file.
+
+    Args:
+        source: CSV file or DataFrame.
+        path: Output ``.npy`` file.
+        columns: Columns to keep (default: all numeric columns).
+        dtype: Stored dtype.
+        chunksize: CSV rows per chunk.
+
+    Returns:
+        np.memmap: The new file opened read-only.
+    """
+    if isinstance(source, pd.DataFrame):
+        cols = list(columns) if columns is not None else list(source.select_dtypes("number").columns)
+        n_rows, chunks = len(source), [source[cols]]
+    else:
+        head = pd.read_csv(source, nrows=100)
+        cols = list(columns) if columns is not None else list(head.select_dtypes("number").columns)
+        with open(source, "rb") as f:
+            n_rows = sum(1 for _ in f) - 1
+        chunks = pd.read_csv(source, usecols=cols, chunksize=chunksize)
+
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(n_rows, len(cols)))
+    row = 0
+    for chunk in chunks:
+        out[row:row + len(chunk)] = chunk[cols].to_numpy(dtype=dtype, na_value=np.nan)
+        row += len(chunk)
+    out.flush()
+    del out
+    return np.load(path, mmap_mode="r")
+
+
+class StreamingPCA:
+    """Standardise-and-PCA fitted chunk by chunk, with T²/SPE outlier scoring.
+
+    Args:
+        n_components: Number of principal components.
+        method: ``"randomized"`` (randomised SVD) or ``"incremental"``
+            (``sklearn.decomposition.IncrementalPCA``, one pass but less
+            accurate when the leading eigenvalues are close together).
+        standardize: Scale features to unit variance (as ``StandardScaler``).
+        chunk_size: Rows per chunk (default: ~256 MB of working memory).
+        n_oversamples: Extra random directions for the randomised SVD.
+        n_iter: Power iterations for the randomised SVD.
+        seed: Seed of the random projection.
+        dtype: Working dtype of the chunks.
+    """
+
+    def __init__(
+        self,
+        n_components: int = 2,
+        *,
+        method: str = "randomized",
+        standardize: bool = True,
+        chunk_size: Optional[int] = None,
+        n_oversamples: int = 10,
+        n_iter: int = 4,
+        seed: Optional[int] = None,
+        dtype=np.float32,
+    ):
+        if method not in ("randomized", "incremental"):
+            raise ValueError("method must be 'randomized' or 'incremental'")
+        self.n_components = n_components
+        self.method = method
+        self.standardize = standardize
+        self.chunk_size = chunk_size
+        self.n_oversamples = n_oversamples
+        self.n_iter = n_iter
+        self.seed = seed
+        self.dtype = np.dtype(dtype)
+
+    # -- chunking ------------------------------------------------------------
+
+    def _chunks(self, n_rows: int, n_cols: int) -> list[slice]:
+        size = self.chunk_size or max(1, _CHUNK_BYTES // max(n_cols * 4 * self.dtype.itemsize, 1))
+        size = max(size, self.n_components + self.n_oversamples)
+        bounds = list(range(0, n_rows, size)) + [n_rows]
+        # Fold a short tail into the previous chunk (IncrementalPCA needs
+        # at least n_components rows per batch).
+        if len(bounds) > 2 and bounds[-1] - bounds[-2] < self.n_components:
+            del bounds[-2]
+        return [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def _standardized(self, X, rows: slice) -> np.ndarray:
+        """Rows of ``X`` centred and scaled; missing values become 0 (the mean)."""
+        block = np.asarray(X[rows], dtype=self.dtype)
+        block = (block - self.mean_.astype(self.dtype)) / self.scale_.astype(self.dtype)
+        return np.nan_to_num(block, copy=False, nan=0.0)
+
+    # -- fitting -------------------------------------------------------------
+
+    @profiled
+    def fit(self, X, alpha: float = 0.05) -> "StreamingPCA":
+        """Fit means, scales and components, then calibrate the outlier limits.
+
+        Args:
+            X: ``n × p`` matrix; a memory-mapped array is read chunk by chunk.
+                A DataFrame's numeric columns are used.
+            alpha: Significance level of the T² and SPE limits.
+
+        Returns:
+            StreamingPCA: ``self``.
+        """
+        X = self._matrix(X, fitting=True)
+        n, p = X.shape
+        if self.n_components > min(n, p):
+            raise ValueError(f"n_components={self.n_components} exceeds min(n, p)={min(n, p)}")
+        chunks = self._chunks(n, p)
+
+        # Pass 1: per-feature count, mean and M2, merged chunk by chunk.
+        count = np.zeros(p)
+        mean = np.zeros(p)
+        m2 = np.zeros(p)
+        for rows in chunks:
+            block = np.asarray(X[rows], dtype=np.float64)
+            nb = np.sum(~np.isnan(block), axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mb = np.where(nb > 0, np.nansum(block, axis=0) / nb, 0.0)
+            m2b = np.nansum((block - mb) ** 2, axis=0)
+            total = count + nb
+            with np.errstate(invalid="ignore", divide="ignore"):
+                delta = mb - mean
+                mean = np.where(total > 0, mean + delta * nb / total, 0.0)
+                m2 = m2 + m2b + np.where(total > 0, delta ** 2 * count * nb / total, 0.0)
+            count = total
+        self.n_samples_ = n
+        self.mean_ = mean
+        var = m2 / np.maximum(count - 1, 1)
+        # Population SD, as StandardScaler uses.
+        scale = np.sqrt(m2 / np.maximum(count, 1)) if self.standardize else np.ones(p)
+        self.scale_ = np.where(scale > 0, scale, 1.0)
+        self.total_variance_ = float(np.sum(var / self.scale_ ** 2))
+
+        # Pass 2: components.
+        if self.method == "randomized":
+            self._fit_randomized(X, chunks)
+        else:
+            self._fit_incremental(X, chunks)
+        lam = self.explained_variance_
+        self.explained_variance_ratio_ = lam / self.total_variance_
+        self._eig = np.maximum(lam, _EIG_FLOOR * lam.max())
+
+        # Pass 3: training T² and SPE for the control limits.
+        self.calibrate(X, alpha=alpha)
+        return self
+
+    def _fit_randomized(self, X, chunks) -> None:
+        n, p = X.shape
+        k = self.n_components + self.n_oversamples
+        rng = np.random.default_rng(self.seed)
+        omega = rng.standard_normal((p, min(k, p))).astype(self.dtype)
+
+        def times(right):
+            """``Z @ right`` for the standardised Z, chunk by chunk."""
+            return np.vstack([self._standardized(X, rows) @ right for rows in chunks])
+
+        def t_times(left):
+            """``Z.T @ left``, chunk by chunk."""
+            out = np.zeros((p, left.shape[1]), dtype=np.float64)
+            for rows in chunks:
+                out += self._standardized(X, rows).T @ left[rows]
+            return out.astype(self.dtype)
+
+        q, _ = np.linalg.qr(times(omega))
+        for _ in range(self.n_iter):
+            w, _ = np.linalg.qr(t_times(q))
+            q, _ = np.linalg.qr(times(w))
+        b = t_times(q).T                        # B = Qᵀ Z, shape (k, p)
+        _, s, vt = np.linalg.svd(b.astype(np.float64), full_matrices=False)
+        self.components_ = vt[:self.n_components]
+        self.explained_variance_ = s[:self.n_components] ** 2 / (n - 1)
+
+    def _fit_incremental(self, X, chunks) -> None:
+        from sklearn.decomposition import IncrementalPCA
+
+        ipca = IncrementalPCA(n_components=self.n_components)
+        for rows in chunks:
+            ipca.partial_fit(self._standardized(X, rows))
+        # Z is centred already; fold IncrementalPCA's (≈ 0) mean into ours.
+        self.mean_ = self.mean_ + ipca.mean_ * self.scale_
+        self.components_ = ipca.components_
+        self.explained_variance_ = ipca.explained_variance_
+
+    def calibrate(self, X, alpha: float = 0.05) -> "StreamingPCA":
+        """Set the T² and SPE limits from reference data (usually the training set).
+
+        T²'s limit is the F-based limit for a new observation; SPE's is Box's
+        ``g·χ²(h)`` approximation matched to the mean and variance of the
+        reference SPE values.
+        """
+        X = self._matrix(X)
+        n, k = self.n_samples_, self.n_components
+        t2, spe = self._t2_spe(X)
+        self.alpha_ = alpha
+        self.t2_limit_ = float(
+            k * (n - 1) * (n + 1) / (n * (n - k)) * stats.f.ppf(1 - alpha, k, n - k)
+        )
+        m, v = float(np.mean(spe)), float(np.var(spe))
+        g, h = (v / (2 * m), 2 * m * m / v) if v > 0 else (1.0, max(m, 1e-12))
+        self.spe_limit_ = float(g * stats.chi2.ppf(1 - alpha, h))
+        return self
+
+    # -- using the model -----------------------------------------------------
+
+    def _matrix(self, X, fitting: bool = False):
+        if isinstance(X, pd.DataFrame):
+            if fitting:
+                self.feature_names_ = list(X.select_dtypes("number").columns)
+            names = getattr(self, "feature_names_", None) or list(X.select_dtypes("number").columns)
+            return X[names].to_numpy(dtype=self.dtype, na_value=np.nan)
+        if fitting:
+            self.feature_names_ = None
+        X = X if isinstance(X, np.ndarray) else np.asarray(X)
+        return X[:, None] if X.ndim == 1 else X
+
+    @profiled
+    def transform(self, X) -> np.ndarray:
+        """Principal-component scores of new rows."""
+        X = self._matrix(X)
+        comps = self.components_.T.astype(self.dtype)
+        return np.vstack([self._standardized(X, rows) @ comps
+                          for rows in self._chunks(*X.shape)]).astype(np.float64)
+
+    def _t2_spe(self, X) -> tuple[np.ndarray, np.ndarray]:
+        comps = self.components_.astype(self.dtype)
+        t2, spe = [], []
+        for rows in self._chunks(*X.shape):
+            z = self._standardized(X, rows)
+            scores = z @ comps.T
+            resid = z - scores @ comps
+            t2.append(np.sum(scores.astype(np.float64) ** 2 / self._eig, axis=1))
+            spe.append(np.einsum("ij,ij->i", resid, resid, dtype=np.float64))
+        return np.concatenate(t2), np.concatenate(spe)
+
+    @profiled
+    def score(self, X, index=None) -> pd.DataFrame:
+        """Hotelling's T² and SPE of a new batch against the fitted model.
+
+        Args:
+            X: ``m × p`` matrix (or DataFrame with the training columns).
+            index: Row labels of the result (default: ``X.index`` for a
+                DataFrame).
+
+        Returns:
+            DataFrame: ``t2``, ``spe``, ``t2_outlier``, ``spe_outlier`` and
+            ``outlier`` (either limit exceeded) per row.
+        """
+        if index is None and isinstance(X, pd.DataFrame):
+            index = X.index
+        t2, spe = self._t2_spe(self._matrix(X))
+        return pd.DataFrame({
+            "t2": t2,
+            "spe": spe,
+            "t2_outlier": t2 > self.t2_limit_,
+            "spe_outlier": spe > self.spe_limit_,
+            "outlier": (t2 > self.t2_limit_) | (spe > self.spe_limit_),
+        }, index=index)
+
+    # -- persistence ---------------------------------------------------------
+
+    _STATE = ("n_samples_", "mean_", "scale_", "components_", "explained_variance_",
+              "explained_variance_ratio_", "total_variance_", "_eig", "alpha_",
+              "t2_limit_", "spe_limit_")
+
+    def save(self, path: PathLike) -> None:
+        """Write the fitted model to an ``.npz`` file."""
+        arrays = {name.strip("_"): np.asarray(getattr(self, name)) for name in self._STATE}
+        names = getattr(self, "feature_names_", None)
+        np.savez(path, n_components=self.n_components, standardize=self.standardize,
+                 dtype=self.dtype.str, feature_names=np.asarray(names or [], dtype=str), **arrays)
+
+    @classmethod
+    def load(cls, path: PathLike) -> "StreamingPCA":
+        """Read a model written by :meth:`save`."""
+        with np.load(Path(path)) as data:
+            model = cls(int(data["n_components"]), standardize=bool(data["standardize"]),
+                        dtype=str(data["dtype"]))
+            for name in cls._STATE:
+                value = data[name.strip("_")]
+                setattr(model, name, value.item() if value.ndim == 0 else value)
+            names = [str(x) for x in data["feature_names"]]
+            model.feature_names_ = names or None
+        return model
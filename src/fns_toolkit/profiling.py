@@ -0,0 +1,407 @@
+"""Opt-in timing and memory records of toolkit calls.
+
+The public functions of the toolkit are wrapped with :func:`profiled`, and
+any block of user code can be wrapped with :class:`span`.  Profiling is off
+by default; a wrapped call then costs one extra function call and a flag
+check.  Switch it on with the environment variable::
+
+    FNS_TOOLKIT_PROFILE=1      # time, CPU time, input shapes, tracemalloc peak
+    FNS_TOOLKIT_PROFILE=time   # the same without tracemalloc (much cheaper)
+
+or with :func:`enable`.  Every finished call appends one record – name,
+start, wall time, process CPU time, the shapes of array/DataFrame
+arguments, the ``tracemalloc`` peak above the allocation level at entry,
+process and thread id – to a fixed-size ring buffer, so a long job keeps
+only the most recent ``FNS_TOOLKIT_PROFILE_SIZE`` records (default
+100,000).
+
+The ring buffer is a memory-mapped file whose path is passed on to child
+processes through ``FNS_TOOLKIT_PROFILE_BUFFER``.  Worker processes of the
+toolkit's process pools (forked or spawned) therefore write into the same
+buffer as the parent.  Each append holds a thread lock and, on POSIX, a
+``lockf`` lock on the file.  Memory peaks come from the one process-wide
+``tracemalloc`` tracer, so concurrent threads see each other's
+allocations.
+
+Records can be read as a DataFrame, summarised per function, or exported
+as JSON or as a Chrome trace that https://ui.perfetto.dev opens directly.
+
+Example:
+    >>> from fns_toolkit import profiling
+    >>> profiling.enable()
+    >>> with profiling.span("load"):
+    ...     df = get_dataset("epidemiological_study")
+    >>> res = anova(df, "Physical_Activity")
+    >>> profiling.summary()
+    >>> profiling.export_chrome_trace("trace.json")
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: thread-safe only
+    fcntl = None
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+ENV_FLAG = "FNS_TOOLKIT_PROFILE"
+ENV_BUFFER = "FNS_TOOLKIT_PROFILE_BUFFER"
+ENV_SIZE = "FNS_TOOLKIT_PROFILE_SIZE"
+DEFAULT_CAPACITY = 100_000
+
+# NumPy is imported only once profiling is used, to keep imports light.
+_RECORD_FIELDS = [
+    ("start_us", "f8"),         # wall-clock start, µs since the epoch
+    ("wall_us", "f8"),
+    ("cpu_us", "f8"),
+    ("peak_bytes", "i8"),       # -1 without tracemalloc
+    ("pid", "i4"),
+    ("tid", "i8"),              # native thread id
+    ("depth", "i2"),
+    ("name", "S80"),
+    ("shapes", "S80"),
+]
+_HEADER_FIELDS = [("count", "i8"), ("capacity", "i8")]
+
+_enabled = False
+_memory = False
+_started_tracemalloc = False
+_buffer: Optional["_RingBuffer"] = None
+_setup_lock = threading.Lock()
+_local = threading.local()
+
+
+# ---------------------------------------------------------------------------
+# Ring buffer
+# ---------------------------------------------------------------------------
+
+class _RingBuffer:
+    """Fixed-size array of records in a memory-mapped file, shared by processes."""
+
+    def __init__(self, path: Path, capacity: Optional[int] = None):
+        import numpy as np
+
+        header, record = np.dtype(_HEADER_FIELDS), np.dtype(_RECORD_FIELDS)
+        created = capacity is not None
+        if created:
+            with open(path, "wb") as f:
+                f.truncate(header.itemsize + capacity * record.itemsize)
+        self.path = path
+        self._file = open(path, "r+b")
+        self.header = np.memmap(self._file, dtype=header, mode="r+", shape=())
+        if created:
+            self.header["capacity"] = capacity
+        self.capacity = int(self.header["capacity"])
+        self.records = np.memmap(self._file, dtype=record, mode="r+",
+                                 offset=header.itemsize, shape=(self.capacity,))
+        self._owner = os.getpid() if created else None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "_RingBuffer":
+        self._lock.acquire()
+        if fcntl is not None:
+            fcntl.lockf(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if fcntl is not None:
+            fcntl.lockf(self._file, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def append(self, record: tuple) -> None:
+        with self:
+            i = int(self.header["count"])
+            self.records[i % self.capacity] = record
+            self.header["count"] = i + 1
+
+    def read(self) -> "np.ndarray":
+        """Stored records, oldest first."""
+        import numpy as np
+
+        with self:
+            n = int(self.header["count"])
+            if n <= self.capacity:
+                return np.array(self.records[:n])
+            return np.roll(np.array(self.records), -(n % self.capacity))
+
+    def clear(self) -> None:
+        with self:
+            self.header["count"] = 0
+
+    def close(self) -> None:
+        self.records = self.header = None
+        self._file.close()
+        if self._owner == os.getpid():
+            Path(self.path).unlink(missing_ok=True)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+
+def _existing_buffer() -> Optional[_RingBuffer]:
+    """The buffer of this process or its parent, without creating one."""
+    return _open_buffer() if _buffer is not None or os.environ.get(ENV_BUFFER) else None
+
+
+def _open_buffer() -> _RingBuffer:
+    global _buffer
+    with _setup_lock:
+        if _buffer is None:
+            path = os.environ.get(ENV_BUFFER)
+            if path and Path(path).is_file():
+                _buffer = _RingBuffer(Path(path))
+            else:
+                capacity = int(os.environ.get(ENV_SIZE, DEFAULT_CAPACITY))
+                shm = Path("/dev/shm")
+                fd, path = tempfile.mkstemp(prefix="fns-profile-", suffix=".buf",
+                                            dir=shm if shm.is_dir() else None)
+                os.close(fd)
+                _buffer = _RingBuffer(Path(path), capacity)
+                os.environ[ENV_BUFFER] = path
+                atexit.register(_buffer.close)
+        return _buffer
+
+
+def _after_fork_in_child() -> None:
+    global _setup_lock
+    _setup_lock = threading.Lock()
+    _local.__dict__.clear()
+    if _buffer is not None:
+        _buffer._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+# ---------------------------------------------------------------------------
+# Switching on and off
+# ---------------------------------------------------------------------------
+
+def enable(*, memory: bool = True, capacity: Optional[int] = None) -> None:
+    """Start recording calls in this process and in processes it starts.
+
+    Args:
+        memory: Also record ``tracemalloc`` peaks (slows allocation-heavy
+            code noticeably).
+        capacity: Records kept in the ring buffer (only when it is created).
+    """
+    global _enabled, _memory, _started_tracemalloc
+    if capacity is not None:
+        os.environ[ENV_SIZE] = str(int(capacity))
+    _open_buffer()
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+    os.environ[ENV_FLAG] = "1" if memory else "time"
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording; the records made so far are kept."""
+    global _enabled, _started_tracemalloc
+    _enabled = False
+    os.environ.pop(ENV_FLAG, None)
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Discard every record."""
+    buffer = _existing_buffer()
+    if buffer is not None:
+        buffer.clear()
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+def _shapes(args: tuple, kwargs: dict) -> str:
+    shapes = [str(tuple(a.shape)) for a in (*args, *kwargs.values())
+              if isinstance(getattr(a, "shape", None), tuple)]
+    return ",".join(shapes)
+
+
+class span:
+    """Record the enclosed block as one call named ``name``.
+
+    Args:
+        name: Label of the block in the records.
+        shapes: Optional description of the input sizes.
+    """
+
+    __slots__ = ("name", "shapes", "_on", "_start", "_t0", "_c0", "_base", "peak")
+
+    def __init__(self, name: str, shapes: str = ""):
+        self.name = name
+        self.shapes = shapes
+
+    def __enter__(self) -> "span":
+        self._on = _enabled
+        if not self._on:
+            return self
+        stack = _local.__dict__.setdefault("stack", [])
+        if _memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # The parent keeps the peak reached before this block …
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self._base = self.peak = current
+        else:
+            self._base = None
+        stack.append(self)
+        self._start = time.time_ns()
+        self._c0 = time.process_time_ns()
+        self._t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if not self._on:
+            return
+        wall = time.perf_counter_ns() - self._t0
+        cpu = time.process_time_ns() - self._c0
+        stack = _local.stack
+        stack.pop()
+        peak_bytes = -1
+        if self._base is not None and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self.peak)
+            peak_bytes = peak - self._base
+            if stack:
+                # … and everything this block reached.
+                stack[-1].peak = max(stack[-1].peak, peak)
+        _open_buffer().append((
+            self._start / 1e3, wall / 1e3, cpu / 1e3, peak_bytes,
+            os.getpid(), threading.get_native_id(), len(stack),
+            self.name.encode()[:80], self.shapes.encode()[:80],
+        ))
+
+
+def _label(func: Callable) -> str:
+    module = func.__module__ or ""
+    module = module[len("fns_toolkit."):] if module.startswith("fns_toolkit.") else module
+    return f"{module}.{func.__qualname__}" if module else func.__qualname__
+
+
+def profiled(func: Optional[Callable] = None, *, name: Optional[str] = None):
+    """Decorator recording every call of ``func`` while profiling is enabled.
+
+    Use as ``@profiled`` or ``@profiled(name="...")``.
+    """
+    if func is None:
+        return functools.partial(profiled, name=name)
+    label = name or _label(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with span(label, _shapes(args, kwargs)):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+# ---------------------------------------------------------------------------
+# Reading and exporting
+# ---------------------------------------------------------------------------
+
+def records():
+    """Every stored record, oldest first, as a DataFrame."""
+    import numpy as np
+    import pandas as pd
+
+    buffer = _existing_buffer()
+    rows = buffer.read() if buffer is not None else np.empty(0, dtype=_RECORD_FIELDS)
+    df = pd.DataFrame({
+        "name": [n.decode() for n in rows["name"]],
+        "start_us": rows["start_us"],
+        "wall_s": rows["wall_us"] / 1e6,
+        "cpu_s": rows["cpu_us"] / 1e6,
+        "peak_bytes": rows["peak_bytes"],
+        "shapes": [s.decode() for s in rows["shapes"]],
+        "pid": rows["pid"],
+        "tid": rows["tid"],
+        "depth": rows["depth"],
+    })
+    df["peak_bytes"] = df["peak_bytes"].where(df["peak_bytes"] >= 0).astype("Int64")
+    return df.sort_values("start_us", kind="stable", ignore_index=True)
+
+
+def summary():
+    """Calls, total and mean wall time, CPU time and largest peak per name."""
+    df = records()
+    out = df.groupby("name").agg(
+        calls=("wall_s", "size"),
+        wall_s=("wall_s", "sum"),
+        mean_wall_s=("wall_s", "mean"),
+        cpu_s=("cpu_s", "sum"),
+        max_peak_bytes=("peak_bytes", "max"),
+    )
+    return out.sort_values("wall_s", ascending=False)
+
+
+def export_json(path: PathLike) -> Path:
+    """Write the records and the per-name summary as JSON."""
+    df = records()
+    data = {
+        "records": json.loads(df.to_json(orient="records")),
+        "summary": json.loads(summary().reset_index().to_json(orient="records")),
+    }
+    path = Path(path)
+    path.write_text(json.dumps(data, indent=2))
+    return path
+
+
+def export_chrome_trace(path: PathLike) -> Path:
+    """Write the records in Chrome's trace-event format (for Perfetto).
+
+    Every call is a complete (``"X"``) event on its process and thread;
+    nested calls appear stacked.
+    """
+    import pandas as pd
+
+    df = records()
+    events = [
+        {
+            "name": row.name,
+            "cat": row.name.split(".")[0],
+            "ph": "X",
+            "ts": row.start_us,
+            "dur": row.wall_s * 1e6,
+            "pid": int(row.pid),
+            "tid": int(row.tid),
+            "args": {
+                "cpu_ms": round(row.cpu_s * 1e3, 3),
+                "peak_bytes": None if pd.isna(row.peak_bytes) else int(row.peak_bytes),
+                "shapes": row.shapes,
+            },
+        }
+        for row in df.astype({"peak_bytes": object}).itertuples(index=False)
+    ]
+    path = Path(path)
+    path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+    return path
+
+
+if os.environ.get(ENV_FLAG, "").strip().lower() not in ("", "0", "false", "off", "no"):
+    enable(memory=os.environ[ENV_FLAG].strip().lower() != "time")
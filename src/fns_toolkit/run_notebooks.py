@@ -0,0 +1,313 @@
+"""Execute the course notebooks in parallel, skipping the ones that have not changed.
+
+The site build renders ~50 notebooks, and executing them one after another
+(the ``10_mini_projects`` ones take minutes) dominates the build.  This
+runner
+
+* executes notebooks concurrently, one Jupyter kernel per worker process,
+  through ``nbclient``, and writes the outputs back into the ``.ipynb``
+  files that Quarto renders;
+* skips a notebook when the hash of its code cells, of every file under its
+  folder's ``data/`` directory and of the installed package versions equals
+  the hash recorded after its last successful run;
+* writes a JSON report with the wall time and peak resident memory of the
+  kernel for every cell, so the hot spots are easy to find.
+
+Peak memory per cell uses Linux's ``VmHWM`` (reset before each cell through
+``/proc/<pid>/clear_refs``); elsewhere it falls back to the kernel's RSS
+after the cell.
+
+Example:
+    $ fns-run-notebooks notebooks -j 4 --report notebook_report.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as _dt
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from importlib import metadata
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+from .datasets import file_sha256
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+STATE_FILE = ".notebook_state.json"
+DEFAULT_TIMEOUT = 1800
+_ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def find_notebooks(paths: Sequence[PathLike]) -> list[Path]:
+    """Notebooks given directly or found below the given directories."""
+    found = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found += [p for p in sorted(path.rglob("*.ipynb")) if ".ipynb_checkpoints" not in p.parts]
+        else:
+            found.append(path)
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Fingerprints
+# ---------------------------------------------------------------------------
+
+def environment_fingerprint() -> str:
+    """Hash of the Python version and every installed distribution's version."""
+    dists = sorted(
+        f"{d.metadata['Name']}=={d.version}" for d in metadata.distributions() if d.metadata["Name"]
+    )
+    return hashlib.sha256("\n".join([sys.version] + dists).encode()).hexdigest()
+
+
+def _data_hashes(folder: Path, known: dict) -> list[str]:
+    """``path:sha256`` of every data file; unchanged files reuse ``known``."""
+    out = []
+    for path in sorted(p for p in (folder / "data").rglob("*") if p.is_file()):
+        st = path.stat()
+        key = str(path.resolve())
+        entry = known.get(key)
+        if not entry or entry[:2] != [st.st_size, st.st_mtime_ns]:
+            entry = known[key] = [st.st_size, st.st_mtime_ns, file_sha256(path)]
+        out.append(f"{path.relative_to(folder)}:{entry[2]}")
+    return out
+
+
+def notebook_fingerprint(path: Path, env: str, known_files: dict) -> str:
+    """Hash of a notebook's code cells, its ``data/`` files and ``env``."""
+    nb = json.loads(path.read_text(encoding="utf-8"))
+    h = hashlib.sha256(env.encode())
+    h.update(json.dumps(nb.get("metadata", {}).get("kernelspec", {}), sort_keys=True).encode())
+    for cell in nb.get("cells", []):
+        if cell.get("cell_type") == "code":
+            source = cell.get("source", "")
+            h.update(("".join(source) if isinstance(source, list) else source).encode())
+            h.update(b"\x00")
+    for line in _data_hashes(path.parent, known_files):
+        h.update(line.encode())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Execution (in worker processes)
+# ---------------------------------------------------------------------------
+
+def _kernel_pid(client) -> Optional[int]:
+    km = getattr(client, "km", None)
+    provisioner = getattr(km, "provisioner", None)
+    pid = getattr(provisioner, "pid", None)
+    if pid is None:
+        pid = getattr(getattr(km, "kernel", None), "pid", None)
+    return pid
+
+
+def _reset_peak(pid: Optional[int]) -> None:
+    try:
+        Path(f"/proc/{pid}/clear_refs").write_text("5")
+    except (OSError, TypeError):
+        pass
+
+
+def _peak_rss(pid: Optional[int]) -> Optional[int]:
+    """Peak RSS in bytes since the last reset (current RSS off Linux)."""
+    if pid is None:
+        return None
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+
+def execute_notebook(path: PathLike, *, timeout: int = DEFAULT_TIMEOUT, kernel_name: Optional[str] = None,
+                     save: bool = True, allow_errors: bool = False) -> dict:
+    """Run one notebook in its own folder and time every cell.
+
+    Args:
+        path: Notebook to execute.
+        timeout: Seconds allowed per cell.
+        kernel_name: Kernel to use (default: the notebook's own).
+        save: Write the executed notebook back to ``path``.
+        allow_errors: Keep going after a failing cell.
+
+    Returns:
+        dict: ``status``, total ``wall_s``, ``peak_rss`` and per-cell records.
+    """
+    import nbformat
+    from nbclient import NotebookClient
+
+    path = Path(path)
+    nb = nbformat.read(path, as_version=4)
+    cells = []
+    started = {}
+
+    def on_execute(cell, cell_index, **_):
+        _reset_peak(_kernel_pid(client))
+        started[cell_index] = time.perf_counter()
+
+    def on_executed(cell, cell_index, **_):
+        source = cell.source.strip().splitlines()
+        cells.append({
+            "index": cell_index,
+            "wall_s": round(time.perf_counter() - started.pop(cell_index, time.perf_counter()), 4),
+            "peak_rss": _peak_rss(_kernel_pid(client)),
+            "first_line": source[0][:80] if source else "",
+        })
+
+    kwargs = {"kernel_name": kernel_name} if kernel_name else {}
+    client = NotebookClient(
+        nb, timeout=timeout, allow_errors=allow_errors,
+        resources={"metadata": {"path": str(path.parent)}},
+        on_cell_execute=on_execute, on_cell_executed=on_executed, **kwargs,
+    )
+    t0 = time.perf_counter()
+    status, error = "executed", None
+    try:
+        client.execute()
+    except Exception as exc:  # CellExecutionError, timeouts, dead kernels …
+        lines = _ANSI.sub("", str(exc)).strip().splitlines()
+        status, error = "failed", f"{type(exc).__name__}: {lines[-1] if lines else ''}"
+    wall = time.perf_counter() - t0
+    if save and status == "executed":
+        nbformat.write(nb, path)
+    peaks = [c["peak_rss"] for c in cells if c["peak_rss"] is not None]
+    return {
+        "status": status,
+        "error": error,
+        "wall_s": round(wall, 3),
+        "peak_rss": max(peaks) if peaks else None,
+        "cells": cells,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def run(
+    paths: Sequence[PathLike],
+    *,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    state_file: Optional[PathLike] = None,
+    report: Optional[PathLike] = None,
+    timeout: int = DEFAULT_TIMEOUT,
+    kernel_name: Optional[str] = None,
+    save: bool = True,
+    allow_errors: bool = False,
+) -> dict:
+    """Execute every changed notebook under ``paths`` on a process pool.
+
+    Args:
+        paths: Notebooks or directories to search.
+        jobs: Concurrent kernels (default: ``os.cpu_count()``).
+        force: Execute even unchanged notebooks.
+        state_file: Fingerprints of the last successful runs (default:
+            ``.notebook_state.json`` in the current directory).
+        report: Write the JSON report here.
+        timeout: Seconds allowed per cell.
+        kernel_name: Kernel for every notebook (default: each notebook's own).
+        save: Write outputs back into the notebooks.
+        allow_errors: Keep executing after a failing cell.
+
+    Returns:
+        dict: The report: environment hash and one record per notebook.
+    """
+    state_path = Path(state_file or STATE_FILE)
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+    known_files = state.setdefault("files", {})
+    done = state.setdefault("notebooks", {})
+    env = environment_fingerprint()
+
+    records, todo = {}, {}
+    for nb in find_notebooks(paths):
+        key = str(nb.resolve())
+        fp = notebook_fingerprint(nb, env, known_files)
+        if not force and done.get(key) == fp:
+            records[key] = {"path": str(nb), "status": "skipped", "fingerprint": fp}
+        else:
+            todo[key] = (nb, fp)
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(todo) or 1))
+    options = dict(timeout=timeout, kernel_name=kernel_name, save=save, allow_errors=allow_errors)
+    if todo:
+        with ProcessPoolExecutor(jobs) as pool:
+            futures = {pool.submit(execute_notebook, nb, **options): key for key, (nb, _) in todo.items()}
+            for future in as_completed(futures):
+                key = futures[future]
+                nb, fp = todo[key]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = {"status": "failed", "error": f"{type(exc).__name__}: {exc}", "cells": []}
+                if result["status"] == "executed":
+                    # Saving outputs changes only outputs, not the fingerprint.
+                    done[key] = fp
+                else:
+                    done.pop(key, None)
+                records[key] = {"path": str(nb), "fingerprint": fp, **result}
+                print(f"{'❌' if result['status'] == 'failed' else '✅'} {nb} "
+                      f"({result.get('wall_s', 0):.1f} s)", flush=True)
+                # Persist after every notebook so an interrupted build keeps its progress.
+                _write_json(state_path, state)
+
+    _write_json(state_path, state)
+    out = {
+        "generated": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec="seconds"),
+        "environment": env,
+        "notebooks": [records[k] for k in sorted(records)],
+    }
+    if report is not None:
+        _write_json(Path(report), out)
+    return out
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point of the ``fns-run-notebooks`` console script."""
+    parser = argparse.ArgumentParser(
+        prog="fns-run-notebooks",
+        description="Execute changed notebooks in parallel and report per-cell time and memory.",
+    )
+    parser.add_argument("paths", nargs="*", default=["notebooks"], help="notebooks or folders")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="concurrent kernels")
+    parser.add_argument("--force", action="store_true", help="execute unchanged notebooks too")
+    parser.add_argument("--state", default=STATE_FILE, help="fingerprint file of previous runs")
+    parser.add_argument("--report", default="notebook_report.json", help="JSON report path")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help="seconds per cell")
+    parser.add_argument("--kernel", default=None, help="kernel name for every notebook")
+    parser.add_argument("--no-save", action="store_true", help="do not write outputs back")
+    parser.add_argument("--allow-errors", action="store_true", help="continue after failing cells")
+    args = parser.parse_args(argv)
+
+    out = run(args.paths, jobs=args.jobs, force=args.force, state_file=args.state, report=args.report,
+              timeout=args.timeout, kernel_name=args.kernel, save=not args.no_save,
+              allow_errors=args.allow_errors)
+    statuses = [r["status"] for r in out["notebooks"]]
+    print(f"{statuses.count('executed')} executed, {statuses.count('skipped')} skipped, "
+          f"{statuses.count('failed')} failed")
+    return int("failed" in statuses)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
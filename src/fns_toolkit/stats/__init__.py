@@ -0,0 +1,16 @@
+"""Statistical tests sized for wide nutrition and metabolomics data."""
+
+from .correlation import correlate
+from .resample import ResampleResult, bootstrap, permutation_test
+from .univariate import anova, cohens_d, fdr_bh, group_moments
+
+__all__ = [
+    "anova",
+    "cohens_d",
+    "fdr_bh",
+    "group_moments",
+    "permutation_test",
+    "bootstrap",
+    "ResampleResult",
+    "correlate",
+]
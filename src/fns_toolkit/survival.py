@@ -0,0 +1,394 @@
+"""Kaplan–Meier, log-rank and Cox models from one sort of the durations.
+
+Every survival quantity is a sum over *risk sets* – the participants still
+followed at each event time.  After sorting durations once (descending),
+the risk set of every time is a prefix of the data, so its sums are
+cumulative sums, and all groups, times and (for Cox) covariates are handled
+with array operations instead of a refit per group or a loop over times.
+
+* :func:`kaplan_meier` – survival curves of every group at once, with
+  lifelines' exponential Greenwood confidence intervals.
+* :func:`logrank_test` – the k-group log-rank test from ``groups × times``
+  tables of observed and expected events.
+* :func:`cox_ph` – Cox proportional hazards by Newton–Raphson.  The
+  gradient and Hessian of the partial likelihood come from cumulative sums
+  over the risk sets; the Hessian needs one ``Xᵀ diag(c) X`` product plus
+  ``times × p`` products, never a ``p × p`` matrix per event time.  Breslow
+  and Efron tie handling and strata are supported.  With ``dtype=np.float32``
+  and ``chunk_size`` the sorted covariates are stored in single precision
+  and processed in row chunks (sums are still accumulated in float64).
+
+With float64 data the results agree with lifelines ``KaplanMeierFitter``,
+``multivariate_logrank_test`` and ``CoxPHFitter`` (Efron ties; Breslow
+against statsmodels ``PHReg``) to 1e-6 relative on survival, test
+statistics, coefficients and standard errors, and to 1e-3 with float32
+storage; ``tests/test_survival.py`` checks these tolerances.
+
+Example:
+    >>> km = kaplan_meier(df["Time_to_CVD"], df["CVD_Incidence"], groups=df["Sex"])
+    >>> logrank_test(df["Time_to_CVD"], df["CVD_Incidence"], df["Smoking"])
+    >>> cox_ph(df, "Time_to_CVD", "CVD_Incidence", covariates=["Age", "BMI_Baseline"]).summary
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .profiling import profiled
+
+
+def _as_arrays(durations, events, groups=None):
+    t = np.asarray(durations, dtype=float)
+    e = np.ones(len(t), dtype=bool) if events is None else np.asarray(events).astype(bool)
+    keep = ~np.isnan(t)
+    if groups is not None:
+        groups = pd.Series(np.asarray(groups))
+        keep &= groups.notna().to_numpy()
+        codes, levels = pd.factorize(groups[keep], sort=True)
+    else:
+        codes, levels = np.zeros(int(keep.sum()), dtype=np.int64), pd.Index(["all"])
+    return t[keep], e[keep], codes, pd.Index(levels)
+
+
+def _tables(t, e, codes, n_groups):
+    """``groups × unique times`` tables of deaths, removals and numbers at risk."""
+    times, idx = np.unique(t, return_inverse=True)
+    shape = (n_groups, len(times))
+    flat = codes * len(times) + idx
+    removed = np.bincount(flat, minlength=n_groups * len(times)).reshape(shape)
+    deaths = np.bincount(flat, weights=e, minlength=n_groups * len(times)).reshape(shape)
+    # At risk at a time: everyone whose duration is that time or later.
+    at_risk = removed[:, ::-1].cumsum(axis=1)[:, ::-1]
+    return times, deaths, removed, at_risk
+
+
+# ---------------------------------------------------------------------------
+# Kaplan–Meier and log-rank
+# ---------------------------------------------------------------------------
+
+@profiled
+def kaplan_meier(durations, events=None, groups=None, *, alpha: float = 0.05) -> pd.DataFrame:
+    """Kaplan–Meier curves of every group from one pass over sorted times.
+
+    Args:
+        durations: Follow-up time of every participant.
+        events: 1/True if the event was observed, 0/False if censored.
+        groups: Optional group label; one curve per group.
+        alpha: 1 − confidence level of the pointwise intervals.
+
+    Returns:
+        DataFrame: Indexed by ``(group, timeline)`` with ``at_risk``,
+        ``observed``, ``censored``, ``survival``, ``ci_lower`` and
+        ``ci_upper``; each group starts with a row at time 0.
+    """
+    t, e, codes, levels = _as_arrays(durations, events, groups)
+    times, deaths, removed, at_risk = _tables(t, e, codes, len(levels))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        survival = np.cumprod(np.where(at_risk > 0, 1 - deaths / at_risk, 1.0), axis=1)
+        greenwood = np.cumsum(
+            np.where(at_risk > deaths, deaths / (at_risk * (at_risk - deaths)), 0.0), axis=1
+        )
+        z = stats.norm.ppf(1 - alpha / 2)
+        log_s = np.log(survival)
+        # log S < 0, so subtracting the term widens towards 0.
+        lower = np.exp(-np.exp(np.log(-log_s) - z * np.sqrt(greenwood) / log_s))
+        upper = np.exp(-np.exp(np.log(-log_s) + z * np.sqrt(greenwood) / log_s))
+    # Where S = 1 (or 0) the transformed interval is undefined; use S itself.
+    lower = np.where(np.isfinite(lower), lower, survival)
+    upper = np.where(np.isfinite(upper), upper, survival)
+
+    parts = []
+    for g, level in enumerate(levels):
+        seen = removed[g] > 0
+        start = pd.DataFrame({"at_risk": [at_risk[g, seen][:1].sum() if seen.any() else 0],
+                              "observed": [0], "censored": [0], "survival": [1.0],
+                              "ci_lower": [1.0], "ci_upper": [1.0]},
+                             index=[0.0])
+        body = pd.DataFrame({
+            "at_risk": at_risk[g, seen],
+            "observed": deaths[g, seen].astype(np.int64),
+            "censored": (removed[g, seen] - deaths[g, seen]).astype(np.int64),
+            "survival": survival[g, seen],
+            "ci_lower": lower[g, seen],
+            "ci_upper": upper[g, seen],
+        }, index=times[seen])
+        if seen.any() and times[seen][0] == 0:
+            start = start.iloc[:0]
+        parts.append(pd.concat([start, body]))
+    out = pd.concat(parts, keys=list(levels), names=["group", "timeline"])
+    return out
+
+
+@dataclass
+class LogRankResult:
+    """Outcome of :func:`logrank_test`."""
+
+    statistic: float
+    df: int
+    p_value: float
+    table: pd.DataFrame
+
+
+@profiled
+def logrank_test(durations, events, groups) -> LogRankResult:
+    """k-group log-rank test, all groups and times in one set of array sums.
+
+    Args:
+        durations: Follow-up time of every participant.
+        events: 1/True if the event was observed.
+        groups: Group label of every participant (two or more groups).
+
+    Returns:
+        LogRankResult: χ² statistic, degrees of freedom, p-value and a table
+        of observed and expected events per group.
+    """
+    t, e, codes, levels = _as_arrays(durations, events, groups)
+    if len(levels) < 2:
+        raise ValueError("logrank_test needs at least two groups")
+    _, deaths, _, at_risk = _tables(t, e, codes, len(levels))
+    d = deaths.sum(axis=0)
+    n = at_risk.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(n > 0, at_risk / n, 0.0)                     # groups × times
+        weight = np.where(n > 1, d * (n - d) / (n - 1), 0.0)
+    observed = deaths.sum(axis=1)
+    expected = share @ d
+    # Var(O − E): diag(Σ w p_g) − Σ w p_g p_h.
+    cov = np.diag(share @ weight) - (share * weight) @ share.T
+    diff = (observed - expected)[:-1]
+    statistic = float(diff @ np.linalg.solve(cov[:-1, :-1], diff))
+    dof = len(levels) - 1
+    table = pd.DataFrame({"observed": observed, "expected": expected}, index=levels)
+    return LogRankResult(statistic, dof, float(stats.chi2.sf(statistic, dof)), table)
+
+
+# ---------------------------------------------------------------------------
+# Cox proportional hazards
+# ---------------------------------------------------------------------------
+
+class CoxData:
+    """Covariates sorted once into risk-set order, with partial-likelihood derivatives.
+
+    Rows are sorted by stratum and then by *descending* duration, so the
+    risk set of every event time (within its stratum) is a prefix of the
+    stratum's rows.
+
+    Args:
+        X: ``n × p`` covariates.
+        durations: Follow-up times.
+        events: Event indicators.
+        strata: Optional stratum labels (separate baseline hazards).
+        ties: ``"efron"`` or ``"breslow"``.
+        dtype: Storage dtype of the sorted covariates.
+        chunk_size: Rows per chunk for the ``n × p`` products (default: all).
+    """
+
+    def __init__(self, X, durations, events, strata=None, *, ties: str = "efron",
+                 dtype=np.float64, chunk_size: Optional[int] = None):
+        if ties not in ("efron", "breslow"):
+            raise ValueError("ties must be 'efron' or 'breslow'")
+        X = np.asarray(X, dtype=np.float64)
+        t = np.asarray(durations, dtype=np.float64)
+        e = np.asarray(events).astype(bool)
+        s = (pd.factorize(pd.Series(np.asarray(strata)), sort=True)[0] if strata is not None
+             else np.zeros(len(t), dtype=np.int64))
+        order = np.lexsort((-t, s))
+        self.mean = X.mean(axis=0)
+        # Centring leaves β unchanged and keeps exp(xβ) in range.
+        self.X = np.ascontiguousarray((X - self.mean)[order], dtype=dtype)
+        self.event = e[order]
+        t, s = t[order], s[order]
+        self.n, self.p = self.X.shape
+        self.ties = ties
+        self.chunk_size = chunk_size or self.n
+
+        # Blocks of rows sharing (stratum, time), in sorted order.
+        new = np.r_[True, (t[1:] != t[:-1]) | (s[1:] != s[:-1])]
+        self.block = np.cumsum(new) - 1
+        self.n_blocks = n_blocks = int(self.block[-1]) + 1 if self.n else 0
+        # First block of each block's stratum, and the first block after it.
+        block_stratum = s[new]
+        self._first = np.searchsorted(block_stratum, block_stratum, side="left")
+        self._next = np.searchsorted(block_stratum, block_stratum, side="right")
+
+        deaths = np.bincount(self.block, weights=self.event, minlength=n_blocks)
+        self.event_blocks = np.flatnonzero(deaths > 0)
+        self.deaths = deaths[self.event_blocks]
+        # One entry per death, with l = 0 … d−1 for Efron's correction.
+        rep = np.repeat(np.arange(len(self.event_blocks)), self.deaths.astype(np.int64))
+        starts = np.r_[0, np.cumsum(self.deaths.astype(np.int64))[:-1]]
+        self._rep = rep
+        frac = (np.arange(len(rep)) - starts[rep]) / self.deaths[rep]
+        self._frac = frac if ties == "efron" else np.zeros_like(frac)
+        self.x_events = self._sum_rows(self.event.astype(np.float64))
+
+    def _chunks(self):
+        for a in range(0, self.n, self.chunk_size):
+            yield slice(a, min(a + self.chunk_size, self.n))
+
+    def _sum_rows(self, weight: np.ndarray) -> np.ndarray:
+        """``Σ_i weight_i x_i``."""
+        out = np.zeros(self.p)
+        for rows in self._chunks():
+            out += weight[rows] @ self.X[rows].astype(np.float64)
+        return out
+
+    def _block_sums(self, weight: np.ndarray) -> np.ndarray:
+        """``blocks × p`` sums of ``weight_i x_i`` within each block."""
+        out = np.zeros((self.n_blocks, self.p))
+        for rows in self._chunks():
+            wx = weight[rows, None] * self.X[rows].astype(np.float64)
+            blk = self.block[rows]
+            starts = np.r_[0, np.flatnonzero(blk[1:] != blk[:-1]) + 1]
+            out[blk[starts]] += np.add.reduceat(wx, starts, axis=0)
+        return out
+
+    def _risk_cumsum(self, values: np.ndarray) -> np.ndarray:
+        """Per block, the sum over blocks at or before it in its stratum.
+
+        In descending-time order these are the rows still at risk.
+        """
+        total = np.cumsum(values, axis=0)
+        padded = np.concatenate([np.zeros((1,) + total.shape[1:]), total])
+        return total - padded[self._first]
+
+    def _event_cumsum(self, values: np.ndarray) -> np.ndarray:
+        """Per block, the sum over blocks at or after it in its stratum.
+
+        A row is in the risk set of every event time up to its own duration,
+        i.e. of the event blocks at or after its block.
+        """
+        total = np.cumsum(values[::-1])[::-1]
+        return total - np.r_[total, 0.0][self._next]
+
+    def derivatives(self, beta: np.ndarray):
+        """Log partial likelihood, its gradient and Hessian at ``beta``."""
+        eta = np.concatenate([self.X[rows].astype(np.float64) @ beta for rows in self._chunks()])
+        w = np.exp(eta)
+        ev = self.event_blocks
+        # Risk-set sums at every event time, and sums over the tied deaths.
+        s0 = self._risk_cumsum(np.bincount(self.block, weights=w, minlength=self.n_blocks))[ev]
+        s1 = self._risk_cumsum(self._block_sums(w))[ev]
+        w_dead = np.where(self.event, w, 0.0)
+        s0_d = np.bincount(self.block, weights=w_dead, minlength=self.n_blocks)[ev]
+        s1_d = self._block_sums(w_dead)[ev]
+
+        rep, f = self._rep, self._frac
+        phi = s0[rep] - f * s0_d[rep]                    # one per death
+        k = len(ev)
+        inv = np.bincount(rep, weights=1 / phi, minlength=k)         # Σ_l 1/φ
+        f_inv = np.bincount(rep, weights=f / phi, minlength=k)       # Σ_l f/φ
+        a = np.bincount(rep, weights=1 / phi ** 2, minlength=k)
+        b = np.bincount(rep, weights=f / phi ** 2, minlength=k)
+        c = np.bincount(rep, weights=f * f / phi ** 2, minlength=k)
+
+        loglik = float(eta[self.event].sum() - np.log(phi).sum())
+        gradient = self.x_events - inv @ s1 + f_inv @ s1_d
+
+        # Σ_j Σ_l S2_jl/φ_jl = Xᵀ diag(w · coef) X, where coef_i sums 1/φ over
+        # the event times whose risk set contains i, minus the Efron share
+        # for i's own tied deaths.
+        per_block = np.zeros(self.n_blocks)
+        per_block[ev] = inv
+        cum_inv = self._event_cumsum(per_block)
+        own = np.zeros(self.n_blocks)
+        own[ev] = f_inv
+        coef = w * (cum_inv[self.block] - np.where(self.event, own[self.block], 0.0))
+        hessian = np.zeros((self.p, self.p))
+        for rows in self._chunks():
+            xr = self.X[rows].astype(np.float64)
+            hessian -= xr.T @ (coef[rows, None] * xr)
+        hessian += (s1.T * a) @ s1 - (s1.T * b) @ s1_d - (s1_d.T * b) @ s1 + (s1_d.T * c) @ s1_d
+        return loglik, gradient, hessian
+
+
+@dataclass
+class CoxResult:
+    """Fitted Cox model."""
+
+    summary: pd.DataFrame
+    log_likelihood: float
+    n: int
+    events: int
+    iterations: int
+    converged: bool
+
+
+@profiled
+def cox_ph(
+    data: pd.DataFrame,
+    duration_col: str,
+    event_col: str,
+    *,
+    covariates: Optional[Sequence[str]] = None,
+    strata: Optional[str] = None,
+    ties: str = "efron",
+    alpha: float = 0.05,
+    max_iter: int = 50,
+    tol: float = 1e-9,
+    dtype=np.float64,
+    chunk_size: Optional[int] = None,
+) -> CoxResult:
+    """Cox proportional-hazards model by Newton–Raphson on risk-set sums.
+
+    Args:
+        data: One row per participant.
+        duration_col: Follow-up time column.
+        event_col: Event indicator column.
+        covariates: Covariate columns (default: every other numeric column).
+        strata: Column whose levels get separate baseline hazards.
+        ties: ``"efron"`` (lifelines' default) or ``"breslow"``.
+        alpha: 1 − confidence level of the intervals.
+        max_iter: Newton iterations.
+        tol: Stop when the largest change in a coefficient is below this.
+        dtype: Storage dtype of the sorted covariates (``np.float32`` halves
+            memory).
+        chunk_size: Rows per chunk for the ``n × p`` products.
+
+    Returns:
+        CoxResult: ``summary`` table in lifelines' layout plus fit details.
+    """
+    if covariates is None:
+        exclude = {duration_col, event_col, strata}
+        covariates = [c for c in data.select_dtypes("number").columns if c not in exclude]
+    used = list(dict.fromkeys([duration_col, event_col, *covariates] + ([strata] if strata else [])))
+    frame = data[used].dropna()
+    cox = CoxData(frame[list(covariates)], frame[duration_col], frame[event_col],
+                  frame[strata] if strata else None, ties=ties, dtype=dtype, chunk_size=chunk_size)
+
+    beta = np.zeros(cox.p)
+    loglik, grad, hess = cox.derivatives(beta)
+    converged, iterations = False, 0
+    for iterations in range(1, max_iter + 1):
+        step = np.linalg.solve(-hess, grad)
+        # Halve the step until the likelihood does not decrease.
+        for _ in range(30):
+            new_ll, new_grad, new_hess = cox.derivatives(beta + step)
+            if np.isfinite(new_ll) and new_ll >= loglik - 1e-12:
+                break
+            step /= 2
+        beta = beta + step
+        loglik, grad, hess = new_ll, new_grad, new_hess
+        if np.max(np.abs(step)) < tol:
+            converged = True
+            break
+
+    se = np.sqrt(np.diag(np.linalg.inv(-hess)))
+    z = beta / se
+    crit = stats.norm.ppf(1 - alpha / 2)
+    pct = round(100 * (1 - alpha))
+    summary = pd.DataFrame({
+        "coef": beta,
+        "exp(coef)": np.exp(beta),
+        "se(coef)": se,
+        f"coef lower {pct}%": beta - crit * se,
+        f"coef upper {pct}%": beta + crit * se,
+        "z": z,
+        "p": 2 * stats.norm.sf(np.abs(z)),
+    }, index=pd.Index(list(covariates), name="covariate"))
+    return CoxResult(summary, loglik, cox.n, int(cox.event.sum()), iterations, converged)
@@ -0,0 +1,467 @@
+"""Synthetic versions of the teaching datasets at any size.
+
+The scripts under ``notebooks/*/data/`` build their tables one row at a time,
+which is fine for a few hundred rows but not for the 10M–100M-row files used in
+load tests.  Every generator here draws whole columns at once from a
+``numpy.random.Generator`` and produces the rows ``[start, stop)`` of a table,
+so a large table can be written chunk by chunk and split across processes.
+
+Parallel runs give every worker a contiguous slice of the rows and its own
+child of ``SeedSequence(seed).spawn(n_workers)``.  The output is therefore
+identical for the same ``seed``, ``n_workers`` and ``chunk_size``.
+
+Example:
+    >>> from fns_toolkit import synth
+    >>> df = synth.sample("large_food_log", 500, seed=42)
+    >>> synth.generate("large_food_log", 10_000_000, "food_log.csv", n_workers=8)
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+Generator = Callable[[np.random.Generator, int, int], pd.DataFrame]
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+FORMATS = ("csv", "parquet")
+
+
+def _ids(prefix: str, idx: np.ndarray) -> pd.Series:
+    return prefix + pd.Series(idx + 1).astype(str)
+
+
+def _days(start: str, offsets: np.ndarray) -> np.ndarray:
+    return np.datetime64(start, "D") + offsets.astype("timedelta64[D]")
+
+
+def _with_missing(rng: np.random.Generator, values: np.ndarray, p: float) -> np.ndarray:
+    return np.where(rng.random(len(values)) < p, np.nan, values)
+
+
+# ---------------------------------------------------------------------------
+# Generators: rows [start, stop) of each dataset
+# ---------------------------------------------------------------------------
+
+def hippo_diets(rng: np.random.Generator, start: int, stop: int) -> pd.DataFrame:
+    """``01_infrastructure/data/hippo_diets.csv`` – one diet record per hippo."""
+    idx = np.arange(start, stop)
+    n = len(idx)
+    calories = np.round(rng.normal(2450, 150, n)).astype(np.int64)
+    protein = _with_missing(rng, np.round(rng.normal(78, 5, n), 1), 0.1)
+    return pd.DataFrame({
+        "ID": _ids("H", idx),
+        "Calories": calories,
+        "Protein": protein,
+        "Date": _days("2024-01-01", idx % 366),
+    })
+
+
+_NUTRIENT_LEVELS = {  # name: (mean, sd) of the hippo_nutrients measurements
+    "Iron": (8.0, 0.5),
+    "Calcium": (1150.0, 100.0),
+    "Vitamin_D": (10.5, 1.0),
+}
+
+
+def hippo_nutrients(rng: np.random.Generator, start: int, stop: int) -> pd.DataFrame:
+    """``03_data_handling/data/hippo_nutrients.csv`` – hippo × nutrient × year."""
+    idx = np.arange(start, stop)
+    n = len(idx)
+    names = np.array(list(_NUTRIENT_LEVELS))
+    mean, sd = np.array(list(_NUTRIENT_LEVELS.values())).T
+    nutrient = (idx // 2) % len(names)
+    value = _with_missing(rng, np.round(rng.normal(mean[nutrient], sd[nutrient]), 1), 0.1)
+    return pd.DataFrame({
+        "ID": _ids("H", idx // (2 * len(names))),
+        "Nutrient": names[nutrient],
+        "Year": 2024 + idx % 2,
+        "Value": value,
+        "Age": rng.integers(20, 41, n),
+        "Sex": np.array(["M", "F"])[rng.integers(0, 2, n)],
+    })
+
+
+_FOOD_LOG_AMOUNTS = {  # nutrient: (mean, sd) of the amount per meal
+    "Iron": (2.5, 0.3),
+    "Calcium": (300.0, 30.0),
+    "Protein": (25.0, 3.0),
+    "Vitamin_D": (11.0, 1.0),
+}
+
+
+def large_food_log(rng: np.random.Generator, start: int, stop: int) -> pd.DataFrame:
+    """``05_advanced/data/large_food_log.csv`` – meal-level nutrient log of 50 hippos."""
+    idx = np.arange(start, stop)
+    n = len(idx)
+    names = np.array(list(_FOOD_LOG_AMOUNTS))
+    mean, sd = np.array(list(_FOOD_LOG_AMOUNTS.values())).T
+    nutrient = rng.integers(0, len(names), n)
+    return pd.DataFrame({
+        "ID": _ids("H", rng.integers(0, 50, n)),
+        "Meal": np.array(["Breakfast", "Lunch", "Dinner"])[rng.integers(0, 3, n)],
+        "Nutrient": names[nutrient],
+        "Amount": np.round(rng.normal(mean[nutrient], sd[nutrient]), 1),
+        "Date": _days("2024-01-01", idx % 90),
+    })
+
+
+def hipponol_trial(rng: np.random.Generator, start: int, stop: int) -> pd.DataFrame:
+    """``10_mini_projects/data/hipponol_trial_data.csv`` – the Hipponol BP trial."""
+    idx = np.arange(start, stop)
+    n = len(idx)
+    treated = rng.integers(0, 2, n).astype(bool)
+    sbp_base = rng.normal(135, 15, n)
+    dbp_base = rng.normal(85, 10, n)
+    sbp_follow = sbp_base + rng.normal(np.where(treated, -5, 3), 10)
+    dbp_follow = dbp_base + rng.normal(np.where(treated, -3, 2), 8)
+    time_to_event = np.round(np.minimum(rng.exponential(np.where(treated, 10, 5)), 24.0), 1)
+    censored = (rng.random(n) < 0.4) | (time_to_event == 24.0)
+    return pd.DataFrame({
+        "ID": idx + 1,
+        "Age": rng.integers(40, 71, n),
+        "Sex": np.array(["Male", "Female"])[rng.integers(0, 2, n)],
+        "SmokingStatus": np.array(["Smoker", "Non-smoker"])[rng.integers(0, 2, n)],
+        "Group": np.where(treated, "Hipponol", "Control"),
+        "Baseline_SBP": np.round(sbp_base, 1),
+        "Baseline_DBP": np.round(dbp_base, 1),
+        "Followup_SBP": np.round(sbp_follow, 1),
+        "Followup_DBP": np.round(dbp_follow, 1),
+        "Survival": (~censored).astype(np.int64),
+        "Time_to_Event": time_to_event,
+    })
+
+
+def epidemiological_study(rng: np.random.Generator, start: int, stop: int) -> pd.DataFrame:
+    """``10_mini_projects/data/epidemiological_study.csv`` – the cohort of ``create_epi_data.py``."""
+    idx = np.arange(start, stop)
+    n = len(idx)
+    age = rng.integers(45, 81, n)
+    bmi = rng.normal(27, 4, n)
+    bp = rng.normal(130, 15, n)
+    sugar = rng.normal(50, 10, n)
+    sfa = rng.normal(30, 8, n)
+    data = {
+        "ID": idx + 1,
+        "Age": age,
+        "Sex": rng.choice(np.array(["M", "F"]), n),
+        "Smoking": rng.choice(np.array(["Yes", "No"]), n, p=[0.3, 0.7]),
+        "Physical_Activity": rng.choice(np.array(["Low", "Medium", "High"]), n, p=[0.4, 0.4, 0.2]),
+        "Social_Class": rng.choice(
+            np.array(["A", "B", "C1", "C2", "D", "E"]), n, p=[0.1, 0.15, 0.25, 0.25, 0.15, 0.1]
+        ),
+        "BMI_Baseline": bmi,
+        "BP_Baseline": bp,
+        "Sugar_Intake": sugar,
+        "SFA_Intake": sfa,
+    }
+    for year in (2, 4, 6):
+        data[f"BMI_Year{year}"] = bmi + 0.02 * sugar + rng.normal(0, 1, n)
+        data[f"BP_Year{year}"] = bp + rng.normal(0, 5, n)
+    # Very low blood pressure can push the linear hazard below zero.
+    hazard = np.maximum(0.0001 + 0.00005 * sfa + 0.00002 * age + 0.00003 * (bp - 130), 1e-6)
+    time_to_cvd = rng.exponential(1 / hazard)
+    data["CVD_Incidence"] = (time_to_cvd <= 6).astype(np.int64)
+    data["Time_to_CVD"] = np.minimum(time_to_cvd, 6)
+
+    df = pd.DataFrame(data)
+    # ~8% missing in every column except the ID
+    mask = rng.random((n, df.shape[1] - 1)) < 0.08
+    return df.iloc[:, :1].join(df.iloc[:, 1:].mask(mask))
+
+
+_N_METABOLITES = 200
+_N_FACTORS = 9
+
+
+def _metabolomics_structure():
+    """Loadings, discriminative metabolites and their shifts (fixed, seed 11088)."""
+    rng = np.random.default_rng(11088)
+    loadings = np.zeros((_N_METABOLITES, _N_FACTORS))
+    n_active = rng.integers(1, 3, _N_METABOLITES)
+    for i, k in enumerate(n_active):
+        loadings[i, rng.choice(_N_FACTORS, size=k, replace=False)] = rng.uniform(0.5, 1.5, k)
+    discriminative = rng.choice(_N_METABOLITES, size=10, replace=False)
+    shift = np.zeros(_N_METABOLITES)
+    shift[discriminative] = rng.uniform(1, 2, 10)
+    return loadings, discriminative, shift
+
+
+def metabolomics(rng: np.random.Generator, start: int, stop: int) -> pd.DataFrame:
+    """``10_mini_projects/data/metabolomics_dataset.csv`` – of ``create_multivariate_data.py``.
+
+    The latent-factor structure (loadings and the 10 discriminative
+    metabolites) is the same for every chunk and seed.  Unlike the script,
+    the table is not standardised at the end, since that needs every row;
+    concentrations stay on the ``|factors × loadings + noise|`` scale.
+    """
+    n = stop - start
+    loadings, discriminative, shift = _metabolomics_structure()
+    labels = (rng.random(n) < 0.2).astype(np.int64)
+    data = rng.standard_normal((n, _N_FACTORS)) @ loadings.T
+    data += labels[:, None] * shift
+    data = np.abs(data + rng.normal(0, 0.3, (n, _N_METABOLITES)))
+    severity = 0.5 * data[:, discriminative].mean(axis=1) + 0.3 * rng.standard_normal(n)
+    df = pd.DataFrame(data, columns=[f"Metabolite_{i + 1}" for i in range(_N_METABOLITES)])
+    df["Label"] = labels
+    df["Severity"] = severity
+    return df
+
+
+GENERATORS: dict[str, Generator] = {
+    "hippo_diets": hippo_diets,
+    "hippo_nutrients": hippo_nutrients,
+    "large_food_log": large_food_log,
+    "hipponol_trial": hipponol_trial,
+    "epidemiological_study": epidemiological_study,
+    "metabolomics": metabolomics,
+}
+
+
+def _generator(name: str) -> Generator:
+    try:
+        return GENERATORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown generator {name!r}; choose from {sorted(GENERATORS)}") from None
+
+
+# ---------------------------------------------------------------------------
+# Chunked, process-parallel output
+# ---------------------------------------------------------------------------
+
+def _row_ranges(n_rows: int, n_parts: int) -> list[tuple[int, int]]:
+    bounds = np.linspace(0, n_rows, n_parts + 1).astype(np.int64)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def _iter_chunks(name, seed_seq, start, stop, chunk_size):
+    draw = _generator(name)
+    rng = np.random.default_rng(seed_seq)
+    for lo in range(start, stop, chunk_size):
+        yield draw(rng, lo, min(lo + chunk_size, stop))
+
+
+@profiled
+def sample(name: str, n_rows: int, *, seed: Optional[int] = None, n_workers: int = 1,
+           chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.DataFrame:
+    """Generate a table in memory.
+
+    With the same ``seed``, ``n_workers`` and ``chunk_size`` this returns
+    exactly the rows :func:`generate` writes to disk.
+
+    Args:
+        name: Generator name (see :data:`GENERATORS`).
+        n_rows: Number of rows.
+        seed: Root seed for ``numpy.random.SeedSequence``.
+        n_workers: Number of independent row slices / seed streams.
+        chunk_size: Rows drawn per call of the generator.
+
+    Returns:
+        DataFrame: The synthetic table.
+    """
+    children = np.random.SeedSequence(seed).spawn(n_workers)
+    frames = [
+        chunk
+        for child, (start, stop) in zip(children, _row_ranges(n_rows, n_workers))
+        for chunk in _iter_chunks(name, child, start, stop, chunk_size)
+    ]
+    if not frames:
+        return _generator(name)(np.random.default_rng(seed), 0, 0)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _write_part(name, seed_seq, start, stop, chunk_size, path, fmt):
+    writer = None
+    written = 0
+    try:
+        for chunk in _iter_chunks(name, seed_seq, start, stop, chunk_size):
+            if fmt == "csv":
+                chunk.to_csv(path, mode="a", header=False, index=False)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+@profiled
+def generate(
+    name: str,
+    n_rows: int,
+    path: PathLike,
+    *,
+    seed: Optional[int] = None,
+    n_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    fmt: Optional[str] = None,
+) -> Path:
+    """Write a synthetic table to disk without holding it in memory.
+
+    Each worker streams ``chunk_size`` rows at a time into its own part file.
+    For ``fmt="csv"`` the parts are then concatenated into ``path``; for
+    ``fmt="parquet"`` (needs ``pyarrow``) ``path`` becomes a directory of
+    ``part-*.parquet`` files that ``pd.read_parquet`` reads as one table.
+
+    Args:
+        name: Generator name (see :data:`GENERATORS`).
+        n_rows: Number of rows to write.
+        path: Output file (CSV) or directory (Parquet).
+        seed: Root seed for ``numpy.random.SeedSequence``.
+        n_workers: Processes to use; defaults to ``os.cpu_count()``.
+        chunk_size: Rows generated and written per step.
+        fmt: ``"csv"`` or ``"parquet"``; inferred from the suffix of ``path``.
+
+    Returns:
+        Path: The written file or directory.
+    """
+    _generator(name)
+    path = Path(path)
+    fmt = fmt or ("parquet" if path.suffix == ".parquet" else "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {FORMATS}, not {fmt!r}")
+    if fmt == "parquet":
+        import pyarrow  # noqa: F401  (fail early with the usual ImportError)
+
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, max(n_rows, 1)))
+    children = np.random.SeedSequence(seed).spawn(n_workers)
+    ranges = _row_ranges(n_rows, n_workers)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".synth-", dir=path.parent))
+    try:
+        parts = [tmp / f"part-{i:05d}.{fmt}" for i in range(n_workers)]
+        jobs = [
+            (name, child, start, stop, chunk_size, part, fmt)
+            for child, (start, stop), part in zip(children, ranges, parts)
+        ]
+        if n_workers == 1:
+            for job in jobs:
+                _write_part(*job)
+        else:
+            with ProcessPoolExecutor(n_workers) as pool:
+                for future in [pool.submit(_write_part, *job) for job in jobs]:
+                    future.result()
+
+        if fmt == "csv":
+            header = _generator(name)(np.random.default_rng(0), 0, 0)
+            with open(path, "w", newline="") as out:
+                header.to_csv(out, index=False)
+                for part in parts:
+                    if part.exists():
+                        with open(part) as src:
+                            shutil.copyfileobj(src, out, 16 << 20)
+        else:
+            if path.exists():
+                shutil.rmtree(path)
+            path.mkdir()
+            for part in parts:
+                if part.exists():
+                    part.rename(path / part.name)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Throughput benchmark
+# ---------------------------------------------------------------------------
+
+def benchmark(
+    names: Optional[Sequence[str]] = None,
+    n_rows: int = 1_000_000,
+    *,
+    n_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    fmt: str = "csv",
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Time each generator in memory and end-to-end to disk.
+
+    Args:
+        names: Generators to run; all of :data:`GENERATORS` by default.
+        n_rows: Rows per generator.
+        n_workers: Processes for the on-disk run.
+        chunk_size: Rows per chunk.
+        fmt: Output format for the on-disk run.
+        seed: Root seed.
+
+    Returns:
+        DataFrame: One row per generator with row counts, seconds and rows/s.
+    """
+    records = []
+    with tempfile.TemporaryDirectory(prefix="fns-synth-bench-") as tmp:
+        for name in names or list(GENERATORS):
+            t0 = time.perf_counter()
+            rows = sum(
+                len(chunk)
+                for chunk in _iter_chunks(name, np.random.SeedSequence(seed), 0, n_rows, chunk_size)
+            )
+            draw_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            out = generate(name, n_rows, Path(tmp) / f"{name}.{fmt}", seed=seed,
+                           n_workers=n_workers, chunk_size=chunk_size, fmt=fmt)
+            write_s = time.perf_counter() - t0
+            size = (sum(p.stat().st_size for p in out.iterdir()) if out.is_dir()
+                    else out.stat().st_size)
+            records.append({
+                "generator": name,
+                "rows": rows,
+                "draw_s": draw_s,
+                "draw_rows_per_s": rows / draw_s,
+                "write_s": write_s,
+                "write_rows_per_s": rows / write_s,
+                "mb_written": size / 1e6,
+            })
+    return pd.DataFrame.from_records(records)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """``python -m fns_toolkit.synth`` – generate a dataset or run the benchmark."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("name", nargs="?", choices=sorted(GENERATORS))
+    parser.add_argument("-n", "--rows", type=int, default=1_000_000)
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--format", choices=FORMATS, default=None)
+    parser.add_argument("--benchmark", action="store_true", help="time every generator")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        names = [args.name] if args.name else None
+        print(benchmark(names, args.rows, n_workers=args.workers, chunk_size=args.chunk_size,
+                        fmt=args.format or "csv").to_string(index=False))
+        return
+    if not args.name:
+        parser.error("a generator name is required unless --benchmark is given")
+    out = generate(args.name, args.rows, args.output or f"{args.name}.{args.format or 'csv'}",
+                   seed=args.seed, n_workers=args.workers, chunk_size=args.chunk_size,
+                   fmt=args.format)
+    print(f"✅ Wrote {args.rows:,} rows to {out}")
+
+
+if __name__ == "__main__":
+    main()
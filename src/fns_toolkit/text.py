@@ -0,0 +1,413 @@
+"""Word counts and document-term matrices of large free-text files.
+
+Notebook 6.2 reads every survey response into a list, runs NLTK's
+``word_tokenize`` on each one and extends a single ``tokens`` list that is
+finally passed to ``Counter``.  Memory grows with the number of words and a
+single core does all the work.  :func:`document_term_matrix` instead
+
+* streams the file (one document per line) in byte ranges that worker
+  processes read on their own, or an iterable of strings in batches;
+* tokenises with one precompiled regular expression (NLTK's
+  ``word_tokenize`` is available as the slower alternative);
+* drops stop words with a ``frozenset`` lookup and forms n-grams from what
+  remains;
+* gives every worker its own small vocabulary and a sparse matrix of
+  counts, and merges the parts with one ``np.unique`` over the vocabularies.
+
+The result is a :class:`DocumentTermMatrix`: a CSR matrix of counts
+(documents × terms) plus the sorted vocabulary.  Word frequencies, TF-IDF
+weights and term co-occurrences are then sparse-matrix operations, with no
+Python loop over words.
+
+The default token pattern keeps runs of letters that stand alone as words,
+which is what ``word_tokenize`` followed by ``str.isalpha`` keeps in the
+notebook, apart from contractions: ``"don't"`` gives ``don`` and ``t``
+rather than ``do``.
+
+Example:
+    >>> dtm = document_term_matrix("data/food_preferences.txt",
+    ...                            stop_words=ENGLISH_STOP_WORDS | {"hippo"})
+    >>> dtm.most_common(5)
+    >>> tfidf = dtm.tfidf()
+    >>> bigrams = document_term_matrix(responses, ngram_range=(2, 2), n_jobs=8)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .profiling import profiled
+
+PathLike = Union[str, "os.PathLike[str]"]
+StopWords = Union[str, Iterable[str], None]
+
+# Bytes of text read by one task, and lines per task for in-memory input.
+DEFAULT_CHUNK_BYTES = 16 << 20
+DEFAULT_BATCH_SIZE = 50_000
+
+# Whole words made of letters only ("h1" and "x2" are skipped entirely).
+TOKEN_PATTERN = re.compile(r"\b[^\W\d_]+\b")
+
+# NLTK's English stop-word list, so no corpus download is needed.
+ENGLISH_STOP_WORDS = frozenset("""
+a about above after again against ain all am an and any are aren aren't as at
+be because been before being below between both but by can couldn couldn't d
+did didn didn't do does doesn doesn't doing don don't down during each few for
+from further had hadn hadn't has hasn hasn't have haven haven't having he her
+here hers herself him himself his how i if in into is isn isn't it it's its
+itself just ll m ma me mightn mightn't more most mustn mustn't my myself needn
+needn't no nor not now o of off on once only or other our ours ourselves out
+over own re s same shan shan't she she's should should've shouldn shouldn't so
+some such t than that that'll the their theirs them themselves then there
+these they this those through to too under until up ve very was wasn wasn't
+we were weren weren't what when where which while who whom why will with won
+won't wouldn wouldn't y you you'd you'll you're you've your yours yourself
+yourselves
+""".split())
+
+
+class _Options(NamedTuple):
+    tokenizer: str
+    pattern: "re.Pattern[str]"
+    lowercase: bool
+    stop_words: frozenset
+    ngram_range: tuple[int, int]
+    encoding: str
+
+
+def _stop_words(stop_words: StopWords) -> frozenset:
+    if stop_words is None:
+        return frozenset()
+    if isinstance(stop_words, str):
+        if stop_words != "english":
+            raise ValueError("stop_words must be 'english', a collection of words or None")
+        return ENGLISH_STOP_WORDS
+    return frozenset(stop_words)
+
+
+def tokenize(
+    text: str,
+    *,
+    tokenizer: str = "regex",
+    token_pattern: Union[str, "re.Pattern[str]"] = TOKEN_PATTERN,
+    lowercase: bool = True,
+    stop_words: StopWords = "english",
+) -> list[str]:
+    """Split one document into words, without stop words.
+
+    Args:
+        text: The document.
+        tokenizer: ``"regex"`` (fast) or ``"nltk"`` (``word_tokenize``, keeping
+            alphabetic tokens only).
+        token_pattern: Regular expression matching one token (regex path).
+        lowercase: Lower-case the text first.
+        stop_words: ``"english"``, a collection of words to drop, or ``None``.
+
+    Returns:
+        list[str]: The tokens in order.
+    """
+    options = _options(tokenizer, token_pattern, lowercase, stop_words, (1, 1), "utf-8")
+    return _tokens(text, options)
+
+
+def _options(tokenizer, token_pattern, lowercase, stop_words, ngram_range, encoding) -> _Options:
+    if tokenizer not in ("regex", "nltk"):
+        raise ValueError("tokenizer must be 'regex' or 'nltk'")
+    low, high = ngram_range
+    if not 1 <= low <= high:
+        raise ValueError("ngram_range must be (min_n, max_n) with 1 <= min_n <= max_n")
+    return _Options(tokenizer, re.compile(token_pattern), lowercase,
+                    _stop_words(stop_words), (int(low), int(high)), encoding)
+
+
+def _tokens(text: str, options: _Options) -> list[str]:
+    if options.lowercase:
+        text = text.lower()
+    if options.tokenizer == "nltk":
+        from nltk.tokenize import word_tokenize
+
+        words = [w for w in word_tokenize(text) if w.isalpha()]
+    else:
+        words = options.pattern.findall(text)
+    stop = options.stop_words
+    return [w for w in words if w not in stop] if stop else words
+
+
+def _terms(words: list[str], ngram_range: tuple[int, int]) -> list[str]:
+    low, high = ngram_range
+    if high == 1:
+        return words
+    terms = words[:] if low == 1 else []
+    for n in range(max(low, 2), high + 1):
+        terms += [" ".join(words[i:i + n]) for i in range(len(words) - n + 1)]
+    return terms
+
+
+# ---------------------------------------------------------------------------
+# Counting (in worker processes)
+# ---------------------------------------------------------------------------
+
+def _count_lines(lines: Iterable[str], options: _Options) -> tuple:
+    """Local vocabulary and CSR arrays of counts for a run of documents."""
+    vocab: dict[str, int] = {}
+    add = vocab.setdefault
+    indices = array("i")
+    indptr = array("q", [0])
+    for line in lines:
+        terms = _terms(_tokens(line, options), options.ngram_range)
+        # len(vocab) is evaluated before a new term is inserted.
+        indices.extend([add(term, len(vocab)) for term in terms])
+        indptr.append(len(indices))
+    indices = np.frombuffer(indices, dtype=np.int32)
+    indptr = np.frombuffer(indptr, dtype=np.int64)
+    counts = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), indices, indptr),
+        shape=(len(indptr) - 1, len(vocab)),
+    )
+    counts.sum_duplicates()     # repeated terms within a document
+    return np.array(list(vocab), dtype=object), counts
+
+
+def _count_range(path: str, lo: int, hi: int, options: _Options) -> tuple:
+    """Count the lines that *start* inside bytes ``[lo, hi)`` of ``path``."""
+    with open(path, "rb") as f:
+        if lo:
+            f.seek(lo - 1)
+            f.readline()
+        begin = f.tell()
+        data = b""
+        if begin < hi:
+            f.seek(hi - 1)
+            f.readline()
+            end = f.tell()
+            f.seek(begin)
+            data = f.read(end - begin)
+    text = data.decode(options.encoding, errors="replace")
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return _count_lines((line.rstrip("\r") for line in lines), options)
+
+
+def _file_tasks(path: Path, chunk_bytes: int) -> list:
+    size = path.stat().st_size
+    return [(str(path), lo, min(lo + chunk_bytes, size)) for lo in range(0, size, chunk_bytes)]
+
+
+def _merge(parts: list) -> tuple[np.ndarray, sparse.csr_matrix]:
+    """Stack per-task counts on one vocabulary sorted alphabetically."""
+    if not parts:
+        return np.array([], dtype=object), sparse.csr_matrix((0, 0), dtype=np.int32)
+    terms, inverse = np.unique(np.concatenate([vocab for vocab, _ in parts]), return_inverse=True)
+    blocks, offset = [], 0
+    for vocab, counts in parts:
+        remap = inverse[offset:offset + len(vocab)].astype(np.int32)
+        offset += len(vocab)
+        blocks.append(sparse.csr_matrix(
+            (counts.data, remap[counts.indices], counts.indptr),
+            shape=(counts.shape[0], len(terms)),
+        ))
+    matrix = sparse.vstack(blocks, format="csr", dtype=np.int32)
+    matrix.sort_indices()
+    return terms, matrix
+
+
+def _batches(lines: Iterable[str], size: int):
+    it = iter(lines)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+@dataclass
+class DocumentTermMatrix:
+    """Counts of every term in every document.
+
+    Attributes:
+        matrix: ``documents × terms`` CSR matrix of counts; row ``i`` is the
+            ``i``-th line (or string) of the input.
+        terms: The term of every column, sorted; n-grams are joined by spaces.
+    """
+
+    matrix: sparse.csr_matrix
+    terms: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.matrix.shape
+
+    @cached_property
+    def vocabulary(self) -> dict[str, int]:
+        """Column of every term."""
+        return {term: i for i, term in enumerate(self.terms)}
+
+    def frequencies(self, n: Optional[int] = None) -> pd.Series:
+        """Total count of every term, most frequent first.
+
+        Args:
+            n: Only terms of ``n`` words (e.g. ``2`` for bigrams).
+        """
+        totals = np.asarray(self.matrix.sum(axis=0)).ravel()
+        freq = pd.Series(totals, index=pd.Index(self.terms, name="term"), name="count")
+        if n is not None:
+            freq = freq[freq.index.str.count(" ") == n - 1]
+        return freq.sort_values(ascending=False, kind="stable")
+
+    def most_common(self, k: Optional[int] = None, n: Optional[int] = None) -> list[tuple[str, int]]:
+        """``Counter.most_common`` for the matrix: ``(term, count)`` pairs."""
+        freq = self.frequencies(n)
+        if k is not None:
+            freq = freq.iloc[:k]
+        return list(zip(freq.index, freq.to_numpy().tolist()))
+
+    def document_frequency(self) -> np.ndarray:
+        """Number of documents containing each term."""
+        return np.bincount(self.matrix.indices, minlength=self.shape[1])
+
+    def prune(self, min_df: int = 1, max_df: float = 1.0,
+              max_terms: Optional[int] = None) -> "DocumentTermMatrix":
+        """Keep the terms in at least ``min_df`` and at most ``max_df`` of documents.
+
+        Args:
+            min_df: Minimum number of documents.
+            max_df: Maximum fraction of documents.
+            max_terms: Then keep only this many of the most frequent terms.
+
+        Returns:
+            DocumentTermMatrix: The smaller matrix (columns renumbered).
+        """
+        df = self.document_frequency()
+        keep = np.flatnonzero((df >= min_df) & (df <= max_df * self.shape[0]))
+        if max_terms is not None and len(keep) > max_terms:
+            totals = np.asarray(self.matrix[:, keep].sum(axis=0)).ravel()
+            keep = np.sort(keep[np.argsort(-totals, kind="stable")[:max_terms]])
+        return DocumentTermMatrix(self.matrix[:, keep], self.terms[keep])
+
+    def tfidf(self, *, norm: Optional[str] = "l2", smooth_idf: bool = True,
+              sublinear_tf: bool = False) -> sparse.csr_matrix:
+        """TF-IDF weights with scikit-learn's ``TfidfTransformer`` conventions.
+
+        ``idf = ln((1 + n) / (1 + df)) + 1`` (without the ``1 +`` terms when
+        ``smooth_idf=False``) and each row scaled to unit length.
+
+        Args:
+            norm: ``"l2"``, ``"l1"`` or ``None``.
+            smooth_idf: Add one to the document counts.
+            sublinear_tf: Use ``1 + ln(tf)`` instead of ``tf``.
+
+        Returns:
+            scipy.sparse.csr_matrix: ``documents × terms`` float64 weights.
+        """
+        n = self.shape[0] + smooth_idf
+        idf = np.log(n / (self.document_frequency() + smooth_idf)) + 1.0
+        weights = self.matrix.astype(np.float64)
+        if sublinear_tf:
+            weights.data = 1.0 + np.log(weights.data)
+        weights.data *= idf[weights.indices]
+        if norm is not None:
+            if norm == "l2":
+                lengths = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+            elif norm == "l1":
+                lengths = np.asarray(abs(weights).sum(axis=1)).ravel()
+            else:
+                raise ValueError("norm must be 'l2', 'l1' or None")
+            lengths[lengths == 0] = 1.0
+            weights.data /= np.repeat(lengths, np.diff(weights.indptr))
+        return weights
+
+    def cooccurrence(self, *, binary: bool = True) -> sparse.csr_matrix:
+        """``terms × terms`` counts of documents containing both terms.
+
+        With ``binary=False`` the products of the counts are summed instead.
+        The diagonal holds each term's own document frequency (or sum of
+        squared counts).
+        """
+        counts = self.matrix
+        if binary:
+            counts = counts.copy()
+            counts.data[:] = 1
+        return (counts.T @ counts).tocsr()
+
+
+@profiled
+def document_term_matrix(
+    source: Union[PathLike, Iterable[str]],
+    *,
+    ngram_range: tuple[int, int] = (1, 1),
+    stop_words: StopWords = "english",
+    tokenizer: str = "regex",
+    token_pattern: Union[str, "re.Pattern[str]"] = TOKEN_PATTERN,
+    lowercase: bool = True,
+    min_df: int = 1,
+    max_terms: Optional[int] = None,
+    n_jobs: Optional[int] = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    encoding: str = "utf-8",
+) -> DocumentTermMatrix:
+    """Tokenise documents in parallel and count their terms.
+
+    Args:
+        source: A text file with one document per line, or an iterable of
+            strings (consumed in batches of ``batch_size``).
+        ngram_range: Smallest and largest n-gram, e.g. ``(1, 2)`` for words
+            and bigrams.  N-grams are formed after stop words are removed.
+        stop_words: ``"english"``, a collection of words to drop, or ``None``.
+        tokenizer: ``"regex"`` or ``"nltk"`` (needs NLTK and its ``punkt``
+            data in every worker).
+        token_pattern: Regular expression matching one token (regex path).
+        lowercase: Lower-case documents first.
+        min_df: Drop terms that occur in fewer documents.
+        max_terms: Keep only this many of the most frequent terms.
+        n_jobs: Worker processes (``None`` = ``os.cpu_count()``).
+        chunk_bytes: Bytes of a file per task.
+        batch_size: Strings per task for an iterable source.
+        encoding: Encoding of the file.
+
+    Returns:
+        DocumentTermMatrix: Counts and the vocabulary.
+    """
+    options = _options(tokenizer, token_pattern, lowercase, stop_words, ngram_range, encoding)
+    n_jobs = max(1, n_jobs or os.cpu_count() or 1)
+
+    if isinstance(source, (str, os.PathLike)):
+        tasks = _file_tasks(Path(source), chunk_bytes)
+        n_jobs = min(n_jobs, max(len(tasks), 1))
+        if n_jobs == 1:
+            parts = [_count_range(*task, options) for task in tasks]
+        else:
+            with ProcessPoolExecutor(n_jobs) as pool:
+                parts = list(pool.map(_count_range, *zip(*tasks), [options] * len(tasks)))
+    elif n_jobs == 1:
+        parts = [_count_lines(batch, options) for batch in _batches(source, batch_size)]
+    else:
+        # Keep a few batches in flight so a long iterable is never all in memory.
+        parts, pending = [], deque()
+        with ProcessPoolExecutor(n_jobs) as pool:
+            for batch in _batches(source, batch_size):
+                pending.append(pool.submit(_count_lines, batch, options))
+                if len(pending) >= 2 * n_jobs:
+                    parts.append(pending.popleft().result())
+            parts += [future.result() for future in pending]
+
+    terms, matrix = _merge(parts)
+    dtm = DocumentTermMatrix(matrix, terms)
+    if min_df > 1 or max_terms is not None:
+        dtm = dtm.prune(min_df=min_df, max_terms=max_terms)
+    return dtm
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fns_toolkit.aggregate import FoodLogAggregate, summarize_nutrients
+
+
+@pytest.fixture
+def log():
+    rng = np.random.default_rng(8)
+    n = 600
+    return pd.DataFrame({
+        "ID": rng.integers(1, 50, n),
+        "Meal": rng.choice(["Breakfast", "Lunch", "Dinner"], n),
+        "Nutrient": rng.choice(["Protein", "Fat", "Sugar"], n),
+        "Amount": rng.gamma(2.0, 10.0, n).round(2),
+    })
+
+
+def _exact(df, stat="mean"):
+    return df.groupby(["Meal", "Nutrient"])["Amount"].agg(stat).unstack()
+
+
+def test_dataframe_summary_matches_groupby(log):
+    result = summarize_nutrients(log, "Meal")
+    expected = _exact(log)
+    pd.testing.assert_frame_equal(result.loc[expected.index, expected.columns], expected,
+                                  check_names=False, rtol=1e-9)
+
+
+def test_state_reads_only_appended_rows(log, tmp_path):
+    csv, state = tmp_path / "log.csv", tmp_path / "log.agg"
+    log.iloc[:400].to_csv(csv, index=False)
+    summarize_nutrients(csv, "Meal", state=state)
+    log.iloc[400:].to_csv(csv, mode="a", header=False, index=False)
+
+    result = summarize_nutrients(csv, "Meal", state=state, chunk_bytes=1024)
+
+    expected = _exact(log)
+    pd.testing.assert_frame_equal(result.loc[expected.index, expected.columns], expected,
+                                  check_names=False, rtol=1e-9)
+    assert summarize_nutrients(csv, "Meal", state=state).equals(result)
+
+
+def test_state_with_dataframe_is_rejected(log, tmp_path):
+    state = tmp_path / "log.agg"
+    with pytest.raises(ValueError, match="state= needs file input"):
+        summarize_nutrients(log, "Meal", state=state)
+    assert not state.exists()
+
+
+def test_incremental_dataframe_updates_with_an_aggregate(log, tmp_path):
+    agg = FoodLogAggregate("Meal").update(log.iloc[:300])
+    agg.save(tmp_path / "log.agg")
+    agg = FoodLogAggregate.load(tmp_path / "log.agg").update(log.iloc[300:])
+
+    expected = _exact(log, "max")
+    result = agg.summary("max")
+    pd.testing.assert_frame_equal(result.loc[expected.index, expected.columns], expected,
+                                  check_names=False)
+
+
+def test_quoted_header_names(log, tmp_path):
+    csv = tmp_path / "log.csv"
+    log.assign(**{"Energy, kcal": 1.0}).to_csv(csv, index=False)
+
+    result = FoodLogAggregate("Meal").scan(csv, chunk_bytes=2048, n_jobs=2).summary()
+
+    expected = _exact(log)
+    pd.testing.assert_frame_equal(result.loc[expected.index, expected.columns], expected,
+                                  check_names=False, rtol=1e-9)
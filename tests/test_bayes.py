@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+pm = pytest.importorskip("pymc")
+
+from fns_toolkit import bayes  # noqa: E402
+
+
+def _model(observed=np.arange(5.0)):
+    with pm.Model() as model:
+        mu = pm.Normal("mu", 0, 10)
+        pm.Normal("y", mu, 1, observed=observed)
+    return model
+
+
+def test_fingerprint_is_stable_across_rebuilds():
+    kwargs = dict(draws=20, tune=20, chains=1, random_seed=1)
+    assert bayes.fingerprint(_model(), **kwargs) == bayes.fingerprint(_model(), **kwargs)
+
+
+def test_fingerprint_changes_with_data_and_settings():
+    key = bayes.fingerprint(_model(), draws=20, random_seed=1)
+    assert bayes.fingerprint(_model(np.arange(6.0)), draws=20, random_seed=1) != key
+    assert bayes.fingerprint(_model(), draws=30, random_seed=1) != key
+
+
+def test_second_sample_is_served_from_cache(tmp_path, monkeypatch):
+    kwargs = dict(draws=20, tune=20, chains=1, cores=1, random_seed=1,
+                  progressbar=False, compute_convergence_checks=False)
+    first = bayes.sample(_model(), cache_dir=tmp_path, **kwargs)
+    assert len(bayes.cache_info(tmp_path)) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("pm.sample called on a cache hit")
+
+    monkeypatch.setattr(pm, "sample", fail)
+    second = bayes.sample(_model(), cache_dir=tmp_path, **kwargs)
+    np.testing.assert_array_equal(first.posterior["mu"].values, second.posterior["mu"].values)
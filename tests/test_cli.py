@@ -0,0 +1,107 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from fns_toolkit.cli import download, fetch
+
+PAYLOAD = bytes(range(256)) * 1000
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves ``server.files`` and honours ``Range: bytes=N-`` like a CDN."""
+
+    def do_GET(self):
+        body = self.server.files.get(self.path.lstrip("/"))
+        self.server.requests.append((self.path, self.headers.get("Range")))
+        if body is None:
+            self.send_error(404)
+            return
+        status, start = 200, 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            if start >= len(body):
+                self.send_error(416)
+                return
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body) - start))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+        self.wfile.write(body[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.files, httpd.requests = {}, []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _entry(name, path, body):
+    return {"name": name, "path": path, "sha256": hashlib.sha256(body).hexdigest(),
+            "size": len(body)}
+
+
+def test_resumes_from_part_file(server, tmp_path):
+    server.files["data/a.csv"] = PAYLOAD
+    part = tmp_path / "data" / "a.csv.part"
+    part.parent.mkdir()
+    part.write_bytes(PAYLOAD[:100_000])
+
+    status = fetch(_entry("a", "data/a.csv", PAYLOAD), tmp_path, server.url)
+
+    assert status == "resumed"
+    assert server.requests == [("/data/a.csv", "bytes=100000-")]
+    assert (tmp_path / "data" / "a.csv").read_bytes() == PAYLOAD
+    assert not part.exists()
+
+
+def test_checksum_mismatch_retries_then_fails(server, tmp_path):
+    server.files["a.csv"] = PAYLOAD
+    entry = _entry("a", "a.csv", PAYLOAD[::-1])
+
+    with pytest.raises(ValueError, match="SHA-256 mismatch after 2 attempts"):
+        fetch(entry, tmp_path, server.url, retries=1)
+
+    assert len(server.requests) == 2
+    assert not (tmp_path / "a.csv").exists()
+    assert not (tmp_path / "a.csv.part").exists()
+
+
+def test_download_skips_verified_files(server, tmp_path):
+    other = PAYLOAD[:5000]
+    server.files.update({"a.csv": PAYLOAD, "b.csv": other})
+    manifest = {"base_url": server.url,
+                "files": [_entry("a", "a.csv", PAYLOAD), _entry("b", "b.csv", other)]}
+    (tmp_path / "a.csv").write_bytes(PAYLOAD)
+
+    results = download(dest=tmp_path, manifest=manifest, workers=2)
+
+    assert results == {"a": "skipped", "b": "downloaded"}
+    assert [path for path, _ in server.requests] == ["/b.csv"]
+    assert download(dest=tmp_path, manifest=manifest) == {"a": "skipped", "b": "skipped"}
+    assert len(server.requests) == 1
+
+
+def test_download_reports_failures_without_stopping(server, tmp_path):
+    server.files["a.csv"] = PAYLOAD
+    manifest = {"base_url": server.url,
+                "files": [_entry("a", "a.csv", PAYLOAD), _entry("gone", "gone.csv", b"x")]}
+
+    results = download(dest=tmp_path, manifest=manifest)
+
+    assert results["a"] == "downloaded"
+    assert results["gone"].startswith("failed: 404")
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fns_toolkit.stats import correlate
+
+RTOL = 1e-10
+
+
+@pytest.fixture(scope="module")
+def features():
+    rng = np.random.default_rng(11)
+    x = rng.normal(size=(200, 12))
+    x[:, 1] += 2 * x[:, 0]
+    x[:, 5] -= x[:, 4]
+    x[rng.random(x.shape) < 0.05] = np.nan
+    return pd.DataFrame(x, columns=[f"m{i}" for i in range(12)])
+
+
+@pytest.mark.parametrize("block_size", [None, 5])
+def test_full_matrix_matches_pandas(features, block_size):
+    result = correlate(features, block_size=block_size)
+    pd.testing.assert_frame_equal(result, features.corr(), rtol=RTOL)
+
+
+def test_top_k_are_the_strongest_partners(features):
+    result = correlate(features, top_k=2, block_size=4)
+
+    expected = features.corr().abs()
+    np.fill_diagonal(expected.values, -np.inf)
+    for name, part in result.groupby("feature", sort=False):
+        assert list(part["partner"]) == list(expected[name].nlargest(2).index)
+    assert len(result) == 2 * features.shape[1]
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_top_k_below_one_is_rejected(features, top_k):
+    with pytest.raises(ValueError, match="top_k must be at least 1"):
+        correlate(features, top_k=top_k)
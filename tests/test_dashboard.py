@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fns_toolkit.dashboard import NutrientCube
+
+RTOL = 1e-10
+
+
+@pytest.fixture(scope="module")
+def log():
+    rng = np.random.default_rng(21)
+    n = 1500
+    return pd.DataFrame({
+        "ID": rng.integers(1, 6, n),
+        "Meal": rng.choice(["Breakfast", "Lunch", "Dinner"], n),
+        "Nutrient": rng.choice(["Iron", "Calcium", "Protein"], n),
+        "Amount": rng.gamma(3.0, 5.0, n),
+        "Date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D"),
+    })
+
+
+def test_query_matches_groupby(log):
+    cube = NutrientCube().update(log.iloc[:700]).update(log.iloc[700:])
+
+    result = cube.query(("Meal", "Nutrient"), Nutrient=["Iron", "Calcium"])
+
+    rows = log[log["Nutrient"].isin(["Iron", "Calcium"])]
+    expected = rows.groupby(["Meal", "Nutrient"])["Amount"].agg(["count", "mean", "std"])
+    got = result.loc[expected.index]
+    np.testing.assert_array_equal(got["count"], expected["count"])
+    np.testing.assert_allclose(got[["mean", "std"]], expected[["mean", "std"]], rtol=RTOL)
+
+
+@pytest.mark.parametrize("value", [1, np.int64(1), "1", [1], np.array([1]), pd.Series([1])])
+def test_scalar_and_list_filters_agree(log, value):
+    cube = NutrientCube().update(log)
+
+    result = cube.query("Meal", ID=value)
+
+    expected = log[log["ID"] == 1].groupby("Meal")["Amount"].mean()
+    np.testing.assert_allclose(result.loc[expected.index, "mean"], expected, rtol=RTOL)
+    assert cube.query("Meal", ID=[np.int64(1), 2]).equals(cube.query("Meal", ID=["2", "1"]))
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from fns_toolkit.db import TABLE, FoodLogDB
+
+ROWS = [
+    "1,Breakfast,Protein,10.5,2024-01-01",
+    "1,Lunch,Fat,3.0,2024-01-01",
+    "2,Dinner,Protein,22.0,2024-01-02",
+]
+
+
+def _write(path, rows, *, mode="w", header=True):
+    with open(path, mode) as f:
+        if header:
+            f.write("ID,Meal,Nutrient,Amount,Date\n")
+        f.write("".join(r + "\n" for r in rows))
+
+
+def _count(db):
+    return db.query(f"SELECT COUNT(*) AS n FROM {TABLE}")["n"].iloc[0]
+
+
+def test_append_loads_only_new_rows(tmp_path):
+    csv = tmp_path / "log.csv"
+    _write(csv, ROWS[:2])
+    with FoodLogDB(tmp_path / "log.db") as db:
+        assert db.load_csv(csv) == 2
+        assert db.load_csv(csv) == 0
+        _write(csv, ROWS[2:], mode="a", header=False)
+        assert db.load_csv(csv, chunk_bytes=16) == 1
+        assert _count(db) == 3
+        summary = db.summary("Meal", nutrient="Protein", wide=False)
+        assert summary.set_index("Meal")["value"].to_dict() == {"Breakfast": 10.5, "Dinner": 22.0}
+
+
+def test_partial_last_line_waits_for_next_load(tmp_path):
+    csv = tmp_path / "log.csv"
+    _write(csv, ROWS[:2])
+    with open(csv, "a") as f:
+        f.write("2,Dinner,Prot")
+    with FoodLogDB(tmp_path / "log.db") as db:
+        assert db.load_csv(csv) == 2
+        with open(csv, "a") as f:
+            f.write("ein,22.0,2024-01-02\n")
+        assert db.load_csv(csv) == 1
+        assert db.participant("2")["Amount"].tolist() == [22.0]
+
+
+def test_shrunk_file_is_rejected(tmp_path):
+    csv = tmp_path / "log.csv"
+    _write(csv, ROWS)
+    with FoodLogDB(tmp_path / "log.db") as db:
+        db.load_csv(csv)
+        _write(csv, ROWS[:1])
+        with pytest.raises(ValueError, match="shorter"):
+            db.load_csv(csv)
+        assert db.load_csv(csv, replace=True) == 1
+
+
+def test_row_count_load_log_is_migrated(tmp_path):
+    csv, path = tmp_path / "log.csv", tmp_path / "log.db"
+    _write(csv, ROWS)
+    # A database written before byte offsets were stored: two rows loaded.
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE load_log (source TEXT PRIMARY KEY, rows INTEGER NOT NULL)")
+        conn.execute("INSERT INTO load_log VALUES (?, 2)", (str(csv.resolve()),))
+        pd.read_csv(csv).head(2).to_sql(TABLE, conn, index=False)
+    with FoodLogDB(path) as db:
+        assert db.load_csv(csv) == 1
+        assert _count(db) == 3
@@ -0,0 +1,148 @@
+"""Agreement of the mergeable Table 1 state with one pandas ``groupby`` pass.
+
+Tolerances: moments to ``RTOL`` relative whatever the chunking; ``"exact"``
+quantiles match ``Series.quantile``; ``"approx"`` quantiles are within
+``relative_accuracy`` (1%) plus interpolation, checked at ``RTOL_APPROX``.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fns_toolkit.describe import OVERALL, TableOne, table_one
+
+RTOL = 1e-10
+RTOL_APPROX = 0.03
+CONTINUOUS = ["Age", "BMI"]
+CATEGORICAL = ["Sex", "Smoking"]
+
+
+@pytest.fixture(scope="module")
+def cohort():
+    rng = np.random.default_rng(2302)
+    n = 2000
+    df = pd.DataFrame({
+        # A large offset checks that the merged sums of squares keep precision.
+        "Age": rng.normal(1e6 + 55, 10, n),
+        "BMI": rng.gamma(30, 0.9, n),
+        "Sex": rng.choice(["F", "M"], n),
+        "Smoking": rng.choice(["Never", "Former", "Current"], n),
+        "Group": rng.choice(["A", "B", "C"], n, p=[0.5, 0.45, 0.05]),
+    })
+    df.loc[rng.random(n) < 0.05, "BMI"] = np.nan
+    df.loc[rng.random(n) < 0.03, "Smoking"] = np.nan
+    df.loc[rng.random(n) < 0.02, "Group"] = np.nan
+    # Sorted by BMI, the chunks differ in their missing values and extremes.
+    return df.sort_values("BMI", na_position="first").reset_index(drop=True)
+
+
+def _reference(df):
+    rows = df[df["Group"].notna()]
+    stats = ["count", "mean", "std", "min", "max", "median"]
+    by_group = rows.groupby("Group")[CONTINUOUS].agg(stats)
+    overall = rows[CONTINUOUS].agg(stats).unstack().to_frame(OVERALL).T
+    return pd.concat([by_group, overall])
+
+
+def _check_moments(table, df, *, median_rtol=None):
+    moments = table.moments()
+    reference = _reference(df)
+    for var in CONTINUOUS:
+        got = moments.loc[var].loc[reference.index]
+        want = reference[var]
+        np.testing.assert_array_equal(got["n"], want["count"])
+        for stat in ("mean", "std", "min", "max"):
+            np.testing.assert_allclose(got[stat], want[stat], rtol=RTOL, err_msg=f"{var} {stat}")
+        if median_rtol is not None:
+            np.testing.assert_allclose(got["median"], want["median"], rtol=median_rtol)
+
+
+def _check_frequencies(table, df):
+    freqs = table.frequencies()
+    rows = df[df["Group"].notna()]
+    for var in CATEGORICAL:
+        want = rows.groupby("Group")[var].value_counts(dropna=False)
+        for (group, level), count in want.items():
+            counts = freqs.loc[var].xs(group, level="stratum")["count"]
+            got = counts[counts.index.isna()].iloc[0] if pd.isna(level) else counts[level]
+            assert got == count, (var, group, level)
+
+
+def test_dataframe_matches_groupby(cohort):
+    table = TableOne(CONTINUOUS, CATEGORICAL, by="Group", quantiles="exact").update(cohort)
+
+    _check_moments(table, cohort, median_rtol=RTOL)
+    _check_frequencies(table, cohort)
+    assert table.rows.sum() == cohort["Group"].notna().sum()
+    moments = table.moments()
+    quartiles = cohort.groupby("Group")["BMI"].quantile([0.25, 0.75]).unstack()
+    np.testing.assert_allclose(moments.loc["BMI"].loc[["A", "B", "C"], ["q1", "q3"]],
+                               quartiles, rtol=RTOL)
+
+
+def _chunks(df, n):
+    bounds = np.linspace(0, len(df), n + 1).astype(int)
+    return [df.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def test_chunks_updates_and_merges_agree(cohort):
+    chunks = _chunks(cohort, 7)
+    updated = TableOne(CONTINUOUS, CATEGORICAL, by="Group", quantiles="approx")
+    for chunk in chunks:
+        updated.update(chunk)
+    # Parts that meet the strata in the opposite order, so merge() has to
+    # re-place their rows and sketch buckets.
+    merged = TableOne(CONTINUOUS, CATEGORICAL, by="Group", quantiles="approx")
+    for chunk in _chunks(cohort.sort_values("Group", ascending=False), 5):
+        merged.merge(TableOne(CONTINUOUS, CATEGORICAL, by="Group", quantiles="approx").update(chunk))
+    whole = TableOne(CONTINUOUS, CATEGORICAL, by="Group", quantiles="approx").update(cohort)
+
+    assert merged.strata[0] == "C" and whole.strata[0] != "C"
+    for table in (updated, merged):
+        _check_moments(table, cohort, median_rtol=RTOL_APPROX)
+        _check_frequencies(table, cohort)
+        pd.testing.assert_frame_equal(table.moments(), whole.moments(), rtol=RTOL)
+        pd.testing.assert_frame_equal(table.format(digits=3), whole.format(digits=3))
+    pd.testing.assert_series_equal(merged.sketch.groupby(level=["variable", "bucket"]).sum(),
+                                   whole.sketch.groupby(level=["variable", "bucket"]).sum())
+    pd.testing.assert_frame_equal(
+        table_one(iter(chunks), CONTINUOUS, CATEGORICAL, by="Group", quantiles="exact"),
+        table_one(cohort, CONTINUOUS, CATEGORICAL, by="Group", quantiles="exact"))
+
+
+def test_csv_in_worker_processes_matches_dataframe(cohort, tmp_path):
+    path = tmp_path / "cohort.csv"
+    cohort.to_csv(path, index=False)
+
+    table = TableOne(CONTINUOUS, CATEGORICAL, by="Group", quantiles="exact")
+    table.scan(path, n_jobs=3, chunk_bytes=8192)
+
+    _check_moments(table, cohort, median_rtol=RTOL)
+    _check_frequencies(table, cohort)
+    expected = table_one(cohort, CONTINUOUS, CATEGORICAL, by="Group", quantiles="exact")
+    from_csv = table_one(path, CONTINUOUS, CATEGORICAL, by="Group", quantiles="exact",
+                         n_jobs=2, chunk_bytes=8192)
+    pd.testing.assert_frame_equal(from_csv, expected)
+
+
+def test_saved_state_reads_only_appended_rows(cohort, tmp_path):
+    path, state = tmp_path / "cohort.csv", tmp_path / "cohort.t1"
+    cohort.iloc[:1200].to_csv(path, index=False)
+    TableOne(CONTINUOUS, CATEGORICAL, by="Group").scan(path).save(state)
+    cohort.iloc[1200:].to_csv(path, mode="a", header=False, index=False)
+
+    table = TableOne.load(state).scan(path, chunk_bytes=4096, n_jobs=2)
+
+    _check_moments(table, cohort)
+    _check_frequencies(table, cohort)
+    assert table.scan(path).rows.sum() == table.rows.sum()
+
+
+def test_unstratified_table_and_bad_merge(cohort):
+    table = TableOne(CONTINUOUS, CATEGORICAL).update(cohort)
+    moments = table.moments().loc["BMI"]
+
+    assert list(moments.index) == [OVERALL]
+    assert moments.at[OVERALL, "mean"] == pytest.approx(cohort["BMI"].mean(), rel=RTOL)
+    with pytest.raises(ValueError, match="same variables"):
+        table.merge(TableOne(CONTINUOUS, CATEGORICAL, by="Group"))
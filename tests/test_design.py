@@ -0,0 +1,86 @@
+"""Simulated power against analytic power, and independence from ``n_jobs``.
+
+Tolerance: an estimate may differ from the analytic power by ``MC_SES``
+Monte Carlo standard errors.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fns_toolkit.design import power, sample_size
+
+MC_SES = 4
+REPLICATES = 4000
+
+
+def test_t_power_matches_statsmodels():
+    from statsmodels.stats.power import TTestIndPower
+
+    result = power("t", n=[30, 60, 120], effect=[0.3, 0.6], sd=[1.0, 2.0],
+                   allocation=[1.0, 2.0], replicates=REPLICATES, seed=7)
+
+    analytic = TTestIndPower()
+    for row in result.itertuples():
+        expected = analytic.power(effect_size=row.effect / row.sd, nobs1=row.n_control,
+                                  alpha=row.alpha, ratio=row.n_treatment / row.n_control)
+        se = np.sqrt(expected * (1 - expected) / REPLICATES)
+        assert abs(row.power - expected) <= MC_SES * se, row
+
+
+@pytest.mark.parametrize("test, params", [
+    ("t", {"effect": 0.0}),
+    ("ancova", {"effect": 0.0, "correlation": 0.7}),
+    ("logrank", {"hazard_ratio": 1.0, "follow_up": 2.0, "dropout": 0.2}),
+])
+def test_type_one_error_is_alpha(test, params):
+    result = power(test, n=80, alpha=0.05, replicates=REPLICATES, seed=3, **params)
+    assert abs(result["power"].iloc[0] - 0.05) <= MC_SES * np.sqrt(0.05 * 0.95 / REPLICATES)
+
+
+def test_ancova_gains_the_baseline_variance():
+    from statsmodels.stats.power import TTestIndPower
+
+    rho = 0.8
+    result = power("ancova", n=60, effect=0.4, correlation=rho, replicates=REPLICATES, seed=5)
+    # Adjusting for the baseline leaves a residual SD of sd·√(1-ρ²); the
+    # slack covers the degree of freedom and the variance of the slope.
+    expected = TTestIndPower().power(effect_size=0.4 / np.sqrt(1 - rho ** 2), nobs1=30,
+                                     alpha=0.05, ratio=1.0)
+    se = np.sqrt(expected * (1 - expected) / REPLICATES)
+    assert abs(result["power"].iloc[0] - expected) <= MC_SES * se + 0.01
+
+
+@pytest.mark.parametrize("test, params", [
+    ("t", {"effect": [0.3, 0.5], "sd": 1.0}),
+    ("logrank", {"hazard_ratio": 0.6, "median_control": 3.0, "follow_up": 12.0}),
+])
+def test_power_does_not_depend_on_n_jobs(test, params):
+    kwargs = dict(n=[40, 90], replicates=1700, batch_size=250, seed=11, **params)
+    pd.testing.assert_frame_equal(power(test, n_jobs=1, **kwargs), power(test, n_jobs=3, **kwargs))
+
+
+def test_sample_size_does_not_depend_on_n_jobs():
+    kwargs = dict(effect=0.5, target=0.8, replicates=2000, seed=13)
+    serial = sample_size("t", n_jobs=1, **kwargs)
+    parallel = sample_size("t", n_jobs=2, **kwargs)
+
+    assert (serial.n, serial.power) == (parallel.n, parallel.power)
+    pd.testing.assert_frame_equal(serial.evaluations, parallel.evaluations)
+    below = serial.evaluations.query("n < @serial.n")["power"]
+    assert serial.power >= 0.8 and (below < 0.8).all()
+    # The analytic answer is 128 (64 per arm).
+    assert abs(serial.n - 128) <= 12
+
+
+def test_invalid_designs_are_rejected():
+    with pytest.raises(ValueError, match="Unknown test"):
+        power("anova", n=10, effect=1)
+    with pytest.raises(TypeError, match="needs effect"):
+        power("t", n=10)
+    with pytest.raises(TypeError, match="does not take"):
+        power("t", n=10, effect=1, hazard_ratio=0.5)
+    with pytest.raises(ValueError, match="too small"):
+        power("t", n=3, effect=1)
+    with pytest.raises(ValueError, match="scalar"):
+        sample_size("t", effect=[0.2, 0.4], replicates=100)
@@ -0,0 +1,29 @@
+"""``import fns_toolkit`` stays within budget and imports no heavy dependency."""
+
+import importlib.util
+import statistics
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parents[1] / "benchmarks" / "import_time.py"
+_spec = importlib.util.spec_from_file_location("import_time", SCRIPT)
+import_time = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(import_time)
+
+
+def test_bare_import_is_within_budget():
+    profiles = [import_time.import_profile() for _ in range(5)]
+    total_ms = statistics.median(p["fns_toolkit"] for p in profiles) / 1e3
+    assert total_ms <= import_time.DEFAULT_BUDGET_MS
+
+
+def test_bare_import_pulls_in_no_heavy_module():
+    imported = {name.split(".")[0] for name in import_time.import_profile()}
+    assert not imported & set(import_time.HEAVY)
+
+
+def test_exports_and_submodules_resolve_on_first_use():
+    import fns_toolkit
+
+    assert callable(fns_toolkit.snake_case_columns)
+    assert fns_toolkit.describe.TableOne is not None
+    assert {"cleaning", "models", "get_dataset"} <= set(dir(fns_toolkit))
@@ -0,0 +1,99 @@
+"""Scores against stored reference values.
+
+The ``index_scores.txt`` blocks are the verbatim output of notebook 10.9's
+``nutrition_index.f90`` (gfortran, single-precision ``real``) for the
+intakes beside them; they agree with the float64 scores to ``RTOL``.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fns_toolkit.indices import NUTRITIONAL_INDEX, Component, DietaryIndex, score
+
+RTOL = 1e-6
+
+# Notebook 10.9's five participants.
+NOTEBOOK_INTAKES = {"Sugar_Intake": [40, 55, 30, 60, 25], "SFA_Intake": [20, 35, 15, 40, 10]}
+NOTEBOOK_SCORES = """\
+   28.0000000
+   43.0000000
+   21.0000000
+   48.0000000
+   16.0000000
+"""
+
+FRACTIONAL_INTAKES = {"Sugar_Intake": [12.3, 81.25, 0.5, 47.9, 103.6],
+                      "SFA_Intake": [7.7, 33.1, 0.05, 21.4, 58.2]}
+FRACTIONAL_SCORES = """\
+   9.53999996
+   52.3600006
+  0.230000004
+   32.0000000
+   76.3600006
+"""
+
+
+def _fortran(text):
+    return pd.read_csv(io.StringIO(text), header=None, sep=r"\s+")[0].to_numpy()
+
+
+@pytest.mark.parametrize("intakes, expected", [
+    (NOTEBOOK_INTAKES, NOTEBOOK_SCORES),
+    (FRACTIONAL_INTAKES, FRACTIONAL_SCORES),
+])
+def test_nutritional_index_matches_fortran(intakes, expected):
+    data = pd.DataFrame(intakes, index=[f"P{i}" for i in range(1, 6)])
+    result = NUTRITIONAL_INDEX.score(data)
+
+    assert result.name == "Nutritional_Index"
+    assert list(result.index) == list(data.index)
+    np.testing.assert_allclose(result.to_numpy(), _fortran(expected), rtol=RTOL)
+    # The mapping input path and the spec round-trip give the same scores.
+    mapping = {k: np.asarray(v, dtype=float) for k, v in intakes.items()}
+    np.testing.assert_allclose(score(mapping, NUTRITIONAL_INDEX.to_dict()), result.to_numpy())
+
+
+def test_standards_caps_and_energy_adjustment():
+    index = DietaryIndex("fibre_sugar", [
+        Component("Fibre", weight=10, zero=0, full=14, per_energy=1000),
+        Component("Sugar", weight=10, zero=25, full=10, kcal_per_g=4),
+        Component("Salt", weight=0.5, cap=6),
+    ], energy="Energy_kcal")
+    data = pd.DataFrame({
+        "Fibre": [14.0, 35.0, 0.0, np.nan],
+        "Sugar": [50.0, 25.0, 125.0, 10.0],
+        "Salt": [3.0, 9.0, 6.0, 1.0],
+        "Energy_kcal": [2000.0, 2500.0, 2000.0, 1600.0],
+    })
+
+    out = index.score(data, components=True)
+
+    # Fibre: 7, 14, 0 g/1000 kcal -> 5, 10, 0 points.
+    # Sugar: 10, 4, 25 % energy -> 10, 10, 0 points (moderation; clipped).
+    # Salt: 0.5 x min(g, 6).
+    expected = pd.DataFrame({
+        "Fibre": [5.0, 10.0, 0.0, np.nan],
+        "Sugar": [10.0, 10.0, 0.0, 10.0],
+        "Salt": [1.5, 3.0, 3.0, 0.5],
+    })
+    expected["fibre_sugar"] = [16.5, 23.0, 3.0, np.nan]
+    pd.testing.assert_frame_equal(out, expected, rtol=RTOL)
+    assert index.columns == ["Fibre", "Sugar", "Salt", "Energy_kcal"]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"zero": 0},
+    {"zero": 5, "full": 5},
+    {"per_energy": 1000, "kcal_per_g": 4},
+])
+def test_invalid_components_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        Component("Fibre", **kwargs)
+
+
+def test_energy_adjusted_index_needs_energy_column():
+    with pytest.raises(ValueError, match="energy column"):
+        DietaryIndex("x", [Component("Fibre", per_energy=1000)])
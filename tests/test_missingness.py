@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fns_toolkit.cleaning import MissingnessIndex, missing_patterns
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame(rng.normal(size=(2000, 70)), columns=[f"c{i}" for i in range(70)])
+    df = df.mask(rng.random(df.shape) < np.linspace(0, 0.1, 70))
+    df["Smoking"] = rng.choice(["Never", "Current", None], len(df))
+    return df
+
+
+def test_summaries_match_isna(data):
+    index = missing_patterns(data)
+    mask = data.isna()
+    pd.testing.assert_series_equal(index.missing_counts(), mask.sum(), check_names=False)
+    np.testing.assert_allclose(index.missing_rate(), mask.mean())
+    both = mask.astype(int).T @ mask.astype(int)
+    np.testing.assert_array_equal(index.co_missing().to_numpy(), both.to_numpy())
+    assert len(index.patterns) == len(mask.value_counts())
+    np.testing.assert_array_equal(index.complete_cases(), np.flatnonzero(~mask.any(axis=1)))
+    rows = index.where(missing=["Smoking"], observed=["c69"])
+    np.testing.assert_array_equal(rows, np.flatnonzero(mask["Smoking"] & ~mask["c69"]))
+
+
+def test_chunks_give_the_same_index(data):
+    whole = missing_patterns(data)
+    chunked = MissingnessIndex(data.columns)
+    for start in range(0, len(data), 37):
+        chunked.update(data.iloc[start:start + 37])
+    assert len(chunked) == len(data)
+    def canonical(index):
+        table = index.frequencies()
+        return table.sort_values(list(table.columns)).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(canonical(chunked), canonical(whole))
+    np.testing.assert_array_equal(whole.patterns[whole.codes], chunked.patterns[chunked.codes])
+    np.testing.assert_array_equal(chunked.co_missing(), whole.co_missing())
+
+
+def test_monotone_dropout():
+    visits = pd.DataFrame(np.ones((8, 3)), columns=["Baseline", "Year2", "Year4"])
+    visits.iloc[4:, 2] = np.nan
+    visits.iloc[6:, 1:] = np.nan
+    index = missing_patterns(visits)
+    assert index.is_monotone(["Baseline", "Year2", "Year4"])
+    assert not index.is_monotone(["Year4", "Year2", "Baseline"])
+    assert index.monotone_order() == ["Baseline", "Year2", "Year4"]
+    visits.iloc[0, 1] = np.nan
+    assert missing_patterns(visits).monotone_order() is None
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fns_toolkit.models import LongFormat, ModelData, ModelSpec, fit_many
+
+smf = pytest.importorskip("statsmodels.formula.api")
+
+BMI = {"BMI": {"BMI_Baseline": 0, "BMI_Year2": 2, "BMI_Year4": 4, "BMI_Year6": 6}}
+
+
+@pytest.fixture(scope="module")
+def cohort():
+    rng = np.random.default_rng(7)
+    n = 600
+    df = pd.DataFrame({
+        "ID": np.arange(n),
+        "Age": rng.normal(55, 10, n),
+        "Sex": rng.choice(["F", "M"], n),
+        "Social_Class": rng.choice(["A", "B", "C"], n),
+        "Sugar_Intake": rng.normal(50, 10, n),
+        "SFA_Intake": rng.normal(30, 5, n),
+    })
+    base = 25 + 0.05 * df["Age"] + rng.normal(0, 2, n)
+    for time, column in zip(BMI["BMI"].values(), BMI["BMI"]):
+        df[column] = base + 0.2 * time + rng.normal(0, 1, n)
+    df.loc[rng.random(n) < 0.1, "BMI_Year6"] = np.nan
+    return df
+
+
+def test_long_format_matches_melt(cohort):
+    table = LongFormat.from_dict({"values": BMI}).apply(cohort)
+    ref = pd.melt(cohort, id_vars=[c for c in cohort if not c.startswith("BMI")],
+                  value_vars=list(BMI["BMI"]), var_name="Time", value_name="BMI")
+    ref["Time"] = ref["Time"].map(BMI["BMI"])
+    pd.testing.assert_frame_equal(table[ref.columns], ref, check_dtype=False)
+
+
+def test_subgroup_ols_matches_statsmodels(cohort):
+    result = fit_many(cohort, "{outcome} ~ Age + Sex", variants={"outcome": ["Sugar_Intake", "SFA_Intake"]},
+                      by="Social_Class", subsets={"older": "Age > 55"}, n_jobs=1)
+    part = cohort[(cohort["Social_Class"] == "B") & (cohort["Age"] > 55)]
+    ref = smf.ols("SFA_Intake ~ Age + Sex", part).fit()
+    ours = result[(result["outcome"] == "SFA_Intake") & (result["Social_Class"] == "B")
+                  & (result["subset"] == "older")].set_index("term")
+    np.testing.assert_allclose(ours["estimate"], ref.params[ours.index], rtol=1e-10)
+    np.testing.assert_allclose(ours["std_error"], ref.bse[ours.index], rtol=1e-10)
+    np.testing.assert_allclose(ours["ci_low"], ref.conf_int()[0][ours.index], rtol=1e-10)
+    assert (ours["n_obs"] == ref.nobs).all()
+    assert (result["error"] == "").all()
+
+
+def test_workers_give_the_same_frame(cohort):
+    kwargs = dict(variants={"outcome": ["Sugar_Intake", "SFA_Intake"]}, by="Social_Class")
+    pd.testing.assert_frame_equal(fit_many(cohort, "{outcome} ~ Age", n_jobs=1, **kwargs),
+                                  fit_many(cohort, "{outcome} ~ Age", n_jobs=2, **kwargs))
+
+
+def test_mixedlm_on_long_data_matches_statsmodels(cohort):
+    data = ModelData(cohort, {"values": BMI})
+    spec = ModelSpec("BMI ~ Time + Age + Sex", kind="mixedlm", groups="ID")
+    result = fit_many(data, spec, by="Sex", n_jobs=1)
+    long = data.table.dropna(subset=["BMI"])
+    long = long[long["Sex"] == "F"]
+    ref = smf.mixedlm("BMI ~ Time + Age", long, groups=long["ID"]).fit()
+    ours = result[result["Sex"] == "F"].set_index("term")
+    np.testing.assert_allclose(ours["estimate"], ref.params[ours.index], rtol=1e-6)
+    # The subgroup's own Sex dummy is constant and reported as dropped.
+    assert ours["warnings"].str.contains("Sex").all()
+
+
+def test_failed_design_only_fails_its_variant(cohort):
+    result = fit_many(cohort, "{outcome} ~ Age", variants={"outcome": ["Nope", "Sugar_Intake"]},
+                      by="Social_Class", n_jobs=1)
+    bad = result[result["outcome"] == "Nope"]
+    assert len(bad) == 1 and bad["term"].isna().all()
+    assert bad["error"].iloc[0].startswith("PatsyError")
+    good = result[result["outcome"] == "Sugar_Intake"]
+    assert (good["error"] == "").all() and set(good["Social_Class"]) == {"A", "B", "C"}
+
+
+def test_unbuildable_formula_returns_error_row(cohort):
+    result = fit_many(cohort, "Nope ~ Age")
+    assert len(result) == 1
+    assert result["error"].iloc[0].startswith("PatsyError")
+
+
+def test_failed_fit_keeps_going(cohort):
+    result = fit_many(cohort, "Sugar_Intake ~ Age", subsets={"none": "Age > 1000"}, n_jobs=1)
+    assert result.loc[result["subset"] == "none", "error"].tolist() == ["ValueError: no complete rows"]
+    assert (result.loc[result["subset"].isna(), "error"] == "").all()
@@ -0,0 +1,114 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from fns_toolkit import profiling
+from fns_toolkit.stats import anova
+
+MB = 1 << 20
+
+
+@pytest.fixture
+def profile():
+    profiling.enable()
+    profiling.reset()
+    yield profiling
+    profiling.disable()
+    profiling.reset()
+
+
+def _allocate(nbytes):
+    np.ones(nbytes // 8).sum()
+
+
+@pytest.mark.parametrize("method", ["fork", "spawn"])
+def test_worker_processes_write_to_the_parent_buffer(profile, tmp_path, method):
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"no {method} start method")
+    rng = np.random.default_rng(0)
+    x, groups = rng.normal(size=(60, 5)), np.repeat(["a", "b", "c"], 20)
+
+    with profile.span("outer"):
+        anova(x, groups, ci=False)
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context(method)) as pool:
+            list(pool.map(anova, [x] * 4, [groups] * 4))
+
+    df = profile.records()
+    assert list(df["name"]).count("stats.univariate.anova") == 5
+    assert df["name"].iloc[0] == "outer"
+    outer = df[df["name"] == "outer"].iloc[0]
+    local = df[(df["name"] == "stats.univariate.anova") & (df["pid"] == os.getpid())]
+    workers = df[(df["name"] == "stats.univariate.anova") & (df["pid"] != os.getpid())]
+    assert outer.depth == 0 and outer.pid == os.getpid()
+    assert list(local["depth"]) == [1]
+    assert len(workers) == 4 and (workers["depth"] == 0).all()
+    assert (workers["peak_bytes"] > 0).all()
+    assert (df["shapes"].iloc[1:] == "(60, 5),(60,)").all()
+
+    trace = json.loads(profile.export_chrome_trace(tmp_path / "trace.json").read_text())
+    events = trace["traceEvents"]
+    assert len(events) == len(df) and {e["ph"] for e in events} == {"X"}
+    assert {e["pid"] for e in events} == set(df["pid"])
+    first = events[0]
+    assert first["name"] == "outer" and first["cat"] == "outer"
+    assert first["dur"] == pytest.approx(outer.wall_s * 1e6)
+    assert first["args"]["peak_bytes"] == outer.peak_bytes
+    # Every worker call lies inside the outer span.
+    assert all(first["ts"] <= e["ts"] and e["ts"] + e["dur"] <= first["ts"] + first["dur"]
+               for e in events[1:])
+
+
+def test_nested_span_peaks(profile):
+    with profile.span("outer"):
+        _allocate(32 * MB)
+        with profile.span("inner"):
+            _allocate(8 * MB)
+        with profile.span("sibling"):
+            _allocate(1 * MB)
+
+    df = profile.records().set_index("name")
+    assert list(df["depth"]) == [0, 1, 1]
+    assert 8 * MB <= df.at["inner", "peak_bytes"] < 16 * MB
+    assert 1 * MB <= df.at["sibling", "peak_bytes"] < 8 * MB
+    # The outer peak keeps what was reached before and inside the children.
+    assert df.at["outer", "peak_bytes"] >= 32 * MB
+    summary = profile.summary()
+    assert summary.loc["inner", "calls"] == 1
+    assert summary.loc["outer", "max_peak_bytes"] == df.at["outer", "peak_bytes"]
+
+
+def test_time_only_profiling_records_no_peak(profile):
+    profile.disable()
+    profile.enable(memory=False)
+    with profile.span("timed"):
+        _allocate(MB)
+    df = profile.records()
+    assert df["peak_bytes"].isna().all() and (df["wall_s"] > 0).all()
+
+
+def test_disabled_calls_are_not_recorded(profile):
+    profile.disable()
+    with profile.span("ignored"):
+        pass
+    anova(np.ones((4, 1)), [0, 0, 1, 1], ci=False)
+    assert profile.records().empty
+
+
+def test_ring_buffer_keeps_the_latest_records(tmp_path):
+    buffer = profiling._RingBuffer(tmp_path / "ring.buf", capacity=4)
+    try:
+        for i in range(6):
+            buffer.append((float(i), 1.0, 1.0, -1, 1, 1, 0, b"call", b""))
+        assert list(buffer.read()["start_us"]) == [2.0, 3.0, 4.0, 5.0]
+        shared = profiling._RingBuffer(tmp_path / "ring.buf")
+        assert shared.capacity == 4 and list(shared.read()["start_us"]) == [2.0, 3.0, 4.0, 5.0]
+        shared.close()
+        buffer.clear()
+        assert len(buffer.read()) == 0
+    finally:
+        buffer.close()
+    assert not (tmp_path / "ring.buf").exists()
@@ -0,0 +1,114 @@
+"""Agreement with lifelines (and statsmodels for Breslow ties, which lifelines lacks).
+
+Tolerances: float64 results to ``RTOL`` relative; float32 storage with
+chunking to ``RTOL_FLOAT32``.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fns_toolkit.survival import cox_ph, kaplan_meier, logrank_test
+
+lifelines = pytest.importorskip("lifelines")
+from lifelines.statistics import multivariate_logrank_test  # noqa: E402
+
+RTOL = 1e-6
+RTOL_FLOAT32 = 1e-3
+COVARIATES = ["Age", "BMI", "Sugar"]
+
+
+@pytest.fixture(scope="module")
+def cohort():
+    rng = np.random.default_rng(20240)
+    n = 3000
+    df = pd.DataFrame({
+        "Age": rng.normal(55, 10, n),
+        "BMI": rng.normal(27, 4, n),
+        "Sugar": rng.normal(50, 15, n),
+        "Sex": rng.choice(["F", "M"], n),
+        "Smoking": rng.choice(["Never", "Former", "Current"], n),
+    })
+    hazard = np.exp(0.03 * (df["Age"] - 55) + 0.05 * (df["BMI"] - 27) + 0.2 * (df["Sex"] == "M"))
+    event_time = rng.exponential(10 / hazard)
+    censor_time = rng.uniform(0, 15, n)
+    # Whole months, so there are many tied times.
+    df["Time"] = np.ceil(np.minimum(event_time, censor_time) * 12) / 12
+    df["Event"] = (event_time <= censor_time).astype(int)
+    return df
+
+
+def test_kaplan_meier_matches_lifelines(cohort):
+    ours = kaplan_meier(cohort["Time"], cohort["Event"])
+    km = lifelines.KaplanMeierFitter().fit(cohort["Time"], cohort["Event"])
+    ref = km.survival_function_.join(km.confidence_interval_)
+    ours = ours.loc["all"].reindex(ref.index)
+    np.testing.assert_allclose(ours["survival"], ref.iloc[:, 0], rtol=RTOL)
+    np.testing.assert_allclose(ours["ci_lower"], ref.iloc[:, 1], rtol=RTOL)
+    np.testing.assert_allclose(ours["ci_upper"], ref.iloc[:, 2], rtol=RTOL)
+
+
+def test_grouped_kaplan_meier_matches_one_fit_per_group(cohort):
+    ours = kaplan_meier(cohort["Time"], cohort["Event"], groups=cohort["Smoking"])
+    for level, part in cohort.groupby("Smoking"):
+        km = lifelines.KaplanMeierFitter().fit(part["Time"], part["Event"])
+        ref = km.survival_function_.iloc[:, 0]
+        np.testing.assert_allclose(ours.loc[level]["survival"].reindex(ref.index), ref, rtol=RTOL)
+        np.testing.assert_array_equal(
+            ours.loc[level]["at_risk"].reindex(ref.index).iloc[1:],
+            km.event_table["at_risk"].reindex(ref.index).iloc[1:])
+
+
+def test_logrank_matches_lifelines(cohort):
+    ours = logrank_test(cohort["Time"], cohort["Event"], cohort["Smoking"])
+    ref = multivariate_logrank_test(cohort["Time"], cohort["Smoking"], cohort["Event"])
+    assert ours.df == ref.degrees_of_freedom
+    np.testing.assert_allclose(ours.statistic, ref.test_statistic, rtol=RTOL)
+    np.testing.assert_allclose(ours.p_value, ref.p_value, rtol=RTOL)
+
+
+def _lifelines_cox(df, **kwargs):
+    fitter = lifelines.CoxPHFitter()
+    fitter.fit(df, "Time", "Event", **kwargs)
+    return fitter.summary
+
+
+def test_cox_efron_matches_lifelines(cohort):
+    data = cohort[["Time", "Event", *COVARIATES]]
+    ours = cox_ph(data, "Time", "Event", covariates=COVARIATES).summary
+    ref = _lifelines_cox(data)
+    np.testing.assert_allclose(ours["coef"], ref["coef"], rtol=RTOL)
+    np.testing.assert_allclose(ours["se(coef)"], ref["se(coef)"], rtol=RTOL)
+    np.testing.assert_allclose(ours["p"], ref["p"], rtol=1e-4)
+
+
+def test_cox_breslow_matches_statsmodels(cohort):
+    # lifelines only implements Efron's method.
+    from statsmodels.duration.hazard_regression import PHReg
+
+    ours = cox_ph(cohort, "Time", "Event", covariates=COVARIATES, ties="breslow").summary
+    ref = PHReg(cohort["Time"], cohort[COVARIATES], status=cohort["Event"], ties="breslow").fit()
+    np.testing.assert_allclose(ours["coef"], ref.params, rtol=RTOL)
+    np.testing.assert_allclose(ours["se(coef)"], ref.bse, rtol=RTOL)
+
+
+def test_stratified_cox_matches_lifelines(cohort):
+    data = cohort[["Time", "Event", "Sex", *COVARIATES]]
+    ours = cox_ph(data, "Time", "Event", covariates=COVARIATES, strata="Sex").summary
+    ref = _lifelines_cox(data, strata=["Sex"])
+    np.testing.assert_allclose(ours["coef"], ref["coef"], rtol=RTOL)
+    np.testing.assert_allclose(ours["se(coef)"], ref["se(coef)"], rtol=RTOL)
+
+
+@pytest.mark.parametrize("dtype,chunk_size,rtol", [
+    (np.float64, 257, RTOL),
+    (np.float32, None, RTOL_FLOAT32),
+    (np.float32, 257, RTOL_FLOAT32),
+])
+def test_float32_and_chunked_cox(cohort, dtype, chunk_size, rtol):
+    data = cohort[["Time", "Event", *COVARIATES]]
+    ours = cox_ph(data, "Time", "Event", covariates=COVARIATES,
+                  dtype=dtype, chunk_size=chunk_size).summary
+    ref = _lifelines_cox(data)
+    np.testing.assert_allclose(ours["coef"], ref["coef"], rtol=rtol)
+    np.testing.assert_allclose(ours["se(coef)"], ref["se(coef)"], rtol=rtol)
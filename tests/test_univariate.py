@@ -0,0 +1,72 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from fns_toolkit.stats import anova, cohens_d
+
+RTOL = 1e-9
+
+
+@pytest.fixture(scope="module")
+def features():
+    rng = np.random.default_rng(6)
+    n, p = 300, 40
+    x = rng.normal(100, 5, (n, p))
+    groups = rng.choice(["A", "B", "C"], n)
+    x[groups == "B", :5] += 3
+    x[rng.random((n, p)) < 0.05] = np.nan
+    df = pd.DataFrame(x, columns=[f"m{i}" for i in range(p)])
+    df["Label"] = groups
+    return df
+
+
+def test_anova_matches_scipy(features):
+    res = anova(features, "Label", ci=False)
+    for col in ["m0", "m7", "m39"]:
+        samples = [g.dropna() for _, g in features.groupby("Label")[col]]
+        f, p = stats.f_oneway(*samples)
+        assert res.loc[col, "F"] == pytest.approx(f, rel=RTOL)
+        assert res.loc[col, "p_value"] == pytest.approx(p, rel=1e-6)
+
+
+def test_cohens_d_t_matches_scipy(features):
+    two = features[features["Label"] != "C"]
+    res = cohens_d(two, "Label")
+    for col in ["m0", "m20"]:
+        a = two.loc[two["Label"] == "A", col].dropna()
+        b = two.loc[two["Label"] == "B", col].dropna()
+        t, p = stats.ttest_ind(b, a)
+        assert res.loc[col, "t"] == pytest.approx(t, rel=RTOL)
+        assert res.loc[col, "p_value"] == pytest.approx(p, rel=1e-6)
+
+
+@pytest.mark.parametrize("block_size", [None, 1, 7])
+def test_blocks_and_inputs_agree(features, block_size):
+    whole = anova(features, "Label")
+    columns = [c for c in features.columns if c != "Label"]
+    blocked = anova(features, "Label", block_size=block_size)
+    from_array = anova(features[columns].to_numpy(), features["Label"].to_numpy(),
+                       columns=columns, block_size=block_size)
+    pd.testing.assert_frame_equal(blocked, whole, rtol=RTOL)
+    pd.testing.assert_frame_equal(from_array, whole, rtol=RTOL)
+
+
+def test_dataframe_input_is_converted_block_by_block():
+    rng = np.random.default_rng(1)
+    n, p = 2000, 400
+    df = pd.DataFrame(rng.normal(size=(n, p)).astype(np.float32),
+                      columns=[f"m{i}" for i in range(p)])
+    groups = np.repeat(["A", "B"], n // 2)
+    full_copy = n * p * 8
+
+    tracemalloc.start()
+    try:
+        anova(df, groups, memory_budget=full_copy // 20, ci=False)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < full_copy / 2